@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bump whenever the on-disk layout below changes.
+CACHE_FORMAT_VERSION = 2
+
+# Entries modified this close to the scan are not trusted on the next run: a
+# write landing in the same timestamp tick would otherwise go unnoticed.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def get_cache_dir() -> Path:
+    return Path.home() / ".shipsight" / "cache"
+
+
+class ScanCache:
+    """Persistent scan state that lets repeat runs skip unchanged work.
+
+    Three tables are kept per project:
+
+    - ``dirs``: raw listing of each directory keyed by its relative path and
+      mtime. A directory whose mtime has not moved is not listed again.
+    - ``files``: per-file analysis (content hash, line counts, hero score)
+      keyed by relative path and valid while size and mtime match, so
+      unchanged files are never re-read. Heroes shown in full also keep their
+      signatures here, so they are not re-parsed for the context either.
+    - ``signatures``: extracted signatures keyed by language and content hash,
+      so unchanged content is never re-parsed.
+
+    The whole cache is discarded when the format version or the caller's
+    ``fingerprint`` (ignore list + scoring rules) differs from the stored one.
+    """
+
+    def __init__(self, path: Path, fingerprint: str = ""):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.dirs: Dict[str, dict] = {}
+        self.files: Dict[str, dict] = {}
+        self.signatures: Dict[str, list] = {}
+        self.stats = {"dir_hits": 0, "dir_misses": 0, "file_hits": 0, "file_misses": 0}
+        self._started_ns = time.time_ns()
+        self._dirty = False
+
+    @classmethod
+    def for_project(cls, project_path: Path, fingerprint: str = "",
+                    cache_dir: Optional[Path] = None) -> "ScanCache":
+        """Open (and load) the cache file belonging to ``project_path``."""
+        resolved = str(Path(project_path).resolve())
+        key = hashlib.sha1(resolved.encode("utf-8")).hexdigest()[:16]
+        name = f"{Path(resolved).name or 'root'}-{key}.json"
+        cache = cls((cache_dir or get_cache_dir()) / name, fingerprint)
+        cache.load()
+        return cache
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_FORMAT_VERSION or data.get("fingerprint") != self.fingerprint:
+            # Rules changed since the last run - start from scratch
+            self._dirty = True
+            return
+        self.dirs = data.get("dirs", {})
+        self.files = data.get("files", {})
+        self.signatures = data.get("signatures", {})
+
+    def save(self):
+        if not self._dirty:
+            return
+        data = {
+            "version": CACHE_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "dirs": self.dirs,
+            "files": self.files,
+            "signatures": self.signatures,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError:
+            # A missing cache only costs time on the next run
+            pass
+
+    def _is_racy(self, mtime_ns: int) -> bool:
+        return mtime_ns >= self._started_ns - RACY_WINDOW_NS
+
+    # -- directories ------------------------------------------------------
+
+    def lookup_dir(self, rel: str, mtime_ns: int) -> Optional[Tuple[List[str], List[str]]]:
+        """Return the cached (file_names, subdir_names) if the directory is unchanged."""
+        entry = self.dirs.get(rel)
+        if entry and entry["mtime"] == mtime_ns:
+            self.stats["dir_hits"] += 1
+            return entry["files"], entry["dirs"]
+        self.stats["dir_misses"] += 1
+        return None
+
+    def store_dir(self, rel: str, mtime_ns: int, file_names: List[str], subdirs: List[str]):
+        if self._is_racy(mtime_ns):
+            self.dirs.pop(rel, None)
+        else:
+            self.dirs[rel] = {"mtime": mtime_ns, "files": file_names, "dirs": subdirs}
+        self._dirty = True
+
+    # -- files ------------------------------------------------------------
+
+    def lookup_file(self, rel: str, size: int, mtime_ns: int) -> Optional[dict]:
+        entry = self.files.get(rel)
+        if entry and entry["size"] == size and entry["mtime"] == mtime_ns:
+            self.stats["file_hits"] += 1
+            return entry
+        self.stats["file_misses"] += 1
+        return None
+
+    def store_file(self, rel: str, size: int, mtime_ns: int, record: dict):
+        if self._is_racy(mtime_ns):
+            self.files.pop(rel, None)
+        else:
+            self.files[rel] = {**record, "size": size, "mtime": mtime_ns}
+        self._dirty = True
+
+    def lookup_file_signatures(self, rel: str, size: int, mtime_ns: int) -> Optional[list]:
+        entry = self.files.get(rel)
+        if entry and entry["size"] == size and entry["mtime"] == mtime_ns:
+            return entry.get("signatures")
+        return None
+
+    def store_file_signatures(self, rel: str, size: int, mtime_ns: int, sigs: list):
+        """Attach signatures to a file's entry; dropped along with the entry when the file changes."""
+        entry = self.files.get(rel)
+        if entry and entry["size"] == size and entry["mtime"] == mtime_ns:
+            entry["signatures"] = sigs
+            self._dirty = True
+
+    # -- signatures -------------------------------------------------------
+
+    def lookup_signatures(self, key: str) -> Optional[list]:
+        return self.signatures.get(key)
+
+    def store_signatures(self, key: str, sigs: list):
+        self.signatures[key] = sigs
+        self._dirty = True
+
+    def prune(self, live_dirs: Iterable[str], live_files: Iterable[str], live_signatures: Iterable[str] = ()):
+        """Drop entries for directories, files and contents that no longer exist."""
+        tables = (
+            (self.dirs, set(live_dirs)),
+            (self.files, set(live_files)),
+            (self.signatures, set(live_signatures)),
+        )
+        for table, live in tables:
+            stale = [k for k in table if k not in live]
+            for k in stale:
+                del table[k]
+            if stale:
+                self._dirty = True
@@ -0,0 +1,126 @@
+import math
+from typing import Callable, Dict, List, Optional
+
+try:
+    import tiktoken  # Optional: exact counts for OpenAI-style tokenizers
+except ImportError:
+    tiktoken = None
+
+# Tokens reserved for project context per provider, leaving room in the model's
+# window for the instructions and the generated answer. Small local models get
+# the tightest budget. Override with `ai.context_tokens` in shipsight.yml.
+CONTEXT_BUDGETS = {
+    "ollama": 1500,
+    "groq": 4000,
+    "openai": 6000,
+    "anthropic": 6000,
+}
+DEFAULT_CONTEXT_BUDGET = 3000
+
+# Below this a section is dropped rather than truncated into noise
+MIN_SECTION_TOKENS = 24
+
+TokenCounter = Callable[[str], int]
+
+
+def context_budget(provider: str, model: str = "", override: Optional[int] = None) -> int:
+    """Token budget for the project context sent to ``provider``/``model``."""
+    if override:
+        return override
+    budget = CONTEXT_BUDGETS.get(provider, DEFAULT_CONTEXT_BUDGET)
+    # Models advertising a small window in their name (e.g. *-8192) get a smaller share
+    for window in (2048, 4096, 8192):
+        if str(window) in model:
+            budget = min(budget, window // 3)
+    return budget
+
+
+def heuristic_token_count(text: str) -> int:
+    """~4 characters per token, which holds well for English prose and code."""
+    return math.ceil(len(text) / 4)
+
+
+def token_counter(model: str = "") -> TokenCounter:
+    """Best available token counter: tiktoken when installed, else the heuristic."""
+    if tiktoken is None:
+        return heuristic_token_count
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class ContextBuilder:
+    """Assemble prompt context from sections under a token budget.
+
+    Sections are funded in priority order (lower first) and rendered in the
+    order they were added. A section that does not fit is cut at a line
+    boundary; sections left with less than ``MIN_SECTION_TOKENS`` are dropped.
+    Per-section usage is available from ``report()`` after ``build()``.
+    """
+
+    def __init__(self, budget_tokens: int, counter: TokenCounter = heuristic_token_count):
+        self.budget = budget_tokens
+        self.count = counter
+        self._sections: List[dict] = []
+        self._report: Dict = {}
+
+    def add(self, name: str, text: str, priority: int, required: bool = False,
+            fallbacks: Optional[List[str]] = None):
+        """Queue a section. ``required`` sections are kept even past the budget.
+
+        ``fallbacks`` are progressively smaller renderings of the same content
+        (e.g. a shallower tree); the first that fits is used before truncating.
+        """
+        if text:
+            self._sections.append({
+                "name": name, "text": text, "priority": priority,
+                "required": required, "fallbacks": fallbacks or [],
+            })
+
+    def _fit(self, text: str, tokens: int) -> str:
+        """Longest prefix of whole lines that fits in ``tokens``."""
+        kept, used = [], self.count("... (truncated)\n")
+        for line in text.splitlines(keepends=True):
+            cost = self.count(line)
+            if used + cost > tokens:
+                break
+            kept.append(line)
+            used += cost
+        return "".join(kept) + "... (truncated)\n" if kept else ""
+
+    def build(self) -> str:
+        remaining = self.budget
+        rendered: Dict[int, str] = {}
+        sections_report: Dict[str, Dict] = {}
+
+        for i, section in sorted(enumerate(self._sections), key=lambda s: (s[1]["priority"], s[0])):
+            text = section["text"]
+            requested = self.count(text)
+            if requested > remaining and not section["required"]:
+                for fallback in section["fallbacks"]:
+                    if self.count(fallback) <= remaining:
+                        text = fallback
+                        break
+                else:
+                    smallest = section["fallbacks"][-1] if section["fallbacks"] else text
+                    text = self._fit(smallest, remaining) if remaining >= MIN_SECTION_TOKENS else ""
+            used = self.count(text) if text else 0
+            remaining -= used
+            rendered[i] = text
+            sections_report[section["name"]] = {
+                "requested": requested,
+                "used": used,
+                "truncated": used < requested,
+            }
+
+        self._report = {
+            "budget": self.budget,
+            "used": self.budget - remaining,
+            "sections": sections_report,
+        }
+        return "".join(rendered[i] for i in range(len(self._sections)) if rendered[i])
+
+    def report(self) -> Dict:
+        return self._report
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import math
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+C = TypeVar("C")
+T = TypeVar("T")
+
+# Log-spaced latency buckets from 50 ms to ~10 min (about 12% wide each)
+BUCKET_MIN = 0.05
+BUCKET_GROWTH = 1.12
+BUCKET_COUNT = 90
+# Older samples fade so the threshold follows the provider's current behaviour
+DECAY = 0.98
+MIN_SAMPLES = 5
+
+
+def get_latency_path() -> Path:
+    return Path.home() / ".shipsight" / "latency.json"
+
+
+class LatencyHistogram:
+    """Exponentially decayed, log-bucketed latency histogram."""
+
+    def __init__(self, counts: Optional[List[float]] = None, samples: int = 0):
+        self.counts = list(counts or [0.0] * BUCKET_COUNT)
+        self.samples = samples
+
+    @staticmethod
+    def bucket(seconds: float) -> int:
+        if seconds <= BUCKET_MIN:
+            return 0
+        return min(BUCKET_COUNT - 1, int(math.log(seconds / BUCKET_MIN, BUCKET_GROWTH)) + 1)
+
+    @staticmethod
+    def upper_bound(bucket: int) -> float:
+        return BUCKET_MIN * BUCKET_GROWTH ** bucket
+
+    def record(self, seconds: float):
+        self.counts = [c * DECAY for c in self.counts]
+        self.counts[self.bucket(seconds)] += 1.0
+        self.samples += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency under which a fraction ``q`` of (recent) samples fall."""
+        total = sum(self.counts)
+        if self.samples < MIN_SAMPLES or total <= 0:
+            return None
+        running = 0.0
+        for i, count in enumerate(self.counts):
+            running += count
+            if running >= q * total:
+                return self.upper_bound(i)
+        return self.upper_bound(BUCKET_COUNT - 1)
+
+
+class LatencyStore:
+    """Time-to-first-token histograms per ``provider/model``, persisted between runs."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else get_latency_path()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, entry in data.items():
+                if len(entry.get("counts", [])) == BUCKET_COUNT:
+                    self.histograms[key] = LatencyHistogram(entry["counts"], entry.get("samples", 0))
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def save(self):
+        if not self._dirty:
+            return
+        data = {k: {"counts": [round(c, 4) for c in h.counts], "samples": h.samples}
+                for k, h in self.histograms.items()}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError:
+            pass # Histograms are an optimization; never fail a run over them
+
+    def record(self, provider: str, model: str, seconds: float):
+        self.histograms.setdefault(f"{provider}/{model}", LatencyHistogram()).record(seconds)
+        self._dirty = True
+
+    def hedge_delay(self, provider: str, model: str, percentile: float, default: float) -> float:
+        """How long to wait for a first token before hedging to the next provider."""
+        histogram = self.histograms.get(f"{provider}/{model}")
+        value = histogram.percentile(percentile) if histogram else None
+        return default if value is None else value
+
+
+# An attempt calls claim() when it produces its first output. True means it
+# won the race (everyone else is cancelled); False means another attempt won.
+Claim = Callable[[], bool]
+
+
+async def hedged_race(candidates: Sequence[C], attempt: Callable[[C, Claim], Awaitable[T]],
+                      hedge_after: Callable[[C], float]) -> Tuple[C, T]:
+    """Run ``attempt`` on the first candidate, hedging and falling back down the list.
+
+    If the newest attempt has not claimed (produced output) within
+    ``hedge_after(candidate)`` seconds, the next candidate starts alongside
+    it. A failure before claiming starts the next candidate at once. The
+    first attempt to claim wins and the others are cancelled; if the winner
+    fails after claiming, its error is raised (its output is already out).
+    """
+    if not candidates:
+        raise ValueError("No candidates to run")
+    pending: Dict[asyncio.Task, C] = {}
+    errors: List[BaseException] = []
+    state = {"winner": None, "next": 0, "launched_at": 0.0}
+
+    def cancel_others(keep: Optional[asyncio.Task]):
+        for task in pending:
+            if task is not keep:
+                task.cancel()
+
+    def launch():
+        candidate = candidates[state["next"]]
+        state["next"] += 1
+        state["launched_at"] = time.monotonic()
+        task_ref: List[asyncio.Task] = []
+
+        def claim() -> bool:
+            if state["winner"] is None:
+                state["winner"] = task_ref[0]
+                cancel_others(task_ref[0])
+            return state["winner"] is task_ref[0]
+
+        task = asyncio.ensure_future(attempt(candidate, claim))
+        task_ref.append(task)
+        pending[task] = candidate
+
+    launch()
+    try:
+        while pending:
+            timeout = None
+            if state["winner"] is None and state["next"] < len(candidates):
+                newest = candidates[state["next"] - 1]
+                timeout = max(0.0, hedge_after(newest) - (time.monotonic() - state["launched_at"]))
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()  # Hedge: the newest attempt is slower than usual
+                continue
+            for task in done:
+                candidate = pending.pop(task)
+                if task.cancelled():
+                    continue
+                error = task.exception()
+                if error is None:
+                    if state["winner"] in (None, task):
+                        state["winner"] = task
+                        cancel_others(task)
+                        return candidate, task.result()
+                    continue
+                errors.append(error)
+                if state["winner"] is task:
+                    raise error
+                if state["winner"] is None and state["next"] < len(candidates):
+                    launch()  # Fall back to the next candidate
+        raise errors[-1] if errors else asyncio.CancelledError()
+    finally:
+        cancel_others(None)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,120 @@
+import re
+from pathlib import Path
+from typing import Iterable, List, Pattern, Tuple
+
+# Per-directory ignore files honoured by the native matcher, lowest precedence first
+IGNORE_FILES = (".gitignore", ".shipsightignore")
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate one gitignore glob into a regex body (no anchors)."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """Native matcher for ``.gitignore`` / ``.shipsightignore`` files.
+
+    Follows git's semantics: ``!`` negation, trailing ``/`` for directories
+    only, patterns containing a ``/`` are anchored to the file's directory,
+    ``*``/``?``/``[...]``/``**`` globs, and the last matching rule wins with
+    deeper files taking precedence. Callers are expected to prune ignored
+    directories, since nothing below an excluded directory can be re-included.
+    """
+
+    def __init__(self):
+        # (base_dir, regex, negate, dir_only, anchored) in precedence order
+        self._rules: List[Tuple[str, Pattern, bool, bool, bool]] = []
+
+    @classmethod
+    def for_root(cls, root: Path) -> "IgnoreRules":
+        """Rules seeded with the repo-local exclude file, if any."""
+        rules = cls()
+        rules.load_file(Path(root) / ".git" / "info" / "exclude", "")
+        return rules
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def add_patterns(self, base: str, lines: Iterable[str]):
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            while line.endswith(" ") and not line.endswith("\\ "):
+                line = line[:-1]
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            if line.startswith("/"):
+                line = line[1:]
+            if not line:
+                continue
+            self._rules.append((base, re.compile(glob_to_regex(line)), negate, dir_only, anchored))
+
+    def load_file(self, path: Path, base: str):
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                self.add_patterns(base, f)
+        except OSError:
+            pass
+
+    def load_dir(self, root: Path, rel: str, file_names: Iterable[str]):
+        """Load the ignore files present in directory ``rel`` (given its file names)."""
+        names = set(file_names)
+        for ignore_file in IGNORE_FILES:
+            if ignore_file in names:
+                self.load_file(Path(root) / rel / ignore_file, rel)
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        """Whether a POSIX path relative to the root is excluded by its own name/location."""
+        name = path.rpartition("/")[2]
+        ignored = False
+        for base, regex, negate, dir_only, anchored in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not path.startswith(base + "/"):
+                    continue
+                rel = path[len(base) + 1:]
+            else:
+                rel = path
+            if regex.fullmatch(rel if anchored else name):
+                ignored = not negate
+        return ignored
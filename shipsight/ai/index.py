@@ -0,0 +1,288 @@
+import os
+import shutil
+import stat
+import subprocess
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from shipsight.ai.cache import ScanCache
+from shipsight.ai.ignore import IgnoreRules
+
+
+class IndexedFile(NamedTuple):
+    path: str   # POSIX path relative to the project root
+    dir: str    # POSIX directory relative to the project root ("" for root)
+    name: str
+    ext: str
+    size: int
+    mtime_ns: int
+
+
+class ProjectIndex:
+    """Single pruned listing of a project, shared by every analysis step.
+
+    The tree is walked once with ``os.scandir``. Ignored directories are pruned
+    by exact name before they are entered, so the cost grows with the files we
+    keep rather than with everything on disk (``node_modules``, ``.venv``...).
+
+    Files are stored column-wise (names list + packed arrays) and grouped by
+    directory in pre-order, which keeps memory small on large monorepos and
+    lets callers replay the walk order without touching the disk again.
+
+    With a ``ScanCache`` attached, directories whose mtime is unchanged since
+    the previous run reuse their cached listing and only their files are
+    re-stat'ed.
+
+    Inside a git repository the file list comes straight from the git index
+    (tracked + untracked-but-not-ignored), so ignored trees such as ``out/``
+    or ``target/`` cost no I/O at all. Elsewhere the walk applies
+    ``.gitignore``/``.shipsightignore`` natively. Both paths filter through
+    the same ``IgnoreRules`` and therefore keep the same files.
+    """
+
+    def __init__(self, root: Path, ignores: Iterable[str] = (), cache: Optional[ScanCache] = None,
+                 use_git: bool = True):
+        self.root = Path(root)
+        self.ignores: Set[str] = set(ignores)
+        self.cache = cache
+        self.use_git = use_git
+        self.source = "walk"  # or "git"
+        self.dirs: List[str] = []
+        self.scan_seconds = 0.0
+
+        self._dir_first = array("L")   # index of the first file of each dir
+        self._dir_of = array("L")      # dir index of each file
+        self._names: List[str] = []
+        self._sizes = array("q")
+        self._mtimes = array("q")
+        self._exts = array("I")        # index into _ext_table (generated trees can have >65535 suffixes)
+        self._ext_table: List[str] = []
+        self._ext_ids: Dict[str, int] = {}
+        self._lookup: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def build(cls, root: Path, ignores: Iterable[str] = (),
+              cache: Optional[ScanCache] = None, use_git: bool = True) -> "ProjectIndex":
+        index = cls(root, ignores, cache, use_git)
+        start = time.perf_counter()
+        index._scan()
+        index.scan_seconds = time.perf_counter() - start
+        return index
+
+    # -- construction -----------------------------------------------------
+
+    def _scan(self):
+        rules = IgnoreRules.for_root(self.root)
+        paths = self._git_paths() if self.use_git else None
+        if paths:
+            self.source = "git"
+            self._scan_paths(paths, rules)
+        else:
+            self.source = "walk"
+            self._scan_walk(rules)
+
+    def _scan_walk(self, rules: IgnoreRules):
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            files, subdirs = self._list_dir(rel)
+            rules.load_dir(self.root, rel, (f[0] for f in files))
+            if rules:
+                prefix = f"{rel}/" if rel else ""
+                files = [f for f in files if not rules.is_ignored(prefix + f[0], False)]
+                subdirs = [d for d in subdirs if not rules.is_ignored(prefix + d, True)]
+            self._add_dir(rel, files)
+            # Reverse-sorted push gives a sorted pre-order walk (like os.walk topdown)
+            for name in sorted(subdirs, reverse=True):
+                stack.append(f"{rel}/{name}" if rel else name)
+
+    def _git_paths(self) -> Optional[List[str]]:
+        """Files git would consider part of the project, or None outside a usable repo."""
+        if not shutil.which("git"):
+            return None
+        try:
+            result = subprocess.run(
+                ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+                cwd=self.root, capture_output=True, timeout=60,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+        if result.returncode != 0:
+            return None
+        paths = result.stdout.decode("utf-8", errors="surrogateescape").split("\0")
+        # Unmerged entries are listed once per stage
+        return list(dict.fromkeys(p for p in paths if p))
+
+    def _scan_paths(self, paths: List[str], rules: IgnoreRules):
+        """Build the index from a flat path list, replaying the same walk order and filters."""
+        by_dir: Dict[str, List[str]] = {}
+        for path in paths:
+            rel, _, name = path.rpartition("/")
+            by_dir.setdefault(rel, []).append(name)
+        # Parents first so deeper ignore files take precedence, as in the walk
+        for rel in sorted(by_dir, key=lambda d: d.split("/") if d else []):
+            rules.load_dir(self.root, rel, by_dir[rel])
+
+        kept: Dict[str, bool] = {"": True}
+        def is_kept(rel: str) -> bool:
+            if rel not in kept:
+                parent, _, name = rel.rpartition("/")
+                kept[rel] = (is_kept(parent) and name not in self.ignores
+                             and not rules.is_ignored(rel, True))
+            return kept[rel]
+
+        children: Dict[str, Set[str]] = {}
+        linked: Set[str] = {""}
+        for rel in by_dir:
+            while rel not in linked and is_kept(rel):
+                linked.add(rel)
+                parent, _, name = rel.rpartition("/")
+                children.setdefault(parent, set()).add(name)
+                rel = parent
+
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            prefix = f"{rel}/" if rel else ""
+            names = [n for n in by_dir.get(rel, ()) if not rules.is_ignored(prefix + n, False)]
+            self._add_dir(rel, self._stat_files(self.root / rel if rel else self.root, sorted(names)))
+            for name in sorted(children.get(rel, ()), reverse=True):
+                stack.append(prefix + name)
+
+    def _list_dir(self, rel: str) -> Tuple[List[Tuple[str, int, int]], List[str]]:
+        """List one directory, returning kept files as (name, size, mtime_ns) and subdirs."""
+        full = self.root / rel if rel else self.root
+        mtime_ns = None
+        if self.cache is not None:
+            try:
+                mtime_ns = os.stat(full).st_mtime_ns
+            except OSError:
+                return [], []
+            cached = self.cache.lookup_dir(rel, mtime_ns)
+            if cached is not None:
+                file_names, subdirs = cached
+                return self._stat_files(full, file_names), [d for d in subdirs if d not in self.ignores]
+
+        files, subdirs = [], []
+        try:
+            with os.scandir(full) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            files.append((entry.name, st.st_size, st.st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        files.sort()
+        if mtime_ns is not None:
+            self.cache.store_dir(rel, mtime_ns, [f[0] for f in files], subdirs)
+        return files, [d for d in subdirs if d not in self.ignores]
+
+    @staticmethod
+    def _stat_files(full: Path, file_names: List[str]) -> List[Tuple[str, int, int]]:
+        """Refresh size/mtime for a cached listing; contents may change without the dir mtime moving."""
+        files = []
+        for name in file_names:
+            try:
+                st = os.stat(os.path.join(full, name))
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                files.append((name, st.st_size, st.st_mtime_ns))
+        return files
+
+    def _add_dir(self, rel: str, files: List[Tuple[str, int, int]]):
+        dir_idx = len(self.dirs)
+        self.dirs.append(rel)
+        self._dir_first.append(len(self._names))
+        for name, size, mtime_ns in files:
+            self._dir_of.append(dir_idx)
+            self._names.append(name)
+            self._sizes.append(size)
+            self._mtimes.append(mtime_ns)
+            self._exts.append(self._ext_id(os.path.splitext(name)[1]))
+
+    def _ext_id(self, ext: str) -> int:
+        ext_id = self._ext_ids.get(ext)
+        if ext_id is None:
+            ext_id = self._ext_ids[ext] = len(self._ext_table)
+            self._ext_table.append(ext)
+        return ext_id
+
+    # -- queries ----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _file(self, i: int) -> IndexedFile:
+        rel_dir = self.dirs[self._dir_of[i]]
+        name = self._names[i]
+        return IndexedFile(
+            f"{rel_dir}/{name}" if rel_dir else name,
+            rel_dir,
+            name,
+            self._ext_table[self._exts[i]],
+            self._sizes[i],
+            self._mtimes[i],
+        )
+
+    def _dir_range(self, dir_idx: int) -> range:
+        end = self._dir_first[dir_idx + 1] if dir_idx + 1 < len(self.dirs) else len(self._names)
+        return range(self._dir_first[dir_idx], end)
+
+    def files(self, extensions: Optional[Iterable[str]] = None) -> Iterator[IndexedFile]:
+        """Iterate kept files in walk order, optionally filtered by extension."""
+        if extensions is None:
+            for i in range(len(self._names)):
+                yield self._file(i)
+            return
+        wanted = {self._ext_ids[e] for e in extensions if e in self._ext_ids}
+        for i, ext_id in enumerate(self._exts):
+            if ext_id in wanted:
+                yield self._file(i)
+
+    def walk(self) -> Iterator[Tuple[str, List[IndexedFile]]]:
+        """Replay the scan as (rel_dir, files) pairs in pre-order."""
+        for dir_idx, rel in enumerate(self.dirs):
+            yield rel, [self._file(i) for i in self._dir_range(dir_idx)]
+
+    def get(self, rel_path: str) -> Optional[IndexedFile]:
+        """Look up a file by its POSIX path relative to the root."""
+        if self._lookup is None:
+            self._lookup = {f.path: i for i, f in enumerate(self.files())}
+        i = self._lookup.get(rel_path)
+        return self._file(i) if i is not None else None
+
+    def has(self, rel_path: str) -> bool:
+        return self.get(rel_path) is not None
+
+    def names(self) -> Set[str]:
+        """All distinct file names anywhere in the index."""
+        return set(self._names)
+
+    def extension_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for ext_id in self._exts:
+            ext = self._ext_table[ext_id]
+            if ext:
+                counts[ext] = counts.get(ext, 0) + 1
+        return counts
+
+    def tree_counts(self) -> Dict[str, int]:
+        """Number of kept files under each directory, descendants included."""
+        counts = {rel: len(self._dir_range(i)) for i, rel in enumerate(self.dirs)}
+        # Children come after their parents in pre-order, so a reverse pass rolls counts up
+        for rel in reversed(self.dirs):
+            if rel:
+                parent = rel.rpartition("/")[0]
+                counts[parent] = counts.get(parent, 0) + counts[rel]
+        return counts
+
+    def abspath(self, f: IndexedFile) -> Path:
+        return self.root / f.path
@@ -1,6 +1,19 @@
+import hashlib
+import heapq
+import io
+import json
+import mmap
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+from shipsight.ai.cache import ScanCache, CACHE_FORMAT_VERSION
+from shipsight.ai.context import ContextBuilder, DEFAULT_CONTEXT_BUDGET, TokenCounter, heuristic_token_count
+from shipsight.ai.index import IndexedFile, ProjectIndex
+from shipsight.ai.signatures import SIGNATURE_VERSION, Signature, SignatureMemo
+from shipsight.ai.workspaces import analyze_workspaces, detect_workspaces
+from shipsight.engine.detectors import Manifests, detect_stack, project_dna
 
 # Centralized ignore list for all analysis methods
 IGNORES = [
@@ -9,9 +22,173 @@ IGNORES = [
     "build", "coverage", ".pytest_cache", ".config"
 ]
 
+# Hero selection rules
+HERO_EXTENSIONS = (".py", ".js", ".ts", ".go", ".rs", ".tsx", ".dart")
+HERO_SKIP_TOKENS = ["config", "setup", "test", "spec", "d.ts", "init"]
+# Priority directories - expanded for complex architectures
+PRIORITY_DIRS = ["features", "services", "api", "src", "app", "lib", "components", "pages", "core", "integrations", "models"]
+MIN_CODE_LINES = 15     # Significant implementation
+SUMMARY_LINES = 100     # Above this, send signatures instead of the full file
+MAX_SIGNATURES = 50     # Signatures shown per summarized file
+HERO_COUNT = 5
+# Bounded reads: never load more than this from a single candidate
+MAX_READ_BYTES = 512 * 1024
+MMAP_THRESHOLD = 64 * 1024
+BINARY_SNIFF_BYTES = 8192
+MINIFIED_LINE_LENGTH = 1000  # Any line this long means generated/minified code
+HERO_WORKERS = min(8, os.cpu_count() or 1)
+DOC_READ_CHARS = 8000
+
+# Everything that changes which files win or what we extract from them.
+# Part of the scan cache fingerprint so cached results never outlive the rules.
+SCORING_RULES = {
+    "extensions": HERO_EXTENSIONS,
+    "skip": HERO_SKIP_TOKENS,
+    "priority_dirs": PRIORITY_DIRS,
+    "priority_boost": 10,
+    "keyword_boost": 5,
+    "min_code_lines": MIN_CODE_LINES,
+    "summary_lines": SUMMARY_LINES,
+    "signatures": SIGNATURE_VERSION,
+    "max_read_bytes": MAX_READ_BYTES,
+    "minified_line_length": MINIFIED_LINE_LENGTH,
+}
+
+def scan_fingerprint() -> str:
+    """Hash of the rules a scan cache was built with."""
+    rules = {"version": CACHE_FORMAT_VERSION, "ignores": sorted(IGNORES), "scoring": SCORING_RULES}
+    return hashlib.sha1(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()
+
+def score_hero_candidate(entry: IndexedFile) -> int:
+    """Score based on directory and filename importance (0 = not a candidate)."""
+    name = entry.name.lower()
+    # Skip config files
+    if any(c in name for c in HERO_SKIP_TOKENS):
+        return 0
+
+    score = 1
+    if any(p in (entry.dir or ".").lower() for p in PRIORITY_DIRS):
+        score += SCORING_RULES["priority_boost"] # Massive boost for architectural code
+    if "api" in name or "service" in name:
+        score += SCORING_RULES["keyword_boost"]
+    return score
+
+def read_source_head(path: Path, size: int) -> Tuple[Optional[bytes], bool]:
+    """Read at most MAX_READ_BYTES of a file. Returns (None, False) for binary content.
+
+    Large files are mapped rather than read so sniffing and slicing never pull
+    the whole file into memory.
+    """
+    with open(path, "rb") as f:
+        head = None
+        if size > MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if mm.find(b"\0", 0, BINARY_SNIFF_BYTES) != -1:
+                        return None, False
+                    head = mm[:MAX_READ_BYTES]
+            except ValueError:
+                pass  # Emptied since it was indexed, or a special file mmap refuses: read it instead
+        if head is None:
+            head = f.read(MAX_READ_BYTES)
+            if b"\0" in head[:BINARY_SNIFF_BYTES]:
+                return None, False
+    truncated = size > len(head)
+    cut = head.rfind(b"\n")
+    if truncated and cut != -1:
+        # Never split a line (or a multi-byte character) at the cut. A window
+        # with no newline at all is kept whole so one-line bundles read as minified.
+        head = head[:cut + 1]
+    return head, truncated
+
+def is_minified(head: bytes) -> bool:
+    """Cheap check for bundled/minified sources: look for absurdly long lines."""
+    start = 0
+    while start < len(head):
+        end = head.find(b"\n", start)
+        if end == -1:
+            end = len(head)
+        if end - start > MINIFIED_LINE_LENGTH:
+            return True
+        start = end + 1
+    return False
+
+def analyze_source(path: Path, size: int, memo: Optional[SignatureMemo] = None) -> Tuple[dict, Optional[List[str]]]:
+    """Build the cacheable analysis record of a source file.
+
+    Safe to call from worker threads. Returns the decoded lines as well when the
+    file is small enough to be shown in full, so winners are not read twice.
+    Files that will be summarized get their signatures extracted into ``memo``.
+    """
+    head, truncated = read_source_head(path, size)
+    record = {"score": 0, "lines": 0, "code_lines": 0}
+    if head is None:
+        record["skipped"] = "binary"
+        return record, None
+    record["hash"] = hashlib.sha1(head).hexdigest()
+    if is_minified(head):
+        record["skipped"] = "minified"
+        return record, None
+    try:
+        lines = io.StringIO(head.decode("utf-8"), newline=None).readlines()
+    except UnicodeDecodeError:
+        record["skipped"] = "encoding"
+        return record, None
+
+    # Filter for substantial code
+    record["lines"] = len(lines)
+    record["code_lines"] = sum(
+        1 for l in lines if l.strip() and not l.strip().startswith(("#", "//", "import", "from"))
+    )
+    if truncated:
+        record["truncated"] = True
+    if truncated or record["lines"] > SUMMARY_LINES:
+        record["summary"] = True
+        if memo is not None:
+            memo.extract("".join(lines), path.suffix, record["hash"])
+        return record, None
+    return record, lines
+
+def _render_depth(rendered: str) -> int:
+    """Nesting depth of a line produced by ``Signature.render``."""
+    body = rendered.partition(": ")[2]
+    return (len(body) - len(body.lstrip(" "))) // 2
+
+
 class IntelligenceEngine:
-    def __init__(self, project_path: Path):
+    def __init__(self, project_path: Path, cache: Optional[ScanCache] = None):
         self.project_path = project_path
+        self.cache = cache
+        self.signatures = SignatureMemo(cache)
+        self.context_report: Dict = {}
+        self._docs: Dict[str, Optional[str]] = {}
+        self._full_heroes: Dict[str, IndexedFile] = {}  # Hero name -> file, for heroes shown in full
+        self._index: Optional[ProjectIndex] = None
+
+    @classmethod
+    def with_cache(cls, project_path: Path, cache_dir: Optional[Path] = None) -> "IntelligenceEngine":
+        """Engine backed by the persistent scan cache for repeat runs."""
+        return cls(project_path, ScanCache.for_project(project_path, scan_fingerprint(), cache_dir))
+
+    @property
+    def index(self) -> ProjectIndex:
+        """Pruned file listing, built once and shared by every analysis method."""
+        if self._index is None:
+            self._index = ProjectIndex.build(self.project_path, IGNORES, self.cache)
+        return self._index
+
+    def save_cache(self):
+        """Persist the scan cache, dropping entries for files that are gone."""
+        if self.cache is None or self._index is None:
+            return
+        live_files = {f.path: f.ext for f in self._index.files(HERO_EXTENSIONS)}
+        live_signatures = [
+            SignatureMemo.key(live_files[path], record["hash"])
+            for path, record in self.cache.files.items()
+            if path in live_files and record.get("summary")
+        ]
+        self.cache.prune(self._index.dirs, live_files, live_signatures)
+        self.cache.save()
 
     def analyze_stack(self) -> Dict:
         """Analyze project files to understand the architecture."""
@@ -19,190 +196,254 @@ class IntelligenceEngine:
             "name": self.project_path.name,
             "description": self.get_project_intent(),
             "frameworks": [],
-            "file_counts": {}
+            "file_counts": self.index.extension_counts()
         }
-        
-        for root, dirs, files in os.walk(self.project_path):
-            if any(p in root for p in [".git", "node_modules", ".venv", "__pycache__", "shipsight_output", "dist", ".next"]):
-                continue
-                
-            for file in files:
-                ext = Path(file).suffix
-                if ext:
-                    analysis["file_counts"][ext] = analysis["file_counts"].get(ext, 0) + 1
-                
-                # Detect frameworks
-                if file == "package.json":
-                    analysis["frameworks"].append("node")
-                elif file in ["pyproject.toml", "requirements.txt"]:
-                    analysis["frameworks"].append("python")
-                elif file == "docker-compose.yml":
-                    analysis["frameworks"].append("docker")
-                elif "next.config" in file:
-                    analysis["frameworks"].append("nextjs")
-                elif "vite.config" in file:
-                    analysis["frameworks"].append("vite")
-                elif file == "pubspec.yaml":
-                    analysis["frameworks"].append("flutter")
-
-        analysis["frameworks"] = list(set(analysis["frameworks"]))
-        analysis["dna"] = self.determine_project_dna(analysis["frameworks"])
+
+        profile = detect_stack(self.project_path, self.index)
+        analysis["frameworks"] = profile.frameworks
+        analysis["dna"] = profile.dna
+        analysis["run"] = {"command": profile.command, "port": profile.port}
+        return analysis
+
+    def analyze_workspaces(self, analysis: Dict, max_workers: Optional[int] = None) -> Dict:
+        """Add per-workspace stacks, DNA and heroes for monorepos (no-op for single projects)."""
+        workspaces = detect_workspaces(self.index)
+        if not workspaces:
+            return analysis
+        results = analyze_workspaces(self.project_path, workspaces, max_workers, use_cache=self.cache is not None)
+        analysis["workspaces"] = results
+        analysis["frameworks"] = sorted(set(analysis["frameworks"]).union(
+            *(ws["frameworks"] for ws in results)
+        ))
+        analysis["dna"] = project_dna(analysis["frameworks"])
         return analysis
 
     def determine_project_dna(self, frameworks: List[str]) -> str:
         """Classify project type (Mobile, Web, Backend, CLI) based on stack."""
-        fw_set = set(frameworks)
-        
-        if "flutter" in fw_set or "react-native" in fw_set:
-            return "MOBILE"
-        if "vite" in fw_set or "nextjs" in fw_set or "react" in fw_set or "vue" in fw_set:
-            return "WEB"
-        if "django" in fw_set or "flask" in fw_set or "fastapi" in fw_set:
-            return "BACKEND"
-        
-        # Default fallback
-        return "GENERAL_SOFTWARE"
+        return project_dna(frameworks)
 
     def get_project_intent(self) -> str:
         """Try to find what the project actually DOES."""
         # 1. Check package.json
-        pkg_path = self.project_path / "package.json"
-        if pkg_path.exists():
-            try:
-                import json
-                with open(pkg_path, "r") as f:
-                    data = json.load(f)
-                    desc = data.get("description")
-                    if desc: return desc
-            except: pass
+        desc = Manifests(self.project_path, self.index).json("package.json").get("description")
+        if desc and isinstance(desc, str):
+            return desc
 
         # 2. Check README.md
         for readme_name in ["README.md", "readme.md", "Readme.md"]:
-            readme_path = self.project_path / readme_name
-            if readme_path.exists():
-                try:
-                    with open(readme_path, "r", encoding="utf-8") as f:
-                        content = f.read(2000)
-                        # Just return the first few sentences
-                        return content[:1200].strip()
-                except: pass
+            content = self._read_doc(readme_name)
+            if content:
+                # Just return the first few sentences
+                return content[:1200].strip()
         
         return "Unknown Purpose"
 
+    def _inspect_batch(self, pool: ThreadPoolExecutor, batch: List[Tuple[IndexedFile, int]]):
+        """Analyze a batch of candidates, reading only cache misses (in parallel)."""
+        results = []
+        for entry, score in batch:
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.lookup_file(entry.path, entry.size, entry.mtime_ns)
+            if cached is not None and cached.get("score") == score:
+                results.append(cached)
+            else:
+                results.append(pool.submit(analyze_source, self.index.abspath(entry), entry.size, self.signatures))
+
+        for (entry, score), result in zip(batch, results):
+            if isinstance(result, dict):
+                yield entry, result, None
+                continue
+            try:
+                record, lines = result.result()
+            except (OSError, ValueError):
+                continue
+            record["score"] = score
+            if self.cache is not None:
+                self.cache.store_file(entry.path, entry.size, entry.mtime_ns, record)
+            yield entry, record, lines
+
+    def _signatures_for(self, entry: IndexedFile, record: dict) -> list:
+        """Memoized signatures of a summarized file, re-reading it only if the memo lost them."""
+        sigs = self.signatures.lookup(entry.ext, record["hash"])
+        if sigs is None:
+            record, _ = analyze_source(self.index.abspath(entry), entry.size, self.signatures)
+            sigs = self.signatures.lookup(entry.ext, record["hash"]) or []
+        return sigs
+
     def get_hero_code(self) -> Dict[str, str]:
         """Identify and extract the most 'impressive' code snippets, avoiding config."""
         heroes = {}
-        # Priority directories - expanded for complex architectures
-        priority_dirs = ["features", "services", "api", "src", "app", "lib", "components", "pages", "core", "integrations", "models"]
-        
-        found_files = []
-        for root, dirs, files in os.walk(self.project_path):
-            # Strict ignore
-            if any(p in root for p in IGNORES):
-                continue
-            
-            for file in files:
-                # Skip config files
-                if any(c in file.lower() for c in ["config", "setup", "test", "spec", "d.ts", "init"]):
-                    continue
-                
-                if file.endswith((".py", ".js", ".ts", ".go", ".rs", ".tsx", ".dart")):
-                    path = Path(root) / file
-                    # Score based on directory and filename importance
-                    score = 1
-                    rel_path = os.path.relpath(root, self.project_path)
-                    
-                    if any(p in rel_path.lower() for p in priority_dirs):
-                        score += 10 # Massive boost for architectural code
-                    
-                    if "api" in file.lower() or "service" in file.lower():
-                        score += 5
-                        
-                    found_files.append((path, score))
-
-        # Sort by score and take top
-        found_files.sort(key=lambda x: x[1], reverse=True)
-        
-        # Take up to 5 heroes for better context in complex projects
-        for path, score in found_files:
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                    # Filter for substantial code
-                    code_lines = [l for l in lines if l.strip() and not l.strip().startswith(("#", "//", "import", "from"))]
-                    
-                    if len(code_lines) > 15: # Significant implementation
-                        content = "".join(lines)
-                        
-                        # TOKEN HYGIENE: If file is substantial (>100 lines), extract signatures only
-                        if len(lines) > 100:
-                            summary = f"# [SUMMARY] File is large ({len(lines)} lines). Extracting signatures:\n"
-                            import re
-                            # Simple regex for function/class defs in Python/JS/Dart
-                            sigs = re.findall(r'^\s*(?:class|def|function|async|const|let|var|func)\s+\w+', content, re.MULTILINE)
-                            summary += "\n".join(sigs[:50]) # Limit sigs too
-                            if not sigs: summary += "# (No clear signatures found)"
-                            heroes[path.name] = summary
-                        else:
-                            # Full content for smaller files (up to 150 lines or so)
-                             heroes[path.name] = "".join(lines[:150]) 
-                        
-                        if len(heroes) >= 5: break
-            except: continue
+        # Scoring is path-only, so ranking costs no I/O. The heap hands out
+        # candidates best-first (walk order breaks ties) and we stop reading as
+        # soon as enough of them qualify.
+        candidates = []
+        for seq, entry in enumerate(self.index.files(HERO_EXTENSIONS)):
+            score = score_hero_candidate(entry)
+            if score and entry.size:
+                candidates.append((-score, seq, entry))
+        heapq.heapify(candidates)
+
+        with ThreadPoolExecutor(max_workers=HERO_WORKERS) as pool:
+            while candidates and len(heroes) < HERO_COUNT:
+                batch = []
+                while candidates and len(batch) < HERO_WORKERS:
+                    neg_score, _, entry = heapq.heappop(candidates)
+                    batch.append((entry, -neg_score))
+
+                for entry, record, lines in self._inspect_batch(pool, batch):
+                    if record["code_lines"] <= MIN_CODE_LINES:
+                        continue
+
+                    # TOKEN HYGIENE: If file is substantial (>100 lines), extract signatures only
+                    if record.get("summary"):
+                        sigs = self._signatures_for(entry, record)
+                        size_note = f"{record['lines']}+ lines, truncated" if record.get("truncated") else f"{record['lines']} lines"
+                        summary = f"# [SUMMARY] File is large ({size_note}). Extracting signatures:\n"
+                        summary += "\n".join(sig.render() for sig in sigs[:MAX_SIGNATURES]) # Limit sigs too
+                        if not sigs: summary += "# (No clear signatures found)"
+                        heroes[entry.name] = summary
+                    else:
+                        if lines is None:
+                            try:
+                                with open(self.index.abspath(entry), "r", encoding="utf-8") as f:
+                                    lines = f.readlines()
+                            except (OSError, UnicodeDecodeError):
+                                continue
+                        # Full content for smaller files (up to 150 lines or so)
+                        heroes[entry.name] = "".join(lines[:150])
+                        self._full_heroes[entry.name] = entry
+
+                    if len(heroes) >= HERO_COUNT: break
             
         return heroes
 
-    def get_summary_context(self, analysis: Dict, heroes: Dict = None) -> str:
-        """Format analysis into a context string with deep documentation insights."""
+    def _read_doc(self, name: str) -> Optional[str]:
+        """Read a top-level doc once per run (README is used by both intent and gist)."""
+        if name not in self._docs:
+            text = None
+            if self.index.has(name):
+                try:
+                    with open(self.project_path / name, "r", encoding="utf-8", errors="ignore") as f:
+                        text = f.read(DOC_READ_CHARS)
+                except OSError:
+                    pass
+            self._docs[name] = text
+        return self._docs[name]
+
+    def get_directory_tree(self, max_depth: int = 3) -> str:
+        """Aggregated directory tree with recursive file counts."""
+        counts = self.index.tree_counts()
+        lines = [f"./ ({counts.get('', 0)} files)"]
+        for rel in self.index.dirs:
+            depth = rel.count("/") + 1 if rel else 0
+            if 0 < depth <= max_depth and counts.get(rel):
+                lines.append(f"{'  ' * depth}{rel.rpartition('/')[2]}/ ({counts[rel]} files)")
+        return "\n".join(lines) + "\n"
+
+    def _signature_block(self, heroes: Dict[str, str], max_depth: Optional[int] = None) -> str:
+        """Signatures of every hero file, reusing the memoized extractor results."""
+        blocks = []
+        for name, code in heroes.items():
+            if code.startswith("# [SUMMARY]"):
+                lines = code.splitlines()[1:]  # Already rendered as "L{n}: {indent}{kind} {name}"
+                if max_depth is not None:
+                    lines = [l for l in lines if _render_depth(l) <= max_depth]
+            else:
+                sigs = self._hero_signatures(name, code)
+                lines = [sig.render() for sig in sigs if max_depth is None or sig.depth <= max_depth]
+            if lines:
+                blocks.append(f"# {name}\n" + "\n".join(lines) + "\n")
+        return "".join(blocks)
+
+    def _hero_signatures(self, name: str, code: str) -> List[Signature]:
+        """Signatures of a hero shown in full, kept in the scan cache next to its file entry."""
+        entry = self._full_heroes.get(name)
+        if self.cache is not None and entry is not None:
+            stored = self.cache.lookup_file_signatures(entry.path, entry.size, entry.mtime_ns)
+            if stored is not None:
+                return [Signature(*s) for s in stored]
+        content_hash = hashlib.sha1(code.encode("utf-8")).hexdigest()
+        sigs = self.signatures.extract(code, Path(name).suffix, content_hash)
+        if self.cache is not None and entry is not None:
+            self.cache.store_file_signatures(entry.path, entry.size, entry.mtime_ns, [list(s) for s in sigs])
+        return sigs
+
+    def get_summary_context(self, analysis: Dict, heroes: Dict = None, budget_tokens: Optional[int] = None,
+                            counter: TokenCounter = heuristic_token_count) -> str:
+        """Format analysis into a context string with deep documentation insights.
+
+        Sections are funded by value (signatures, directory tree, doc gist) within
+        ``budget_tokens``; per-section usage is kept in ``self.context_report``.
+        """
+        builder = ContextBuilder(budget_tokens or DEFAULT_CONTEXT_BUDGET, counter)
         frameworks_str = ", ".join(analysis["frameworks"])
         
         # 1. Base Context
-        context = f"PROJECT NAME: {analysis['name']}\n"
-        context += f"TECH STACK: {frameworks_str}\n"
-        
+        header = f"PROJECT NAME: {analysis['name']}\n"
+        header += f"TECH STACK: {frameworks_str}\n"
+        header += f"PROJECT INTENT/PURPOSE (Deducted): {analysis['description']}\n"
+        builder.add("header", header, priority=0, required=True)
+
+        # Monorepo packages
+        if analysis.get("workspaces"):
+            packages = [f"{ws['name']} ({ws['path']}, {ws['dna']}: {', '.join(ws['frameworks']) or 'n/a'})"
+                        for ws in analysis["workspaces"]]
+            builder.add("workspaces", f"WORKSPACES: {'; '.join(packages)}\n", priority=4)
+
         # 2. Extract Intent from Docs (Prioritizing Design.md)
-        doc_gist = ""
-        unique_concepts = set()
+        docs = []
+        intent = analysis["description"][:200].strip()
         for doc_name in ["Design.md", "DESIGN.md", "README.md", "readme.md"]:
-            doc_path = self.project_path / doc_name
-            if doc_path.exists():
-                content = doc_path.read_text(errors="ignore")
-                doc_gist += f"\n--- {doc_name} ---\n{content[:500]}...\n"
+            content = self._read_doc(doc_name)
+            # Skip a README already used verbatim as the intent above (every doc "starts with" an empty one)
+            if content and not (intent and content.strip().startswith(intent)):
+                docs.append((doc_name, content))
+        if docs:
+            def gist(chars: int) -> str:
+                return "DOCUMENTATION GIST:\n" + "".join(
+                    f"--- {name} ---\n{content[:chars].strip()}...\n" for name, content in docs
+                )
+            builder.add("doc_gist", gist(2000), priority=3, fallbacks=[gist(1000), gist(500)])
 
-        context += f"PROJECT INTENT/PURPOSE (Deducted): {analysis['description']}\n"
-        context += f"DOCUMENTATION GIST: {doc_gist}\n"
-
-        # 3. Code Samples
+        # 3. Code Samples: signatures of the hero files
         if heroes:
-            context += f"ARCHITECTURAL COMPONENTS FOUND: {list(heroes.keys())}"
-        
-        # 4. Deep Structure
-        context += f"\nPROJECT STRUCTURE SAMPLE:\n{self.get_deep_structure()}"
+            builder.add(
+                "signatures",
+                f"ARCHITECTURAL COMPONENTS FOUND:\n{self._signature_block(heroes)}",
+                priority=1,
+                fallbacks=[f"ARCHITECTURAL COMPONENTS FOUND:\n{self._signature_block(heroes, d)}" for d in (1, 0)],
+            )
+
+        # 4. Structure as an aggregated tree
+        builder.add(
+            "directory_tree",
+            f"PROJECT STRUCTURE (files per directory):\n{self.get_directory_tree(4)}",
+            priority=2,
+            fallbacks=[f"PROJECT STRUCTURE (files per directory):\n{self.get_directory_tree(d)}" for d in (3, 2, 1)],
+        )
+
+        context = builder.build()
+        self.context_report = builder.report()
         return context
 
     def get_deep_structure(self, max_files: int = 50) -> str:
         """Recursively list representative files to give LLM a sense of the architecture."""
         structure = []
         count = 0
-        for root, dirs, files in os.walk(self.project_path):
-            if any(p in root for p in IGNORES):
-                continue
-            
-            rel_path = os.path.relpath(root, self.project_path)
-            if rel_path == ".": rel_path = ""
-            
+        for rel_path, files in self.index.walk():
             # Show directories to give a sense of hierarchy
             if rel_path:
                 structure.append(f"DIR: {rel_path}")
-            
-            for file in files:
+
+            for entry in files:
                 if count >= max_files: break
-                if file.endswith((".py", ".ts", ".tsx", ".js", ".go", ".rs", ".java", ".cpp", ".yml", ".json", ".dart")):
+                if entry.ext in (".py", ".ts", ".tsx", ".js", ".go", ".rs", ".java", ".cpp", ".yml", ".json", ".dart"):
                     # Filter out common junk
-                    if any(j in file.lower() for j in ["lock", "min.js", "map", "license"]):
+                    if any(j in entry.name.lower() for j in ["lock", "min.js", "map", "license"]):
                         continue
-                    structure.append(os.path.join(rel_path, file))
+                    structure.append(entry.path)
                     count += 1
             if count >= max_files: break
-            
+
         return "\n".join(structure)
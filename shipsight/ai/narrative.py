@@ -1,43 +1,120 @@
+import asyncio
+import datetime
+import time
 import httpx
-from typing import Optional
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 from rich.console import Console
 
 from shipsight.config import AIConfig
+from shipsight.ai.context import heuristic_token_count
+from shipsight.ai.hedging import LatencyStore, hedged_race
+from shipsight.ai.ratelimit import RETRY_STATUSES, LLMError, RateLimitScheduler, parse_duration
+from shipsight.ai.response_cache import ResponseCache, response_key
+from shipsight.ai.sections import SectionSplitter, marker, split_sections
+from shipsight.ai.streaming import (StreamDecoder, StreamStats, StreamTimeout, TokenSink, idle_timeout, normalize_usage,
+                                    ollama_load_seconds)
+from shipsight.ai.transport import LLMTransport
+from shipsight.ai.usage import UsageLog
 
 console = Console()
 
+# Completion size assumed when reserving tokens/min budget for providers without max_tokens
+EXPECTED_COMPLETION_TOKENS = 1024
+# Models used for fallback providers listed without one in `ai.models`
+DEFAULT_MODELS = {
+    "openai": "gpt-4o-mini",
+    "anthropic": "claude-3-5-sonnet-20240620",
+    "groq": "llama-3.1-8b-instant",
+    "ollama": "llama3.1",
+}
+
+
+class LLMTarget(NamedTuple):
+    provider: str
+    model: str
+
+
+class Prompt(NamedTuple):
+    """A stable prefix (instructions shared by every artifact plus the project
+    context) followed by the short task for one artifact. Keeping the prefix
+    byte-identical across calls lets providers reuse its cached prefill."""
+    prefix: str
+    task: str
+
+    @property
+    def text(self) -> str:
+        return f"{self.prefix}\n\n{self.task}"
+
+
+SYSTEM_PREFIX = """You write launch material for software projects: READMEs and developer posts.
+Everything you write must be grounded in the PROJECT CONTEXT below. Never invent features.
+The task that follows the context says which document to write and how."""
+
+
 class NarrativeGenerator:
-    def __init__(self, config: AIConfig, project_name: str = "Unknown"):
+    def __init__(self, config: AIConfig, project_name: str = "Unknown", transport: Optional[LLMTransport] = None,
+                 cache_mode: str = "use", scheduler: Optional[RateLimitScheduler] = None):
         self.config = config
         self.project_name = project_name
+        # Response cache: "use" reads and writes, "refresh" only writes, "off" bypasses it
+        self.cache_mode = cache_mode if config.cache else "off"
+        self.cache = None
+        if self.cache_mode != "off":
+            self.cache = ResponseCache(max_bytes=config.cache_max_mb * 1024 * 1024,
+                                       max_age_days=config.cache_max_age_days)
+        # Rate limits for this run's calls (shared with other generators only if passed in)
+        self.scheduler = scheduler or RateLimitScheduler()
+        self.targets = self._targets()
+        for target in self.targets:
+            self.scheduler.configure(target.provider, config.requests_per_minute, config.tokens_per_minute)
+        # Time-to-first-token history per provider; sets how long to wait before hedging
+        self.latency = LatencyStore() if len(self.targets) > 1 else None
+        self.usage_log = UsageLog()
+        self.combined_report = None
+        # One pooled client per provider for the whole run (shared if passed in)
+        self._owns_transport = transport is None
+        self.transport = transport or LLMTransport.from_config(config)
+
+    async def aclose(self):
+        """Release pooled connections if this generator created the transport."""
+        if self._owns_transport:
+            await self.transport.aclose()
+        if self.cache is not None:
+            self.cache.close()
+        if self.latency is not None:
+            self.latency.save()
+        try:
+            await self.usage_log.aflush()
+        except OSError as e:
+            console.print(f"[dim yellow]Warning: Failed to log token usage: {e}[/dim yellow]")
+
+    def _targets(self) -> List[LLMTarget]:
+        """The configured provider followed by its fallbacks, in order."""
+        targets = [LLMTarget(self.config.provider, self.config.model)]
+        for provider in self.config.providers:
+            model = self.config.models.get(provider) or DEFAULT_MODELS.get(provider, self.config.model)
+            target = LLMTarget(provider, model)
+            if target not in targets:
+                targets.append(target)
+        return targets
 
-    def _log_usage(self, provider: str, model: str, usage: dict):
-        """Log token usage to ~/.shipsight/token_usage.jsonl"""
+    def _log_usage(self, provider: str, model: str, usage: dict, **extra):
+        """Queue a usage record for ~/.shipsight/token_usage.jsonl (written in batches)."""
         try:
-            import json
-            import datetime
-            from pathlib import Path
-            
-            log_dir = Path.home() / ".shipsight"
-            log_dir.mkdir(exist_ok=True)
-            log_file = log_dir / "token_usage.jsonl"
-            
-            record = {
+            self.usage_log.record({
                 "timestamp": datetime.datetime.now().isoformat(),
                 "project": self.project_name,
                 "provider": provider,
                 "model": model,
-                "usage": usage
-            }
-            
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(record) + "\n")
+                "usage": usage,
+                **extra
+            })
         except Exception as e:
             # logging shouldn't crash the app
             console.print(f"[dim yellow]Warning: Failed to log token usage: {e}[/dim yellow]")
 
-    async def generate_readme(self, context: str, dna: str = "GENERAL_SOFTWARE", heroes: dict = None) -> str:
-        
+    def _readme_prompt(self, dna: str) -> Tuple[str, str]:
+        """README instructions as (lead-in, rules) around the project context."""
         # DNA-based Persona Selection
         persona = "Product Manager / Lead Engineer"
         focus = "FEATURES and USER VALUE"
@@ -47,45 +124,29 @@ class NarrativeGenerator:
         elif dna == "CLI":
             persona = "Open Source Maintainer / DevTool Expert"
             focus = "DEVELOPER PRODUCTIVITY, AUTOMATION, and EASE OF USE"
-        
-        prompt = f"""
-        Act as a {persona}. Generate a professional README.md focused on {focus}.
-        
-        {context}
-        
+
+        lead = f"Act as a {persona}. Generate a professional README.md focused on {focus}."
+        rules = f"""
         ### STRICT CONTEXT PURITY RULES:
-        - ONLY use information provided in the CONTEXT above.
+        - ONLY use information provided in the PROJECT CONTEXT above.
         - DO NOT HALLUCINATE features like "Website Roasting" or "SEO Analysis" unless explicitly in context.
         - If project is {dna} (e.g. Flutter/Mobile), use appropriate terminology (Screen vs Page, Tap vs Click).
         - Focus on "What the project does", "Key Features", and "How to use it".
         - DO NOT use emojis anywhere in the README.
         """
-        return await self._call_llm(prompt)
+        return lead, rules
 
-    async def generate_linkedin_post(self, context: str, dna: str = "GENERAL_SOFTWARE") -> str:
-        
+    def _linkedin_prompt(self, dna: str) -> Tuple[str, str]:
+        """LinkedIn instructions as (lead-in, rules) around the project context."""
         # DNA-based Guidelines
         guidelines = "- Hook: A clear, problem-solving opening."
         if dna == "MOBILE":
             guidelines = "- Hook: Focus on the 'App Utility' or 'User Experience'.\n- Use mobile terms: 'Tap', 'Native feel', 'On the go'."
         elif dna == "CLI":
             guidelines = "- Hook: Focus on 'Efficiency' and 'Developer Experience'.\n- Use dev terms: 'Script', 'Workflow', 'Automation'."
-            
-        prompt = f"""
-        Generate an "Authentic Developer LinkedIn Post" as the CREATOR of this project.
-        
-        CONTEXT:
-        {context}
-        
-        TASK:
-        1. Start with the PROBLEM: "I needed a way to..." or "I wanted to build..."
-        2. Explain the SOLUTION: "So I built {self.project_name}, a [What it is]..."
-        3. List 3 Technical Features: "It features X, Y, and Z..."
-        
-        GUIDELINES:
-        {guidelines}
-        - Voice: First-person ("I built", "I used").
-        
+
+        lead = 'Generate an "Authentic Developer LinkedIn Post" as the CREATOR of this project.'
+        rules = f"""
         TASK:
         1. Start with the PROBLEM: "I needed a way to..." or "I wanted to build..."
         2. Explain the SOLUTION: "So I built {self.project_name}, a [What it is]..."
@@ -106,136 +167,325 @@ class NarrativeGenerator:
         - DO NOT use: "Revolutionary", "Groundbreaking", "Game-changer", "Cosmic".
         - Simple tone: "Here is what I made. Here is how it works."
         """
-        return await self._call_llm(prompt)
+        return lead, rules
 
-    async def _call_llm(self, prompt: str) -> str:
-        if self.config.provider == "ollama":
-            # Call Ollama local API
+    @staticmethod
+    def _prefix(context: str) -> str:
+        """Shared by every prompt for a project; no per-artifact or DNA text goes here."""
+        return f"{SYSTEM_PREFIX}\n\nPROJECT CONTEXT:\n{context}"
+
+    def _format_prompt(self, fmt: str, context: str, dna: str) -> Prompt:
+        lead, rules = self.FORMATS[fmt](self, dna)
+        return Prompt(self._prefix(context), f"{lead}\n{rules}")
+
+    async def generate_readme(self, context: str, dna: str = "GENERAL_SOFTWARE", heroes: dict = None,
+                              sink: Optional[TokenSink] = None) -> str:
+        return await self._call_llm(self._format_prompt("readme", context, dna), sink)
+
+    async def generate_linkedin_post(self, context: str, dna: str = "GENERAL_SOFTWARE",
+                                     sink: Optional[TokenSink] = None) -> str:
+        return await self._call_llm(self._format_prompt("linkedin", context, dna), sink)
+
+    FORMATS = {"readme": _readme_prompt, "linkedin": _linkedin_prompt}
+
+    async def generate_all(self, context: str, formats: List[str], dna: str = "GENERAL_SOFTWARE",
+                           sinks: Optional[Dict[str, TokenSink]] = None) -> Dict[str, str]:
+        """Generate every format in one call that shares the context, split into sections.
+
+        Sections missing from the response (or every format, when only one is
+        requested) fall back to a dedicated call. ``self.combined_report``
+        records the estimated prompt tokens saved.
+        """
+        formats = [f for f in formats if f in self.FORMATS]
+        sinks = sinks or {}
+        results: Dict[str, str] = {}
+        if len(formats) > 1:
+            prompt = self._combined_prompt(context, formats, dna)
+            separate = sum(heuristic_token_count(self._format_prompt(f, context, dna).text) for f in formats)
+            saved = max(0, separate - heuristic_token_count(prompt.text))
+            splitter = SectionSplitter({f: sinks.get(f) for f in formats})
+            text = await self._call_llm(prompt, splitter,
+                                        validate=lambda t: len(split_sections(t, formats)) == len(formats),
+                                        combined=formats, saved_prompt_tokens=saved)
+            splitter.close()
+            results = split_sections(text, formats)
+            fallback = [f for f in formats if f not in results]
+            self.combined_report = {"formats": formats, "estimated_prompt_tokens_saved": saved,
+                                    "fallback": fallback}
+            if fallback:
+                console.print(f"[yellow]Combined response was missing {', '.join(fallback)}; "
+                              f"generating separately.[/yellow]")
+        for fmt in formats:
+            if fmt not in results:
+                results[fmt] = await self._call_llm(self._format_prompt(fmt, context, dna), sinks.get(fmt))
+        return results
+
+    def _combined_prompt(self, context: str, formats: List[str], dna: str) -> Prompt:
+        tasks = []
+        for fmt in formats:
+            lead, rules = self.FORMATS[fmt](self, dna)
+            tasks.append(f"""
+        ## OUTPUT {marker(fmt)}
+        {lead}
+        {rules}""")
+        markers = ", ".join(f'"{marker(f)}"' for f in formats)
+        return Prompt(self._prefix(context), f"""
+        Write {len(formats)} separate documents about the project above, one per OUTPUT section.
+        {"".join(tasks)}
+        ### RESPONSE FORMAT:
+        - Start each document with its marker line, exactly: {markers}.
+        - Put nothing before the first marker and nothing between documents except the next marker.
+        """)
+
+    def _params(self, target: LLMTarget) -> dict:
+        """Generation parameters that change the output, part of the cache key."""
+        params = {}
+        if target.provider == "anthropic":
+            params["max_tokens"] = 4096
+        return params
+
+    async def _call_llm(self, prompt: Prompt, sink: Optional[TokenSink] = None,
+                        validate: Optional[Callable[[str], bool]] = None, **extra) -> str:
+        """Generate text for ``prompt``; ``sink`` receives it incrementally when streaming.
+
+        With fallback providers configured, a provider that fails moves on to
+        the next one, and one that is slower than usual to produce its first
+        token is hedged: the next provider starts alongside it and whichever
+        streams first wins. Raises ``LLMError`` when every provider fails, so
+        error text is never saved as an artifact or cached. Responses that
+        fail ``validate`` are returned but not cached.
+        """
+        keys = {t: response_key(t.provider, t.model, prompt.text, self._params(t)) for t in self.targets}
+        if self.cache is not None and self.cache_mode == "use":
+            for target in self.targets:
+                cached = self.cache.get(keys[target])
+                if cached is not None:
+                    text, usage = cached
+                    self._log_usage(target.provider, target.model,
+                                    {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                                    cache="hit", saved=usage, **extra)
+                    if sink is not None:
+                        sink(text)
+                    return text
+
+        started = []
+        async def attempt(target: LLMTarget, claim) -> Tuple[str, dict]:
+            started.append(target)
+            began, streamed = time.monotonic(), []
+            def claiming_sink(text: str):
+                streamed.append(True)
+                # The first provider to stream claims the artifact; the others are cancelled
+                if claim() and sink is not None:
+                    sink(text)
+            # Queue behind the provider's request/token budget; retries 429/5xx with backoff
+            budget = heuristic_token_count(prompt.text) + self._params(target).get("max_tokens", EXPECTED_COMPLETION_TOKENS)
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "http://localhost:11434/api/generate",
-                        json={"model": self.config.model, "prompt": prompt, "stream": False},
-                        timeout=30.0
-                    )
-                    result_json = response.json()
-                    
-                    # Log Usage (Ollama)
-                    # Ollama returns 'prompt_eval_count' and 'eval_count'
-                    if "prompt_eval_count" in result_json:
-                         self._log_usage("ollama", self.config.model, {
-                             "prompt_tokens": result_json.get("prompt_eval_count", 0),
-                             "completion_tokens": result_json.get("eval_count", 0),
-                             "total_tokens": result_json.get("prompt_eval_count", 0) + result_json.get("eval_count", 0)
-                         })
-
-                    return result_json.get("response", "Error: LLM failed to respond.")
-            except Exception as e:
-                return f"Error connecting to local LLM: {e}. Ensure Ollama is running or configure OpenAI/Anthropic."
-        elif self.config.provider == "openai":
-            api_key = self.config.openai_api_key
+                return await self.scheduler.run(target.provider, budget,
+                                                lambda: self._request_llm(prompt, target, claiming_sink),
+                                                max_retries=self.config.max_retries)
+            except asyncio.CancelledError:
+                # Lost the race without a first token after outlasting its hedge delay: its
+                # latency is at least this long. Keeping only winners' samples would drag the
+                # delay down run after run and hedge ever more often.
+                waited = time.monotonic() - began
+                if self.latency is not None and not streamed and waited >= hedge_after(target):
+                    self.latency.record(target.provider, target.model, waited)
+                raise
+
+        def hedge_after(target: LLMTarget) -> float:
+            return self.latency.hedge_delay(target.provider, target.model, self.config.hedge_percentile,
+                                            self.config.hedge_after_s)
+
+        target, (text, usage) = await hedged_race(self.targets, attempt, hedge_after)
+        latency = {k: usage.pop(k) for k in ("duration_s", "ttft_s", "tokens_per_s", "load_s", "generation_s")
+                   if k in usage}
+        if self.latency is not None and "duration_s" in latency:
+            self.latency.record(target.provider, target.model, latency.get("ttft_s", latency["duration_s"]))
+        if self.cache is not None and (validate is None or validate(text)):
+            self.cache.put(keys[target], target.provider, target.model, text, usage)
+        if len(self.targets) > 1:
+            extra.update(attempts=len(started), fallback=target != self.targets[0])
+        self._log_usage(target.provider, target.model, usage,
+                        cache="miss" if self.cache is not None else "off", **latency, **extra)
+        return text
+
+    def _keep_alive(self) -> dict:
+        """How long Ollama keeps the model loaded after each request (its default is 5m)."""
+        return {"keep_alive": self.config.keep_alive} if self.config.keep_alive is not None else {}
+
+    async def preload(self) -> Optional[dict]:
+        """Load the Ollama model now (an empty prompt loads it without generating),
+        so it is ready by the time the narratives are written. Never raises."""
+        target = next((t for t in self.targets if t.provider == "ollama"), None)
+        if target is None or not self.config.preload:
+            return None
+        http = self.config.http
+        stats = StreamStats()
+        try:
+            response = await self.transport.client("ollama").post(
+                "/api/generate", json={"model": target.model, **self._keep_alive()},
+                timeout=httpx.Timeout(http.first_token_timeout, connect=http.connect_timeout))
+            stats.finish()
+            if response.status_code != 200:
+                return {"model": target.model, "error": f"HTTP {response.status_code}"}
+            load_s = ollama_load_seconds(response.json())
+        except httpx.HTTPError as e:
+            return {"model": target.model, "error": str(e) or type(e).__name__}
+        except ValueError:
+            load_s = None
+        # Ollama's own load time; the request's wall time (connect, queueing) only when it is missing
+        timings = stats.as_dict(load_s=load_s)
+        return {"model": target.model, "load_s": timings.get("load_s", timings["duration_s"]),
+                "keep_alive": self.config.keep_alive}
+
+    def _request_spec(self, prompt: Prompt, target: LLMTarget) -> dict:
+        """Path, headers and body for one provider.
+
+        The shared prefix always comes first and unchanged: as the system
+        message for OpenAI/Groq (automatic prefix caching), as a
+        ``cache_control`` system block for Anthropic, and at the start of the
+        prompt for Ollama, whose runner reuses the KV cache of the longest
+        prefix shared with its previous request.
+        """
+        provider, model = target
+        if provider == "ollama":
+            # Call Ollama local API
+            return {"path": "/api/generate", "headers": {},
+                    "json": {"model": model, "prompt": prompt.text, **self._keep_alive()}}
+        if provider in ("openai", "groq"):
+            api_key = getattr(self.config, f"{provider}_api_key")
             if not api_key:
-                return "Error: OpenAI provider selected but no API key provided (set OPENAI_API_KEY)."
-            
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "https://api.openai.com/v1/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {api_key}",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": self.config.model,
-                            "messages": [{"role": "user", "content": prompt}]
-                        },
-                        timeout=60.0
-                    )
-                    result = response.json()
-                    
-                    if response.status_code != 200:
-                        error_msg = result.get("error", {}).get("message", "Unknown error")
-                        return f"Error from OpenAI API ({response.status_code}): {error_msg}"
-                    
-                    # Log Usage (OpenAI)
-                    if "usage" in result:
-                        self._log_usage("openai", self.config.model, result["usage"])
-                        
-                    return result["choices"][0]["message"]["content"]
-            except Exception as e:
-                return f"Error calling OpenAI: {e}"
-        elif self.config.provider == "anthropic":
+                name = "OpenAI" if provider == "openai" else "Groq"
+                raise LLMError(f"{name} provider selected but no API key provided (set {provider.upper()}_API_KEY).", provider)
+            return {"path": "/chat/completions",
+                    "headers": {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                    "json": {"model": model, "messages": [{"role": "system", "content": prompt.prefix},
+                                                          {"role": "user", "content": prompt.task}]}}
+        if provider == "anthropic":
             api_key = self.config.anthropic_api_key
             if not api_key:
-                return "Error: Anthropic provider selected but no API key provided (set ANTHROPIC_API_KEY)."
-            
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "https://api.anthropic.com/v1/messages",
-                        headers={
-                            "x-api-key": api_key,
-                            "anthropic-version": "2023-06-01",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": self.config.model,
-                            "max_tokens": 4096,
-                            "messages": [{"role": "user", "content": prompt}]
-                        },
-                        timeout=60.0
-                    )
-                    result = response.json()
-                    
-                    if response.status_code != 200:
-                        error_type = result.get("error", {}).get("type", "Unknown type")
-                        error_msg = result.get("error", {}).get("message", "Unknown error")
-                        return f"Error from Anthropic API ({response.status_code}): {error_type} - {error_msg}"
-                    
-                    # Log Usage (Anthropic)
-                    if "usage" in result:
-                        usage = result["usage"]
-                        # standardize fields
-                        std_usage = {
-                            "prompt_tokens": usage.get("input_tokens", 0),
-                            "completion_tokens": usage.get("output_tokens", 0),
-                            "total_tokens": usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
-                        }
-                        self._log_usage("anthropic", self.config.model, std_usage)
-                        
-                    return result["content"][0]["text"]
-            except Exception as e:
-                return f"Error calling Anthropic: {e}"
-        elif self.config.provider == "groq":
-            api_key = self.config.groq_api_key
-            if not api_key:
-                return "Error: Groq provider selected but no API key provided (set GROQ_API_KEY)."
-            
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "https://api.groq.com/openai/v1/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {api_key}",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": self.config.model,
-                            "messages": [{"role": "user", "content": prompt}]
-                        },
-                        timeout=60.0
-                    )
-                    result = response.json()
-                    if response.status_code != 200:
-                        error_msg = result.get("error", {}).get("message", "Unknown error")
-                        return f"Error from Groq API ({response.status_code}): {error_msg}"
-                    
-                    # Log Usage (Groq - same structure as OpenAI)
-                    if "usage" in result:
-                        self._log_usage("groq", self.config.model, result["usage"])
-                        
-                    return result["choices"][0]["message"]["content"]
-            except Exception as e:
-                return f"Error calling Groq: {e}"
+                raise LLMError("Anthropic provider selected but no API key provided (set ANTHROPIC_API_KEY).", provider)
+            return {"path": "/messages",
+                    "headers": {"x-api-key": api_key, "anthropic-version": "2023-06-01",
+                                "Content-Type": "application/json"},
+                    "json": {"model": model, "max_tokens": 4096,
+                             "system": [{"type": "text", "text": prompt.prefix,
+                                         "cache_control": {"type": "ephemeral"}}],
+                             "messages": [{"role": "user", "content": prompt.task}]}}
+        raise LLMError(f"Unknown LLM provider '{provider}'.", provider)
+
+    def _api_error(self, target: LLMTarget, response, result: dict) -> LLMError:
+        provider, status = target.provider, response.status_code
+        if provider == "ollama":
+            message = f"Error from local LLM ({status}): {result.get('error', 'Unknown error')}"
+        else:
+            error = result.get("error") or {}
+            error_msg = error.get("message", "Unknown error") if isinstance(error, dict) else str(error)
+            if provider == "anthropic":
+                error_type = error.get("type", "Unknown type") if isinstance(error, dict) else "Unknown type"
+                message = f"Error from Anthropic API ({status}): {error_type} - {error_msg}"
+            else:
+                name = "OpenAI" if provider == "openai" else "Groq"
+                message = f"Error from {name} API ({status}): {error_msg}"
+        return LLMError(message, provider, status, retryable=status in RETRY_STATUSES,
+                        retry_after=parse_duration(response.headers.get("retry-after", "")))
+
+    def _connection_error(self, target: LLMTarget, e: Exception, retryable: bool) -> LLMError:
+        if target.provider == "ollama":
+            message = f"Error connecting to local LLM: {e}. Ensure Ollama is running or configure OpenAI/Anthropic."
         else:
-            return f"Error: Unknown LLM provider '{self.config.provider}'."
+            name = {"openai": "OpenAI", "anthropic": "Anthropic", "groq": "Groq"}.get(target.provider, target.provider)
+            message = f"Error calling {name}: {e}"
+        return LLMError(message, target.provider, retryable=retryable)
+
+    async def _request_llm(self, prompt: Prompt, target: LLMTarget, sink: Optional[TokenSink] = None) -> Tuple[str, dict]:
+        """Call one provider once.
+
+        Returns the text and its standardized token usage (plus latency
+        stats). Raises ``LLMError``; failures before any text was streamed
+        are marked retryable when the provider may succeed on a later try.
+        """
+        spec = self._request_spec(prompt, target)
+        emitted = []
+        def tracked_sink(text: str):
+            emitted.append(text)
+            if sink is not None:
+                sink(text)
+        try:
+            if self.config.stream:
+                return await self._stream(target, spec, tracked_sink)
+            return await self._complete(target, spec)
+        except LLMError:
+            raise
+        except (httpx.TransportError, StreamTimeout) as e:
+            # Retrying after partial output would duplicate text in the artifact
+            raise self._connection_error(target, e, retryable=not emitted) from e
+        except Exception as e:
+            raise self._connection_error(target, e, retryable=False) from e
+
+    async def _complete(self, target: LLMTarget, spec: dict) -> Tuple[str, dict]:
+        """Blocking (non-streamed) completion."""
+        provider = target.provider
+        client = self.transport.client(provider)
+        body = {**spec["json"], "stream": False} if provider == "ollama" else spec["json"]
+        stats = StreamStats()
+        response = await client.post(spec["path"], headers=spec["headers"], json=body)
+        stats.finish()
+        self.scheduler.observe(provider, response.headers)
+        try:
+            result = response.json()
+        except ValueError:
+            result = {"error": response.text}
+        if response.status_code != 200:
+            raise self._api_error(target, response, result)
+
+        if provider == "ollama":
+            # Ollama returns 'prompt_eval_count' and 'eval_count'
+            if "response" not in result:
+                raise LLMError("Error: LLM failed to respond.", provider)
+            text, usage = result["response"], normalize_usage(provider, result)
+        elif provider == "anthropic":
+            text, usage = result["content"][0]["text"], normalize_usage(provider, result.get("usage") or {})
+        else:
+            # OpenAI and Groq share the chat completions format
+            text, usage = result["choices"][0]["message"]["content"], normalize_usage(provider, result.get("usage") or {})
+        load_s = ollama_load_seconds(result) if provider == "ollama" else None
+        return text, {**usage, **stats.as_dict(load_s=load_s)}
+
+    async def _stream(self, target: LLMTarget, spec: dict, sink: Optional[TokenSink]) -> Tuple[str, dict]:
+        """Streamed completion: text is passed to ``sink`` as it arrives.
+
+        Timeouts are idle-based: a slow model is fine as long as it keeps
+        producing output.
+        """
+        provider = target.provider
+        body = {**spec["json"], "stream": True}
+        if provider == "openai":
+            body["stream_options"] = {"include_usage": True}
+        http = self.config.http
+        client = self.transport.client(provider)
+        decoder = StreamDecoder(provider)
+        stats = StreamStats()
+        parts = []
+        # httpx's read timeout would also cap the wait for the first token; the idle watchdog replaces it
+        timeout = httpx.Timeout(None, connect=http.connect_timeout)
+        async with client.stream("POST", spec["path"], headers=spec["headers"], json=body, timeout=timeout) as response:
+            self.scheduler.observe(provider, response.headers)
+            if response.status_code != 200:
+                await response.aread()
+                try:
+                    result = response.json()
+                except ValueError:
+                    result = {"error": response.text}
+                raise self._api_error(target, response, result)
+            async for line in idle_timeout(response.aiter_lines(), http.first_token_timeout, http.read_timeout):
+                text = decoder.feed(line)
+                if text:
+                    stats.token()
+                    parts.append(text)
+                    if sink is not None:
+                        sink(text)
+        stats.finish()
+        if not parts and not decoder.done:
+            raise LLMError("Error: LLM failed to respond.", provider, retryable=True)
+        return "".join(parts), {**decoder.usage, **stats.as_dict(decoder.usage.get("completion_tokens"), decoder.load_s)}
@@ -0,0 +1,216 @@
+import asyncio
+import datetime
+import random
+import re
+import time
+from typing import Awaitable, Callable, Dict, Mapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Conservative defaults (requests/min, tokens/min) matching entry-level tiers.
+# Override with `ai.requests_per_minute` / `ai.tokens_per_minute`.
+DEFAULT_LIMITS = {
+    "groq": (30, 6_000),
+    "openai": (500, 200_000),
+    "anthropic": (50, 40_000),
+    "ollama": (None, None),  # Local: no limits
+}
+RETRY_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+class LLMError(Exception):
+    """A provider call failed. ``retryable`` errors (429, 5xx, dropped
+    connections) are retried by the scheduler before surfacing."""
+
+    def __init__(self, message: str, provider: str = "", status: Optional[int] = None,
+                 retryable: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds in a rate-limit reset value: ``"20"``, ``"1.5s"``, ``"6m0s"``, ``"120ms"``
+    or an RFC 3339 timestamp (Anthropic)."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        scale = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+        return sum(float(n) * scale[u] for n, u in parts)
+    try:
+        when = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None,
+                  base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Exponential backoff with full jitter, never shorter than the server's ``retry-after``."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class TokenBucket:
+    """Refills ``rate_per_min`` units per minute up to one minute's worth.
+
+    Waiters are served in arrival order, so concurrent callers form a queue
+    and throughput settles just under the limit instead of bursting past it.
+    """
+
+    def __init__(self, rate_per_min: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_min / 60.0
+        self.capacity = float(rate_per_min)
+        self.level = self.capacity
+        self.clock = clock
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _queue(self) -> asyncio.Lock:
+        """The waiter queue for the running event loop (locks cannot cross loops)."""
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        pause = max(0.0, self._paused_until - self.clock())
+        return max(pause, (amount - self.level) / self.rate if self.level < amount else 0.0)
+
+    async def acquire(self, amount: float = 1.0):
+        async with self._queue():
+            while True:
+                wait = self.wait_time(amount)
+                if wait <= 0:
+                    self.level -= min(amount, self.capacity)
+                    return
+                await asyncio.sleep(wait)
+
+    def sync(self, remaining: Optional[float] = None, reset_in: Optional[float] = None):
+        """Align with the provider's view (from rate-limit response headers)."""
+        self._refill()
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+        if reset_in is not None and remaining is not None and remaining <= 0:
+            self.pause(reset_in)
+
+    def pause(self, seconds: float):
+        """Hold every waiter, e.g. after a 429."""
+        self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+
+class ProviderLimiter:
+    """Request and token buckets for one provider, kept in sync with its headers."""
+
+    # (remaining, reset) header names for requests and tokens
+    HEADERS = {
+        "requests": [("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+                     ("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset")],
+        "tokens": [("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+                   ("anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-reset")],
+    }
+
+    def __init__(self, requests_per_minute: Optional[int], tokens_per_minute: Optional[int],
+                 clock: Callable[[], float] = time.monotonic):
+        self.buckets: Dict[str, TokenBucket] = {}
+        if requests_per_minute:
+            self.buckets["requests"] = TokenBucket(requests_per_minute, clock)
+        if tokens_per_minute:
+            self.buckets["tokens"] = TokenBucket(tokens_per_minute, clock)
+
+    async def acquire(self, tokens: int):
+        if "requests" in self.buckets:
+            await self.buckets["requests"].acquire(1)
+        if "tokens" in self.buckets:
+            await self.buckets["tokens"].acquire(tokens)
+
+    def observe(self, headers: Mapping[str, str]):
+        for kind, names in self.HEADERS.items():
+            bucket = self.buckets.get(kind)
+            if bucket is None:
+                continue
+            for remaining_name, reset_name in names:
+                if remaining_name in headers:
+                    try:
+                        remaining = float(headers[remaining_name])
+                    except ValueError:
+                        continue
+                    bucket.sync(remaining, parse_duration(headers.get(reset_name, "")))
+
+    def pause(self, seconds: float):
+        for bucket in self.buckets.values():
+            bucket.pause(seconds)
+
+
+class RateLimitScheduler:
+    """Per-provider limiters plus retry with jittered exponential backoff.
+
+    Each run's ``NarrativeGenerator`` owns one, so its concurrent
+    README/LinkedIn calls draw from the same budget; pass one instance to
+    several generators to share it further.
+    """
+
+    def __init__(self, max_retries: int = 4):
+        self.max_retries = max_retries
+        self.limiters: Dict[str, ProviderLimiter] = {}
+        self.stats = {"retries": 0, "throttled": 0}
+
+    def configure(self, provider: str, requests_per_minute: Optional[int] = None,
+                  tokens_per_minute: Optional[int] = None) -> ProviderLimiter:
+        """Limiter for ``provider``; created once with explicit or default limits."""
+        if provider not in self.limiters:
+            default_rpm, default_tpm = DEFAULT_LIMITS.get(provider, (None, None))
+            self.limiters[provider] = ProviderLimiter(requests_per_minute or default_rpm,
+                                                      tokens_per_minute or default_tpm)
+        return self.limiters[provider]
+
+    def observe(self, provider: str, headers: Mapping[str, str]):
+        if provider in self.limiters:
+            self.limiters[provider].observe(headers)
+
+    async def run(self, provider: str, tokens: int, call: Callable[[], Awaitable[T]],
+                  max_retries: Optional[int] = None) -> T:
+        """Run ``call`` within the provider's limits, retrying retryable ``LLMError``s.
+
+        ``max_retries`` overrides the scheduler default for this call only.
+        """
+        limiter = self.configure(provider)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            await limiter.acquire(tokens)
+            try:
+                return await call()
+            except LLMError as e:
+                if not e.retryable or attempt >= max_retries:
+                    raise
+                delay = backoff_delay(attempt, e.retry_after)
+                self.stats["retries"] += 1
+                attempt += 1
+                if e.status == 429 and limiter.buckets:
+                    self.stats["throttled"] += 1
+                    limiter.pause(delay)  # Everyone queues behind the pause, not just this caller
+                else:
+                    await asyncio.sleep(delay)
+
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30
+# Eviction runs after this many stores rather than on every write
+EVICT_EVERY = 16
+
+
+def get_response_cache_path() -> Path:
+    return Path.home() / ".shipsight" / "llm_cache.sqlite3"
+
+
+def response_key(provider: str, model: str, prompt: str, params: Optional[Dict] = None) -> str:
+    """Content address of one generation: provider, model, prompt and parameters."""
+    payload = json.dumps(
+        {"provider": provider, "model": model, "params": params or {},
+         "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest()},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk LLM response cache in SQLite, shared by concurrent ShipSight processes.
+
+    Responses are stored zlib-compressed under their ``response_key``. The
+    database runs in WAL mode so readers never block the writer, and a busy
+    timeout lets several processes write without "database is locked" errors.
+    Entries older than ``max_age_days`` are dropped, then least recently
+    used entries until the total stays under ``max_bytes``.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.path = Path(path) if path else get_response_cache_path()
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, provider TEXT, model TEXT, body BLOB,"
+                " usage TEXT, size INTEGER, created REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict]]:
+        """Cached ``(text, usage)`` for ``key``, refreshing its LRU position."""
+        now = time.time()
+        try:
+            db = self._db()
+            row = db.execute(
+                "SELECT body, usage, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.max_age:
+                self.stats["misses"] += 1
+                return None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            text = zlib.decompress(row[0]).decode("utf-8")
+            usage = json.loads(row[1]) if row[1] else {}
+        except (sqlite3.Error, zlib.error, ValueError):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return text, usage
+
+    def put(self, key: str, provider: str, model: str, text: str, usage: Optional[Dict] = None):
+        now = time.time()
+        body = zlib.compress(text.encode("utf-8"))
+        try:
+            self._db().execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, body, json.dumps(usage or {}), len(body), now, now),
+            )
+        except sqlite3.Error:
+            return
+        self.stats["stores"] += 1
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 1:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones over the size cap."""
+        try:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                removed = db.execute(
+                    "DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,)
+                ).rowcount
+                total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    victims = []
+                    for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                        if total <= self.max_bytes:
+                            break
+                        victims.append((key,))
+                        total -= size
+                    db.executemany("DELETE FROM responses WHERE key = ?", victims)
+                    removed += len(victims)
+                db.execute("COMMIT")
+            except sqlite3.Error:
+                db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            return
+        self.stats["evictions"] += removed
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,80 @@
+import re
+from typing import Dict, Mapping, Optional, Sequence
+
+from shipsight.ai.streaming import TokenSink
+
+# A section starts with a line like "=== README ===". Models sometimes wrap it
+# in a heading or change the number of "=", so matching is lenient.
+MARKER = re.compile(r"^[#*\s]*={2,}\s*([A-Za-z_]+)\s*={2,}[*\s]*$")
+
+
+def marker(name: str) -> str:
+    return f"=== {name.upper()} ==="
+
+
+def _section(line: str, names: Sequence[str]) -> Optional[str]:
+    match = MARKER.match(line)
+    if match and match.group(1).lower() in names:
+        return match.group(1).lower()
+    return None
+
+
+def split_sections(text: str, names: Sequence[str]) -> Dict[str, str]:
+    """Non-empty sections of a delimited response, keyed by name.
+
+    Text before the first marker and unknown markers are ignored; a
+    repeated section keeps its first occurrence.
+    """
+    sections: Dict[str, list] = {}
+    current = None
+    for line in text.splitlines():
+        name = _section(line, names)
+        if name is not None:
+            current = name if name not in sections else None
+            if current is not None:
+                sections[current] = []
+        elif current is not None:
+            sections[current].append(line)
+    result = {name: "\n".join(lines).strip() for name, lines in sections.items()}
+    return {name: body for name, body in result.items() if body}
+
+
+class SectionSplitter:
+    """Routes a streamed delimited response to one sink per section.
+
+    Text is forwarded line by line, so a marker split across chunks is
+    still recognised before anything reaches the wrong sink.
+    """
+
+    def __init__(self, sinks: Mapping[str, Optional[TokenSink]]):
+        self.sinks = sinks
+        self.names = list(sinks)
+        self.seen = set()
+        self._current: Optional[str] = None
+        self._partial = ""
+        self._started = False
+
+    def __call__(self, text: str):
+        self._partial += text
+        *lines, self._partial = self._partial.split("\n")
+        for line in lines:
+            self._line(line)
+
+    def close(self):
+        if self._partial:
+            self._line(self._partial, newline=False)
+            self._partial = ""
+
+    def _line(self, line: str, newline: bool = True):
+        name = _section(line, self.names)
+        if name is not None:
+            self._current = name if name not in self.seen else None
+            self.seen.add(name)
+            self._started = False
+            return
+        if self._current is None or (not self._started and not line.strip()):
+            return  # Preamble, or blank lines right after a marker
+        self._started = True
+        sink = self.sinks.get(self._current)
+        if sink is not None:
+            sink(line + ("\n" if newline else ""))
@@ -0,0 +1,312 @@
+import ast
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+# Bump when any extractor changes its output; part of the scan cache fingerprint.
+SIGNATURE_VERSION = 1
+
+
+class Signature(NamedTuple):
+    kind: str   # class, function, method, decorator, struct, trait, impl, ...
+    name: str
+    line: int   # 1-based
+    depth: int  # number of enclosing signatures (0 = top level)
+
+    def render(self) -> str:
+        return f"L{self.line}: {'  ' * self.depth}{self.kind} {self.name}"
+
+
+Extractor = Callable[[str], List[Signature]]
+EXTRACTORS: Dict[str, Extractor] = {}
+LANGUAGES: Dict[str, str] = {}
+
+
+def register(language: str, *extensions: str):
+    """Register an extractor for the given file extensions."""
+    def decorator(fn: Extractor) -> Extractor:
+        EXTRACTORS[language] = fn
+        for ext in extensions:
+            LANGUAGES[ext] = language
+        return fn
+    return decorator
+
+
+def language_for(ext: str) -> str:
+    return LANGUAGES.get(ext.lower(), "generic")
+
+
+def extract_signatures(text: str, ext: str) -> List[Signature]:
+    """Structured signatures of ``text`` using the extractor registered for ``ext``."""
+    return EXTRACTORS[language_for(ext)](text)
+
+
+# -- line-streaming scanner for brace languages -----------------------------
+
+_STRINGS_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`')
+_BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/")
+_KEYWORDS = frozenset({
+    "if", "for", "while", "switch", "catch", "return", "function", "new", "else",
+    "await", "throw", "super", "this", "do", "try", "with", "typeof", "delete",
+})
+
+# Kinds whose body turns plain functions into methods
+_CONTAINERS = frozenset({"class", "interface", "mixin", "extension", "impl", "trait", "enum", "object"})
+
+
+class LineRule(NamedTuple):
+    kind: str
+    regex: Pattern
+    member_only: bool = False  # only applies directly inside a container block
+    loose: bool = False        # pattern can also hit control flow; reject keywords
+
+
+def _scan_lines(text: str, rules: Tuple[LineRule, ...]) -> List[Signature]:
+    """Match precompiled per-line rules while tracking brace nesting.
+
+    Strings and comments are stripped before counting braces. Only blocks
+    opened by a matched signature count towards ``depth``.
+    """
+    sigs: List[Signature] = []
+    blocks: List[Optional[str]] = []  # kind of the signature that opened each '{'
+    pending: Optional[str] = None     # signature waiting for its opening brace
+    in_comment = False
+
+    for lineno, line in enumerate(text.splitlines(), 1):
+        if in_comment:
+            end = line.find("*/")
+            if end == -1:
+                continue
+            line = line[end + 2:]
+            in_comment = False
+        code = _BLOCK_COMMENT_RE.sub("", _STRINGS_RE.sub('""', line))
+        start = code.find("/*")
+        if start != -1:
+            code, in_comment = code[:start], True
+        code = code.split("//", 1)[0]
+        if not code.strip():
+            continue
+
+        enclosing = [k for k in blocks if k]
+        in_container = bool(blocks) and blocks[-1] in _CONTAINERS
+        for rule in rules:
+            if rule.member_only and not in_container:
+                continue
+            m = rule.regex.match(code)
+            if not m:
+                continue
+            parts = [g for g in m.groups() if g]
+            if rule.loose and parts[-1] in _KEYWORDS:
+                continue
+            name = ".".join(parts)  # e.g. Go methods become Receiver.Name
+            kind = rule.kind
+            if kind == "function" and enclosing and enclosing[-1] in _CONTAINERS:
+                kind = "method"
+            sigs.append(Signature(kind, name, lineno, len(enclosing)))
+            if kind != "decorator":
+                pending = kind
+            break
+
+        for ch in code:
+            if ch == "{":
+                blocks.append(pending)
+                pending = None
+            elif ch == "}" and blocks:
+                blocks.pop()
+        if pending and code.rstrip().endswith(";"):
+            pending = None  # declaration without a body
+    return sigs
+
+
+def _rules(*rules: Tuple) -> Tuple[LineRule, ...]:
+    return tuple(LineRule(kind, re.compile(pattern), *rest) for kind, pattern, *rest in rules)
+
+
+_JS_RULES = _rules(
+    ("decorator", r"\s*@([\w.]+)"),
+    ("class", r"\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(\w+)"),
+    ("interface", r"\s*(?:export\s+)?(?:declare\s+)?interface\s+(\w+)"),
+    ("enum", r"\s*(?:export\s+)?(?:declare\s+)?(?:const\s+)?enum\s+(\w+)"),
+    ("type", r"\s*(?:export\s+)?type\s+(\w+)\s*(?:<[^=]*>)?\s*="),
+    ("function", r"\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(\w+)"),
+    ("function", r"\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*(?::[^=]+)?=\s*(?:async\s+)?"
+                 r"(?:function\b|(?:\([^)]*\)|\w+)\s*(?::\s*[^=]+)?=>)"),
+    ("method", r"\s*(?:(?:public|private|protected|static|readonly|override|abstract|async|get|set)\s+)*"
+               r"\*?\s*(#?\w+)\s*(?:<[^>]*>)?\s*\((?:[^;]*$|[^)]*\)[^;{]*\{)", True, True),
+)
+
+_DART_RULES = _rules(
+    ("decorator", r"\s*@(\w+)"),
+    ("class", r"\s*(?:(?:abstract|sealed|base|final|interface)\s+)*class\s+(\w+)"),
+    ("mixin", r"\s*(?:base\s+)?mixin\s+(\w+)"),
+    ("extension", r"\s*extension\s+(\w+)\s+on\b"),
+    ("enum", r"\s*enum\s+(\w+)"),
+    ("typedef", r"\s*typedef\s+(\w+)"),
+    ("function", r"\s*(?:(?:static|external)\s+)*(?!return\b|else\b|new\b|await\b|throw\b)"
+                 r"[\w<>?,\[\] ]*?[\w>?\]]\s+(?:get\s+)?(\w+)\s*(?:<[^>]*>)?\s*\((?:[^;]*$|.*\)\s*(?:async\s*)?=>)",
+     False, True),
+)
+
+_GO_RULES = _rules(
+    ("method", r"func\s+\(\s*\w*\s*\*?\s*(\w+)(?:\[[^\]]*\])?\s*\)\s*(\w+)"),
+    ("function", r"func\s+(\w+)"),
+    ("struct", r"type\s+(\w+)(?:\[[^\]]*\])?\s+struct\b"),
+    ("interface", r"type\s+(\w+)(?:\[[^\]]*\])?\s+interface\b"),
+    ("type", r"type\s+(\w+)\b"),
+)
+
+_RUST_RULES = _rules(
+    ("decorator", r"\s*#\[([\w:]+)"),
+    ("function", r"\s*(?:pub(?:\([^)]*\))?\s+)?(?:default\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?"
+                 r"(?:extern\s+\"[^\"]*\"\s+)?fn\s+(\w+)"),
+    ("struct", r"\s*(?:pub(?:\([^)]*\))?\s+)?struct\s+(\w+)"),
+    ("enum", r"\s*(?:pub(?:\([^)]*\))?\s+)?enum\s+(\w+)"),
+    ("trait", r"\s*(?:pub(?:\([^)]*\))?\s+)?(?:unsafe\s+)?trait\s+(\w+)"),
+    ("impl", r"\s*(?:unsafe\s+)?impl(?:<[^>]*>)?\s+((?:[\w:]+(?:<[^>]*>)?\s+for\s+)?[\w:]+)"),
+    ("mod", r"\s*(?:pub(?:\([^)]*\))?\s+)?mod\s+(\w+)"),
+    ("macro", r"\s*macro_rules!\s*(\w+)"),
+)
+
+_PY_RULES = _rules(
+    ("decorator", r"\s*@([\w.]+)"),
+    ("class", r"\s*class\s+(\w+)"),
+    ("async function", r"\s*async\s+def\s+(\w+)"),
+    ("function", r"\s*def\s+(\w+)"),
+)
+
+# Legacy pattern, kept for anything without a dedicated extractor
+_GENERIC_RE = re.compile(r"^\s*(class|def|function|async|const|let|var|func)\s+(\w+)", re.MULTILINE)
+
+
+@register("javascript", ".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts")
+def _extract_js(text: str) -> List[Signature]:
+    return _scan_lines(text, _JS_RULES)
+
+
+@register("dart", ".dart")
+def _extract_dart(text: str) -> List[Signature]:
+    return _scan_lines(text, _DART_RULES)
+
+
+@register("go", ".go")
+def _extract_go(text: str) -> List[Signature]:
+    return _scan_lines(text, _GO_RULES)
+
+
+@register("rust", ".rs")
+def _extract_rust(text: str) -> List[Signature]:
+    return _scan_lines(text, _RUST_RULES)
+
+
+@register("python", ".py", ".pyi")
+def _extract_python(text: str) -> List[Signature]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        # Truncated or not-quite-Python: indentation-based line scan
+        return _scan_python_lines(text)
+
+    sigs: List[Signature] = []
+    def visit(body: list, depth: int, in_class: bool):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                for dec in node.decorator_list:
+                    sigs.append(Signature("decorator", ast.unparse(dec)[:80], dec.lineno, depth))
+                if isinstance(node, ast.ClassDef):
+                    kind = "class"
+                else:
+                    kind = "method" if in_class else "function"
+                    if isinstance(node, ast.AsyncFunctionDef):
+                        kind = f"async {kind}"
+                sigs.append(Signature(kind, node.name, node.lineno, depth))
+                visit(node.body, depth + 1, isinstance(node, ast.ClassDef))
+            else:
+                # Definitions guarded by if/try/with at the same level
+                for field in ("body", "orelse", "finalbody", "handlers"):
+                    children = getattr(node, field, None)
+                    if isinstance(children, list):
+                        visit([c for c in children if isinstance(c, ast.AST)], depth, in_class)
+    visit(tree.body, 0, False)
+    return sigs
+
+
+def _scan_python_lines(text: str) -> List[Signature]:
+    sigs: List[Signature] = []
+    scopes: List[Tuple[int, str]] = []  # (indent, kind) of open class/def blocks
+    for lineno, line in enumerate(text.splitlines(), 1):
+        stripped = line.lstrip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        indent = len(line) - len(stripped)
+        while scopes and scopes[-1][0] >= indent:
+            scopes.pop()
+        for rule in _PY_RULES:
+            m = rule.regex.match(line)
+            if m:
+                kind = rule.kind
+                if kind.endswith("function") and scopes and scopes[-1][1] == "class":
+                    kind = kind.replace("function", "method")
+                sigs.append(Signature(kind, m.group(1), lineno, len(scopes)))
+                if kind != "decorator":
+                    scopes.append((indent, kind))
+                break
+    return sigs
+
+
+@register("generic")
+def _extract_generic(text: str) -> List[Signature]:
+    sigs = []
+    for m in _GENERIC_RE.finditer(text):
+        sigs.append(Signature(m.group(1), m.group(2), text.count("\n", 0, m.start()) + 1, 0))
+    return sigs
+
+
+class SignatureMemo:
+    """Signature results memoized by content hash.
+
+    An in-process LRU serves repeat lookups within a run; with a ``ScanCache``
+    attached results are also persisted, so unchanged content is never
+    re-parsed across runs either (even when only its mtime moved). Thread-safe.
+    """
+
+    def __init__(self, cache=None, max_entries: int = 1024):
+        self.cache = cache
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, List[Signature]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(ext: str, content_hash: str) -> str:
+        return f"{language_for(ext)}:{content_hash}"
+
+    def lookup(self, ext: str, content_hash: str) -> Optional[List[Signature]]:
+        key = self.key(ext, content_hash)
+        with self._lock:
+            sigs = self._lru.get(key)
+            if sigs is not None:
+                self._lru.move_to_end(key)
+                return sigs
+            stored = self.cache.lookup_signatures(key) if self.cache is not None else None
+            if stored is None:
+                return None
+            sigs = [Signature(*s) for s in stored]
+            self._remember(key, sigs)
+            return sigs
+
+    def extract(self, text: str, ext: str, content_hash: str) -> List[Signature]:
+        sigs = self.lookup(ext, content_hash)
+        if sigs is not None:
+            return sigs
+        sigs = extract_signatures(text, ext)
+        key = self.key(ext, content_hash)
+        with self._lock:
+            self._remember(key, sigs)
+            if self.cache is not None:
+                self.cache.store_signatures(key, [list(s) for s in sigs])
+        return sigs
+
+    def _remember(self, key: str, sigs: List[Signature]):
+        self._lru[key] = sigs
+        if len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+# Called with each chunk of generated text as it arrives
+TokenSink = Callable[[str], None]
+
+
+class StreamTimeout(Exception):
+    """The provider went quiet for longer than the idle timeout."""
+
+
+def normalize_usage(provider: str, usage: Mapping) -> Dict[str, int]:
+    """Provider usage as prompt/completion/total tokens, plus prompt-cache hits.
+
+    ``cached_tokens`` is the part of the prompt served from the provider's
+    prefix cache; Anthropic also reports ``cache_write_tokens``.
+    """
+    if not usage:
+        return {}
+    written = 0
+    if provider == "ollama":
+        if "prompt_eval_count" not in usage and "eval_count" not in usage:
+            return {}
+        prompt, completion, cached = usage.get("prompt_eval_count", 0), usage.get("eval_count", 0), 0
+    elif provider == "anthropic":
+        cached = usage.get("cache_read_input_tokens") or 0
+        written = usage.get("cache_creation_input_tokens") or 0
+        prompt = (usage.get("input_tokens") or 0) + cached + written
+        completion = usage.get("output_tokens") or 0
+    else:
+        # OpenAI-compatible (OpenAI, Groq)
+        prompt, completion = usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    result = {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+    if cached:
+        result["cached_tokens"] = cached
+    if written:
+        result["cache_write_tokens"] = written
+    return result
+
+
+class SSEParser:
+    """Incremental Server-Sent Events parser (OpenAI, Groq and Anthropic streams).
+
+    Feed it lines without their newline; it yields ``(event, data)`` once a
+    blank line completes an event. Multi-line ``data:`` fields are joined.
+    """
+
+    def __init__(self):
+        self._event = ""
+        self._data = []
+
+    def feed(self, line: str) -> Iterator[Tuple[str, str]]:
+        if not line:
+            if self._data:
+                yield self._event or "message", "\n".join(self._data)
+            self._event, self._data = "", []
+            return
+        if line.startswith(":"):
+            return  # Comment / keep-alive
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "event":
+            self._event = value
+        elif field == "data":
+            self._data.append(value)
+
+
+def ollama_load_seconds(result: Mapping) -> Optional[float]:
+    """Model load time from an Ollama response (``load_duration`` is in nanoseconds)."""
+    load = result.get("load_duration")
+    return load / 1e9 if isinstance(load, (int, float)) else None
+
+
+class StreamDecoder:
+    """Turns one provider's stream lines into text deltas plus final usage.
+
+    ``feed(line)`` returns the text carried by that line ("" if none);
+    ``usage`` holds standardized token counts once the stream reports them.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.usage: Dict[str, int] = {}
+        self.done = False
+        self._raw: Dict[str, int] = {}
+        self.load_s: Optional[float] = None  # Ollama model load time, when the call had to load it
+        self._sse = SSEParser()
+
+    def feed(self, line: str) -> str:
+        if self.provider == "ollama":
+            return self._ollama(line)
+        return "".join(self._event(event, data) for event, data in self._sse.feed(line))
+
+    def _ollama(self, line: str) -> str:
+        """Ollama streams one JSON object per line (NDJSON)."""
+        if not line.strip():
+            return ""
+        chunk = json.loads(line)
+        if chunk.get("error"):
+            raise ValueError(chunk["error"])
+        if chunk.get("done"):
+            self.done = True
+            self.usage = normalize_usage("ollama", chunk)
+            self.load_s = ollama_load_seconds(chunk)
+        return chunk.get("response", "")
+
+    def _event(self, event: str, data: str) -> str:
+        if data == "[DONE]":
+            self.done = True
+            return ""
+        payload = json.loads(data)
+        if self.provider == "anthropic":
+            return self._anthropic(event, payload)
+        # OpenAI-compatible chunks (OpenAI, Groq)
+        usage = payload.get("usage") or (payload.get("x_groq") or {}).get("usage")
+        if usage:
+            self.usage = normalize_usage(self.provider, usage)
+        text = ""
+        for choice in payload.get("choices") or []:
+            text += (choice.get("delta") or {}).get("content") or ""
+        return text
+
+    def _anthropic(self, event: str, payload: dict) -> str:
+        kind = payload.get("type", event)
+        if kind == "error":
+            raise ValueError((payload.get("error") or {}).get("message", "stream error"))
+        if kind == "message_start":
+            self._raw.update((payload.get("message") or {}).get("usage") or {})
+        elif kind == "message_delta":
+            self._raw.update(payload.get("usage") or {})
+        elif kind == "message_stop":
+            self.done = True
+        elif kind == "content_block_delta":
+            return (payload.get("delta") or {}).get("text", "")
+        if self._raw:
+            self.usage = normalize_usage("anthropic", self._raw)
+        return ""
+
+
+class StreamStats:
+    """Latency and throughput of one streamed generation."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.chunks = 0
+
+    def token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.chunks += 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def as_dict(self, completion_tokens: Optional[int] = None, load_s: Optional[float] = None) -> Dict[str, float]:
+        """Timings; with ``load_s`` (model load) the duration is also split into load and generation."""
+        end = self.finished or time.perf_counter()
+        stats = {"duration_s": round(end - self.started, 3)}
+        if load_s is not None:
+            stats["load_s"] = round(load_s, 3)
+            stats["generation_s"] = round(max(0.0, end - self.started - load_s), 3)
+        if self.first_token is not None:
+            stats["ttft_s"] = round(self.first_token - self.started, 3)
+            generating = end - self.first_token
+            tokens = completion_tokens or self.chunks
+            if generating > 0:
+                stats["tokens_per_s"] = round(tokens / generating, 1)
+        return stats
+
+
+async def idle_timeout(lines: AsyncIterator[str], first: float, idle: float) -> AsyncIterator[str]:
+    """Relay ``lines``, failing if none arrives within ``first`` seconds (prompt
+    processing) and then within ``idle`` seconds of the previous one.
+
+    Slow generations are fine as long as they keep producing output.
+    """
+    iterator = lines.__aiter__()
+    timeout = first
+    while True:
+        try:
+            line = await asyncio.wait_for(iterator.__anext__(), timeout)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            raise StreamTimeout(f"no data for {timeout:.0f}s") from None
+        timeout = idle
+        yield line
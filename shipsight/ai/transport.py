@@ -0,0 +1,93 @@
+import importlib.util
+import os
+from typing import Dict, Optional
+
+import httpx
+
+# Base URLs per provider. Override with `ai.endpoints` in shipsight.yml or
+# SHIPSIGHT_<PROVIDER>_URL (e.g. to point tests at a local stand-in server).
+DEFAULT_ENDPOINTS = {
+    "ollama": "http://localhost:11434",
+    "openai": "https://api.openai.com/v1",
+    "anthropic": "https://api.anthropic.com/v1",
+    "groq": "https://api.groq.com/openai/v1",
+}
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def resolve_endpoint(provider: str, endpoints: Optional[Dict[str, str]] = None) -> str:
+    """Base URL for ``provider``: environment, then config, then the default."""
+    url = os.getenv(f"SHIPSIGHT_{provider.upper()}_URL") or (endpoints or {}).get(provider)
+    return (url or DEFAULT_ENDPOINTS.get(provider, "")).rstrip("/")
+
+
+class LLMTransport:
+    """Pooled, keep-alive HTTP clients for LLM providers, one per provider.
+
+    Clients are created on first use and live until ``aclose()``, so every
+    prompt in a run reuses the same connections instead of paying a new
+    TCP+TLS handshake (and DNS lookup) per call. All clients share one SSL
+    context, so certificates are loaded once and TLS sessions can be resumed.
+    """
+
+    def __init__(self, endpoints: Optional[Dict[str, str]] = None, max_connections: int = 10,
+                 max_keepalive_connections: int = 5, keepalive_expiry: float = 30.0,
+                 connect_timeout: float = 10.0, read_timeout: float = 60.0, http2: bool = True):
+        self.endpoints = endpoints or {}
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._ssl_context = None
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    @classmethod
+    def from_config(cls, config) -> "LLMTransport":
+        """Transport configured from an ``AIConfig``."""
+        http = config.http
+        return cls(
+            endpoints=config.endpoints,
+            max_connections=http.max_connections,
+            max_keepalive_connections=http.max_keepalive_connections,
+            keepalive_expiry=http.keepalive_expiry,
+            connect_timeout=http.connect_timeout,
+            read_timeout=http.read_timeout,
+            http2=http.http2,
+        )
+
+    def endpoint(self, provider: str) -> str:
+        return resolve_endpoint(provider, self.endpoints)
+
+    def client(self, provider: str) -> httpx.AsyncClient:
+        """The long-lived client for ``provider``; request paths are relative to its endpoint."""
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            base_url = self.endpoint(provider)
+            if self._ssl_context is None and base_url.startswith("https://"):
+                self._ssl_context = httpx.create_ssl_context()
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                http2=self.http2 and base_url.startswith("https://"),
+                limits=self.limits,
+                timeout=self.timeout,
+                verify=self._ssl_context or True,
+            )
+            self._clients[provider] = client
+        return client
+
+    async def aclose(self):
+        """Close every pooled connection."""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    async def __aenter__(self) -> "LLMTransport":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,355 @@
+import asyncio
+import datetime
+import json
+import os
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+from shipsight.ai.hedging import LatencyHistogram
+
+try:
+    import fcntl
+except ImportError:  # Windows: each batch is still a single append
+    fcntl = None
+
+USAGE_FILE = "token_usage.jsonl"
+LOCK_FILE = "token_usage.lock"
+INDEX_FILE = "usage.sqlite3"
+ROTATE_BYTES = 8 * 1024 * 1024
+# Rotated files kept after they have been indexed
+KEEP_ARCHIVES = 4
+BATCH_SIZE = 32
+# Buffered records are written at most this long after they were queued
+FLUSH_INTERVAL_S = 5.0
+GROUPS = ("project", "provider", "model", "day")
+
+# USD per million (prompt, completion) tokens; the longest matching model prefix wins.
+# Estimates from public list prices; local models are free.
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-7-sonnet": (3.00, 15.00),
+    "claude-3-opus": (15.00, 75.00),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
+
+def get_usage_dir() -> Path:
+    return Path.home() / ".shipsight"
+
+
+def estimate_cost(provider: str, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    if provider == "ollama":
+        return 0.0
+    matches = [name for name in PRICES if model.startswith(name)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = PRICES[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class UsageLog:
+    """Batched, append-only usage log shared by concurrent ShipSight processes.
+
+    Records are buffered in memory and appended as one write per batch under
+    an exclusive lock, so lines from several processes never interleave. The
+    file is rotated to ``token_usage.<stamp>.<pid>.jsonl`` once it would grow
+    past ``rotate_bytes``; ``UsageIndex`` removes old archives after indexing.
+
+    Inside a running event loop, full batches are written in a worker thread
+    and a timer flushes partial batches after ``flush_interval`` seconds, so
+    recording never blocks the loop and a crash loses at most that window.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, rotate_bytes: int = ROTATE_BYTES,
+                 batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL_S):
+        self.directory = Path(directory) if directory else get_usage_dir()
+        self.rotate_bytes = rotate_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._ready = False
+        self._writes: Set[asyncio.Task] = set()
+        self._timer: Optional[asyncio.Task] = None
+        self._error: Optional[OSError] = None
+
+    @property
+    def path(self) -> Path:
+        return self.directory / USAGE_FILE
+
+    def record(self, entry: Dict):
+        self._buffer.append(json.dumps(entry))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # Synchronous caller: write full batches inline
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+            return
+        if len(self._buffer) >= self.batch_size:
+            self._write_in_background(loop)
+        elif self._timer is None or self._timer.done():
+            self._timer = loop.create_task(self._flush_later())
+
+    def flush(self):
+        batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def _write_in_background(self, loop: asyncio.AbstractEventLoop):
+        # Take the batch on the loop thread so records queued meanwhile are never lost
+        batch, self._buffer = self._buffer, []
+        task = loop.create_task(self._write_async(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write_async(self, batch: List[str]):
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except OSError as e:
+            self._error = e  # Surfaced by aflush()
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        if self._buffer:
+            self._write_in_background(asyncio.get_running_loop())
+
+    def _write(self, batch: List[str]):
+        if not batch:
+            return
+        data = ("\n".join(batch) + "\n").encode("utf-8")
+        if not self._ready:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._ready = True
+        with open(self.directory / LOCK_FILE, "a+b") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)  # Released when the lock file closes
+            self._rotate(len(data))
+            with open(self.path, "ab") as f:
+                f.write(data)
+
+    async def aflush(self):
+        """Write everything queued and wait for background writes, without blocking the event loop."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._buffer:
+            self._write_in_background(asyncio.get_running_loop())
+        if self._writes:
+            await asyncio.gather(*list(self._writes))
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _rotate(self, incoming: int):
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size and size + incoming > self.rotate_bytes:
+            stamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+            try:
+                os.replace(self.path, self.directory / f"token_usage.{stamp}.{os.getpid()}.jsonl")
+            except OSError:
+                pass  # Another process has it open (Windows); keep appending
+
+    def archives(self) -> List[Path]:
+        """Rotated files, oldest first."""
+        return sorted(self.directory.glob("token_usage.*.jsonl"))
+
+    def segments(self) -> List[Path]:
+        """Rotated archives followed by the live file."""
+        return self.archives() + ([self.path] if self.path.exists() else [])
+
+
+def _percentile(counts: Dict[int, int], q: float) -> Optional[float]:
+    total = sum(counts.values())
+    if not total:
+        return None
+    running = 0
+    for bucket in sorted(counts):
+        running += counts[bucket]
+        if running >= q * total:
+            return round(LatencyHistogram.upper_bound(bucket), 2)
+    return None
+
+
+class UsageIndex:
+    """Daily usage aggregates in SQLite, maintained incrementally from the log.
+
+    ``refresh()`` only reads log bytes appended since the previous refresh
+    (tracked per file identity, so rotation does not re-count anything), and
+    reports query per-day aggregates instead of raw records. Latency is kept
+    as log-bucketed histograms so percentiles can be merged across groups.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, keep_archives: int = KEEP_ARCHIVES):
+        self.log = UsageLog(directory)
+        self.path = self.log.directory / INDEX_FILE
+        self.keep_archives = keep_archives
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS segments (id TEXT PRIMARY KEY, offset INTEGER)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS daily ("
+                " day TEXT, project TEXT, provider TEXT, model TEXT, calls INTEGER,"
+                " prompt_tokens INTEGER, completion_tokens INTEGER, cost REAL,"
+                " cache_hits INTEGER, cache_lookups INTEGER, saved_tokens INTEGER,"
+                " cached_tokens INTEGER DEFAULT 0, PRIMARY KEY (day, project, provider, model))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS latency ("
+                " day TEXT, project TEXT, provider TEXT, model TEXT, metric TEXT, bucket INTEGER,"
+                " count INTEGER, PRIMARY KEY (day, project, provider, model, metric, bucket))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def refresh(self) -> int:
+        """Index records appended since the last refresh; returns how many."""
+        db = self._db()
+        indexed = 0
+        for path in self.log.segments():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Rotated or pruned meanwhile
+            segment = f"{stat.st_dev}:{stat.st_ino}"
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT offset FROM segments WHERE id = ?", (segment,)).fetchone()
+                offset = row[0] if row and row[0] <= stat.st_size else 0
+                if offset < stat.st_size:
+                    offset, count = self._ingest(db, path, offset)
+                    db.execute("INSERT OR REPLACE INTO segments VALUES (?, ?)", (segment, offset))
+                    indexed += count
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        self._prune(db, self.log.archives())
+        return indexed
+
+    def _ingest(self, db: sqlite3.Connection, path: Path, offset: int):
+        daily = defaultdict(lambda: [0, 0, 0, 0.0, 0, 0, 0, 0])
+        latency = defaultdict(int)
+        count = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partially written batch; picked up next time
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                key = (str(record.get("timestamp", ""))[:10], record.get("project") or "",
+                       record.get("provider") or "", record.get("model") or "")
+                usage = record.get("usage") or {}
+                prompt, completion = int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0)
+                agg = daily[key]
+                agg[0] += 1
+                agg[1] += prompt
+                agg[2] += completion
+                agg[3] += estimate_cost(key[2], key[3], prompt, completion)
+                if record.get("cache") in ("hit", "miss"):
+                    agg[5] += 1
+                    if record["cache"] == "hit":
+                        agg[4] += 1
+                        agg[6] += int((record.get("saved") or {}).get("total_tokens") or 0)
+                agg[7] += int(usage.get("cached_tokens") or 0)
+                for metric, field in (("ttft", "ttft_s"), ("duration", "duration_s")):
+                    if isinstance(record.get(field), (int, float)):
+                        latency[key + (metric, LatencyHistogram.bucket(record[field]))] += 1
+                count += 1
+        db.executemany(
+            "INSERT INTO daily VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (day, project, provider, model) DO UPDATE SET"
+            " calls = calls + excluded.calls, prompt_tokens = prompt_tokens + excluded.prompt_tokens,"
+            " completion_tokens = completion_tokens + excluded.completion_tokens, cost = cost + excluded.cost,"
+            " cache_hits = cache_hits + excluded.cache_hits, cache_lookups = cache_lookups + excluded.cache_lookups,"
+            " saved_tokens = saved_tokens + excluded.saved_tokens, cached_tokens = cached_tokens + excluded.cached_tokens",
+            [key + tuple(agg) for key, agg in daily.items()],
+        )
+        db.executemany(
+            "INSERT INTO latency VALUES (?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (day, project, provider, model, metric, bucket) DO UPDATE SET count = count + excluded.count",
+            [key + (n,) for key, n in latency.items()],
+        )
+        return offset, count
+
+    def _prune(self, db: sqlite3.Connection, archives: List[Path]):
+        """Delete the oldest fully indexed archives beyond ``keep_archives``."""
+        for path in archives[:max(0, len(archives) - self.keep_archives)]:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            segment = f"{stat.st_dev}:{stat.st_ino}"
+            row = db.execute("SELECT offset FROM segments WHERE id = ?", (segment,)).fetchone()
+            if row and row[0] >= stat.st_size:
+                path.unlink(missing_ok=True)
+                db.execute("DELETE FROM segments WHERE id = ?", (segment,))
+
+    def report(self, by: Sequence[str] = ("provider", "model"), since: Optional[str] = None,
+               project: Optional[str] = None) -> List[Dict]:
+        """Totals grouped by any of ``GROUPS``, with cache hit rate and latency percentiles."""
+        unknown = [g for g in by if g not in GROUPS]
+        if unknown:
+            raise ValueError(f"Unknown grouping: {', '.join(unknown)} (use {', '.join(GROUPS)})")
+        by = list(by)
+        where, args = ["1 = 1"], []
+        if since:
+            where.append("day >= ?")
+            args.append(since)
+        if project:
+            where.append("project = ?")
+            args.append(project)
+        cols = "".join(f"{g}, " for g in by)
+        group = f" GROUP BY {', '.join(by)} ORDER BY {', '.join(by)}" if by else ""
+        db = self._db()
+        rows = db.execute(
+            f"SELECT {cols}SUM(calls), SUM(prompt_tokens), SUM(completion_tokens), SUM(cost),"
+            f" SUM(cache_hits), SUM(cache_lookups), SUM(saved_tokens), SUM(cached_tokens)"
+            f" FROM daily WHERE {' AND '.join(where)}{group}", args,
+        ).fetchall()
+        histograms = defaultdict(lambda: defaultdict(dict))
+        for *key, metric, bucket, count in db.execute(
+            f"SELECT {cols}metric, bucket, SUM(count) FROM latency WHERE {' AND '.join(where)}"
+            f" GROUP BY {cols}metric, bucket", args,
+        ):
+            histograms[tuple(key)][metric][bucket] = count
+        report = []
+        for row in rows:
+            key, values = tuple(row[:len(by)]), row[len(by):]
+            if values[0] is None:
+                continue  # No usage at all
+            calls, prompt, completion, cost, hits, lookups, saved, cached = values
+            latency = histograms.get(key, {})
+            report.append({
+                **dict(zip(by, key)),
+                "calls": calls, "prompt_tokens": prompt, "cached_tokens": cached, "completion_tokens": completion,
+                "cost": round(cost, 4), "saved_tokens": saved,
+                "cache_hit_rate": round(hits / lookups, 3) if lookups else None,
+                "ttft_p50": _percentile(latency.get("ttft", {}), 0.5),
+                "ttft_p95": _percentile(latency.get("ttft", {}), 0.95),
+                "latency_p50": _percentile(latency.get("duration", {}), 0.5),
+                "latency_p95": _percentile(latency.get("duration", {}), 0.95),
+            })
+        return report
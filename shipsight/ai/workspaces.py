@@ -0,0 +1,172 @@
+import json
+import multiprocessing
+import os
+import re
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import yaml
+
+from shipsight.ai.ignore import glob_to_regex
+from shipsight.ai.index import ProjectIndex
+
+
+class Workspace(NamedTuple):
+    name: str
+    path: str     # POSIX path relative to the repo root
+    manager: str  # npm, yarn, pnpm, lerna, nx, cargo, go
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _read_toml(path: Path) -> dict:
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        return {}
+
+
+def _expand(index: ProjectIndex, patterns: List[str], manifest: str) -> List[str]:
+    """Directories matching workspace globs (``!`` excludes) that contain ``manifest``."""
+    include, exclude = [], []
+    for pattern in patterns:
+        if not isinstance(pattern, str):
+            continue
+        target = exclude if pattern.startswith("!") else include
+        pattern = pattern.lstrip("!").strip().removeprefix("./").rstrip("/")
+        if pattern:
+            target.append(re.compile(glob_to_regex(pattern)))
+    return [
+        d for d in index.dirs
+        if d and index.has(f"{d}/{manifest}")
+        and any(r.fullmatch(d) for r in include)
+        and not any(r.fullmatch(d) for r in exclude)
+    ]
+
+
+def _package_name(root: Path, rel: str) -> str:
+    return _read_json(root / rel / "package.json").get("name") or rel
+
+
+def detect_workspaces(index: ProjectIndex) -> List[Workspace]:
+    """Find the packages of a monorepo: npm/yarn/pnpm/lerna workspaces, Nx projects,
+    Cargo workspace members and go.work modules."""
+    root = index.root
+    found: Dict[str, Workspace] = {}
+    def add(rel: str, name: str, manager: str):
+        if rel and rel not in found:
+            found[rel] = Workspace(name, rel, manager)
+
+    # JavaScript workspaces
+    if index.has("package.json"):
+        declared = _read_json(root / "package.json").get("workspaces")
+        if isinstance(declared, dict):
+            declared = declared.get("packages")
+        if isinstance(declared, list):
+            manager = "yarn" if index.has("yarn.lock") else "npm"
+            for rel in _expand(index, declared, "package.json"):
+                add(rel, _package_name(root, rel), manager)
+    if index.has("pnpm-workspace.yaml"):
+        try:
+            with open(root / "pnpm-workspace.yaml", "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError):
+            data = {}
+        for rel in _expand(index, data.get("packages") or [], "package.json"):
+            add(rel, _package_name(root, rel), "pnpm")
+    if index.has("lerna.json"):
+        packages = _read_json(root / "lerna.json").get("packages") or ["packages/*"]
+        for rel in _expand(index, packages, "package.json"):
+            add(rel, _package_name(root, rel), "lerna")
+    if index.has("nx.json"):
+        for entry in index.files([".json"]):
+            if entry.name == "project.json" and entry.dir:
+                name = _read_json(root / entry.path).get("name") or entry.dir
+                add(entry.dir, name, "nx")
+
+    # Cargo workspace
+    if index.has("Cargo.toml"):
+        workspace = _read_toml(root / "Cargo.toml").get("workspace") or {}
+        members = list(workspace.get("members") or [])
+        members += [f"!{p}" for p in workspace.get("exclude") or []]
+        for rel in _expand(index, members, "Cargo.toml"):
+            package = _read_toml(root / rel / "Cargo.toml").get("package") or {}
+            add(rel, package.get("name") or rel, "cargo")
+
+    # Go multi-module workspace
+    if index.has("go.work"):
+        try:
+            text = (root / "go.work").read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            text = ""
+        uses = re.findall(r"^\s*use\s+(\S+)\s*$", text, re.MULTILINE)
+        for block in re.findall(r"^\s*use\s*\((.*?)\)", text, re.MULTILINE | re.DOTALL):
+            uses += [line.split("//")[0].strip() for line in block.splitlines()]
+        for use in uses:
+            rel = use.strip('"').removeprefix("./").rstrip("/")
+            if rel and rel != "." and index.has(f"{rel}/go.mod"):
+                try:
+                    go_mod = (root / rel / "go.mod").read_text(encoding="utf-8", errors="ignore")
+                except OSError:
+                    go_mod = ""
+                module = re.search(r"^module\s+(\S+)", go_mod, re.MULTILINE)
+                add(rel, module.group(1) if module else rel, "go")
+
+    return sorted(found.values(), key=lambda w: w.path)
+
+
+def analyze_workspace(root: str, workspace: Workspace, use_cache: bool = True) -> dict:
+    """Stack, DNA and hero file names of one workspace. Runs inside a worker process.
+
+    Only what the parent keeps is returned, so hero bodies are never pickled back.
+    """
+    from shipsight.ai.intelligence import IntelligenceEngine
+
+    path = Path(root) / workspace.path
+    engine = IntelligenceEngine.with_cache(path) if use_cache else IntelligenceEngine(path)
+    analysis = engine.analyze_stack()
+    heroes = engine.get_hero_code()
+    engine.save_cache()
+    return {
+        "name": workspace.name,
+        "path": workspace.path,
+        "manager": workspace.manager,
+        "description": analysis["description"],
+        "frameworks": analysis["frameworks"],
+        "dna": analysis["dna"],
+        "file_counts": analysis["file_counts"],
+        "heroes": list(heroes),
+    }
+
+
+def analyze_workspaces(root: Path, workspaces: List[Workspace], max_workers: Optional[int] = None,
+                       use_cache: bool = True) -> List[dict]:
+    """Analyze every workspace in parallel across a process pool.
+
+    Scanning, reading and parsing are CPU-bound Python, so separate processes
+    (not threads) are what let a 60-package repo scale with the core count.
+    Falls back to serial analysis when a pool cannot be started.
+    """
+    if not workspaces:
+        return []
+    workers = max(1, min(len(workspaces), max_workers or os.cpu_count() or 1))
+    if workers > 1:
+        try:
+            # Spawned, not forked: the caller runs in a pipeline thread while other threads hold locks
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(analyze_workspace, str(root), ws, use_cache) for ws in workspaces]
+                return [f.result() for f in futures]
+        except (OSError, BrokenProcessPool):
+            pass # e.g. sandboxes without process spawning - do it in-process
+    return [analyze_workspace(str(root), ws, use_cache) for ws in workspaces]
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from rich.console import Console
 
@@ -14,9 +15,52 @@ class ArtifactManager:
             f.write(content)
         console.print(f"[green]Saved artifact to {filepath}[/green]")
 
+    def stream_markdown(self, filename: str) -> "ArtifactStream":
+        """Open an artifact for incremental writes (e.g. tokens as they stream in)."""
+        return ArtifactStream(self.output_dir / filename)
+
     def save_json(self, filename: str, data: dict):
         import json
         filepath = self.output_dir / filename
         with open(filepath, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2)
         console.print(f"[green]Saved metadata to {filepath}[/green]")
+
+
+class ArtifactStream:
+    """Append-as-you-go artifact; each write is flushed so it can be followed live.
+
+    Tokens go to a hidden sibling (``.<name>.partial``) that replaces the
+    artifact only on ``close()``, so a failed stream leaves the previous
+    run's file in place.
+    """
+
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        self.partial_path = filepath.with_name(f".{filepath.name}.partial")
+        self.chars = 0
+        self._file = open(self.partial_path, "w", encoding="utf-8")
+
+    def write(self, text: str):
+        self._file.write(text)
+        self._file.flush()
+        self.chars += len(text)
+
+    def replace(self, content: str):
+        """Overwrite what was streamed so far with the final content (e.g. a re-assembled response)."""
+        self._file.seek(0)
+        self._file.truncate()
+        self.chars = 0
+        self.write(content)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            os.replace(self.partial_path, self.filepath)
+            console.print(f"[green]Saved artifact to {self.filepath}[/green]")
+
+    def discard(self):
+        """Close and delete a partially written stream; the previous artifact is untouched."""
+        if not self._file.closed:
+            self._file.close()
+        self.partial_path.unlink(missing_ok=True)
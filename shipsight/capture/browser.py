@@ -0,0 +1,97 @@
+import asyncio
+import contextlib
+import time
+from typing import AsyncIterator, Dict, List, Optional
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
+from rich.console import Console
+
+console = Console()
+
+# Headless flags that cut startup work and avoid /dev/shm exhaustion in
+# containers; nothing here changes how pages render.
+LAUNCH_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+]
+
+
+class BrowserService:
+    """One headless Chromium for the whole run, shared by capture and code snaps.
+
+    The browser is launched on first use. Callers borrow isolated contexts
+    (or single pages) and return them when done; a browser that crashed or
+    disconnected is relaunched on the next borrow. ``close()`` shuts down
+    the browser and the Playwright driver.
+    """
+
+    def __init__(self, launch_args: Optional[List[str]] = None, headless: bool = True):
+        self.launch_args = LAUNCH_ARGS if launch_args is None else launch_args
+        self.headless = headless
+        self.stats: Dict[str, float] = {"launches": 0, "launch_s": 0.0, "contexts": 0, "restarts": 0}
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._lock = asyncio.Lock()
+
+    def healthy(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def browser(self) -> Browser:
+        async with self._lock:
+            if self._browser is not None and not self._browser.is_connected():
+                console.print("[yellow]Headless browser disconnected; relaunching.[/yellow]")
+                self.stats["restarts"] += 1
+                self._browser = None
+            if self._browser is None:
+                started = time.perf_counter()
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+                self.stats["launches"] += 1
+                self.stats["launch_s"] = round(self.stats["launch_s"] + time.perf_counter() - started, 3)
+            return self._browser
+
+    @contextlib.asynccontextmanager
+    async def context(self, **options) -> AsyncIterator[BrowserContext]:
+        """Borrow a fresh browser context (own cookies and storage)."""
+        browser = await self.browser()
+        context = await browser.new_context(**options)
+        self.stats["contexts"] += 1
+        try:
+            yield context
+        finally:
+            with contextlib.suppress(Exception):  # Already gone if the browser crashed
+                await context.close()
+
+    @contextlib.asynccontextmanager
+    async def page(self, **options) -> AsyncIterator[Page]:
+        """Borrow a page in its own context."""
+        async with self.context(**options) as context:
+            yield await context.new_page()
+
+    async def close(self):
+        async with self._lock:
+            if self._browser is not None:
+                with contextlib.suppress(Exception):
+                    await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                with contextlib.suppress(Exception):
+                    await self._playwright.stop()
+                self._playwright = None
+
+    async def __aenter__(self) -> "BrowserService":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -1,75 +1,196 @@
 import asyncio
+import time
 from pathlib import Path
-from playwright.async_api import async_playwright
+from typing import Dict, List, Optional
 from rich.console import Console
 from shipsight.config import ShipSightConfig
+from shipsight.capture.browser import BrowserService
+from shipsight.capture.manifest import (DOM_SNAPSHOT, CaptureManifest, change_report, dom_hash, file_hash,
+                                        find_duplicates, perceptual_hash)
+from shipsight.capture.routes import RouteCapture, route_filenames, route_url, summarize
+from shipsight.capture.stability import NetworkTracker, wait_for_stability
 
 console = Console()
 
 class CaptureEngine:
-    def __init__(self, config: ShipSightConfig, output_dir: Path):
+    def __init__(self, config: ShipSightConfig, output_dir: Path, browser: Optional[BrowserService] = None):
         self.config = config
+        # Borrow the run's shared browser when given; otherwise use (and close) our own
+        self.browser = browser
         self.output_dir = output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
         (self.output_dir / "screenshots").mkdir(exist_ok=True)
+        # Previous run's DOM and image hashes, so unchanged routes skip the screenshot
+        self.manifest = CaptureManifest(self.output_dir / "screenshots" / "manifest.json")
+        self._dom: Dict[str, str] = {}
 
-    async def capture_screenshots(self, base_url: str):
-        routes = self.config.capture.routes
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            # Set high device_scale_factor for "Retina" quality (perfect for LinkedIn/README)
-            context = await browser.new_context(
-                viewport=self.config.capture.viewport,
-                device_scale_factor=2 
-            )
-            page = await context.new_page()
-
-            for route in routes:
-                url = f"{base_url.rstrip('/')}/{route.lstrip('/')}"
-                console.print(f"[yellow]Capturing high-res screenshot: {url}[/yellow]")
+    async def capture_screenshots(self, base_url: str) -> List[RouteCapture]:
+        """Capture every configured route in one browser, ``capture.pages`` at a time.
+
+        Pages share one context (cookies, auth) and each pulls the next route
+        from a queue. A failing route only affects its own result.
+        """
+        service = self.browser or BrowserService()
+        try:
+            return await self._capture_all(service, base_url)
+        finally:
+            if self.browser is None:
+                await service.close()
+
+    async def _capture_all(self, service: BrowserService, base_url: str) -> List[RouteCapture]:
+        routes = list(dict.fromkeys(self.config.capture.routes))
+        stems = route_filenames(routes)
+        queue: asyncio.Queue = asyncio.Queue()
+        for route in routes:
+            queue.put_nowait(route)
+        results: Dict[str, RouteCapture] = {}
+        forced = set()  # Routes that must be re-rendered even if their DOM is unchanged
+
+        # Set high device_scale_factor for "Retina" quality (perfect for LinkedIn/README)
+        async with service.context(viewport=self.config.capture.viewport, device_scale_factor=2) as context:
+            async def worker():
+                page = await context.new_page()
                 try:
-                    await page.goto(url, wait_until="load", timeout=60000)
-                    
-                    # 1. Auto-scroll to trigger lazy loading / animations
-                    await self._auto_scroll(page)
-                    
-                    # 2. Final wait for stability
-                    await asyncio.sleep(2)
-                    
-                    filename = route.replace("/", "_").strip("_") or "index"
-                    filepath = self.output_dir / "screenshots" / f"{filename}.png"
-                    await page.screenshot(path=str(filepath), full_page=True)
-                    console.print(f"[green]Saved 2x-res screenshot to {filepath}[/green]")
-                except Exception as e:
-                    console.print(f"[yellow]Warning: Capture issues for {url}: {e}[/yellow]")
-                    try:
-                        filename = route.replace("/", "_").strip("_") or "index"
-                        filepath = self.output_dir / "screenshots" / f"{filename}_partial.png"
-                        await page.screenshot(path=str(filepath), full_page=True)
-                    except:
-                        pass
-
-            await browser.close()
-
-    async def _auto_scroll(self, page):
-        """Scroll to the bottom of the page to trigger lazy loading."""
-        await page.evaluate("""
-            async () => {
-                await new Promise((resolve) => {
-                    let totalHeight = 0;
-                    let distance = 100;
-                    let timer = setInterval(() => {
-                        let scrollHeight = document.body.scrollHeight;
-                        window.scrollBy(0, distance);
-                        totalHeight += distance;
-                        if(totalHeight >= scrollHeight){
-                            clearInterval(timer);
-                            resolve();
-                        }
-                    }, 100);
-                });
-            }
-        """)
+                    while not queue.empty():
+                        route = queue.get_nowait()
+                        if page.is_closed(): # Crashed on the previous route
+                            page = await context.new_page()
+                        results[route] = await self._capture_route(page, base_url, route, stems[route],
+                                                                   force=route in forced)
+                finally:
+                    if not page.is_closed():
+                        await page.close()
+
+            workers = max(1, min(self.config.capture.pages, len(routes)))
+            await asyncio.gather(*(worker() for _ in range(workers)))
+
+            # A reused duplicate points at another route's image; if that route re-rendered it
+            # differently this run, the duplicate has to be captured on its own again
+            stale = await asyncio.to_thread(self._stale_duplicates, results)
+            if stale:
+                forced.update(stale)
+                for route in stale:
+                    queue.put_nowait(route)
+                await asyncio.gather(*(worker() for _ in range(min(workers, len(stale)))))
+
+        captured = [results[route] for route in routes if route in results]
+        console.print(f"[blue]Captured {len(captured)} routes: {summarize(captured)}.[/blue]")
+        if self.config.capture.incremental:
+            captured = await asyncio.to_thread(self._deduplicate, captured, routes, stems)
+            report = change_report(captured)
+            console.print(f"[dim]Screenshots: {len(report['changed'])} changed, {len(report['unchanged'])} unchanged, "
+                          f"{len(report['duplicate'])} duplicate.[/dim]")
+        return captured
+
+    def _stale_duplicates(self, results: Dict[str, RouteCapture]) -> List[str]:
+        stale = []
+        for route, result in results.items():
+            if result.change == "duplicate":
+                image = self.output_dir / result.path
+                if not image.is_file() or file_hash(image) != self.manifest.entries[route]["sha256"]:
+                    stale.append(route)
+        return stale
+
+    def _deduplicate(self, captured: List[RouteCapture], routes: List[str], stems: Dict[str, str]) -> List[RouteCapture]:
+        """Fingerprint this run's screenshots, collapse near-duplicates onto the first route, save the manifest."""
+        fingerprints = {}
+        for result in captured:
+            if result.status != "ok" or result.route not in self._dom or result.change == "duplicate":
+                continue  # Reused duplicates keep pointing at their original (resolved below)
+            entry = self.manifest.entries.get(result.route) if result.change == "unchanged" else None
+            if entry:
+                sha, phash = entry["sha256"], entry.get("phash")
+            else:
+                image = self.output_dir / result.path
+                sha, phash = file_hash(image), perceptual_hash(image)
+            fingerprints[result.route] = (result.path, sha, phash)
+            self.manifest.record(result.route, self._dom[result.route], result.path, sha, phash)
+
+        duplicates = find_duplicates([(route, phash, sha) for route, (_, sha, phash) in fingerprints.items()],
+                                     self.config.capture.duplicate_threshold)
+        collapsed: Dict[str, RouteCapture] = {}
+        for result in captured:
+            original = duplicates.get(result.route)
+            if original:
+                path, sha, phash = fingerprints[original]
+                own = self.output_dir / "screenshots" / f"{stems[result.route]}.png"
+                if own.exists() and own != self.output_dir / path:
+                    own.unlink()
+                result = result._replace(path=path, change="duplicate", duplicate_of=original)
+                self.manifest.record(result.route, self._dom[result.route], path, sha, phash, original)
+            collapsed[result.route] = result
+        # A reused duplicate whose original was itself collapsed this run follows it to the new original
+        for route, result in collapsed.items():
+            target = collapsed.get(result.duplicate_of) if result.change == "duplicate" else None
+            if route not in duplicates and target is not None and target.change == "duplicate":
+                path, sha, phash = fingerprints[target.duplicate_of]
+                collapsed[route] = result._replace(path=path, duplicate_of=target.duplicate_of)
+                self.manifest.record(route, self._dom[route], path, sha, phash, target.duplicate_of)
+        self.manifest.save(routes)
+        return list(collapsed.values())
+
+    async def _capture_route(self, page, base_url: str, route: str, stem: str, force: bool = False) -> RouteCapture:
+        url = route_url(base_url, route)
+        shots = self.output_dir / "screenshots"
+        timings: Dict[str, float] = {}
+        started = last = time.perf_counter()
+        def lap(name: str):
+            nonlocal last
+            now = time.perf_counter()
+            timings[f"{name}_s"] = round(now - last, 3)
+            timings["total_s"] = round(now - started, 3)
+            last = now
+
+        console.print(f"[yellow]Capturing high-res screenshot: {url}[/yellow]")
+        capture = self.config.capture
+        http_status, stable = None, None
+        network = NetworkTracker(page)
+        try:
+            response = await page.goto(url, wait_until="load", timeout=capture.navigation_timeout * 1000)
+            http_status = response.status if response else None
+            lap("navigate")
+
+            # Trigger lazy content, then wait for images, fonts, DOM and network to settle (capped per route)
+            report = await wait_for_stability(page, network, capture.stability_timeout, capture.quiet_ms,
+                                              capture.max_scroll_steps)
+            stable = report.stable
+            lap("stability")
+            if not stable:
+                console.print(f"[dim]{url} still changing after {capture.stability_timeout}s; capturing anyway.[/dim]")
+
+            filepath = shots / f"{stem}.png"
+            change = ""
+            if capture.incremental:
+                # Same DOM as last run and its image is intact: reuse it instead of rendering the full page.
+                # A duplicate's image is its original's screenshot, so it keeps pointing there.
+                self._dom[route] = dom_hash(await page.evaluate(DOM_SNAPSHOT))
+                reused = None if force else self.manifest.reusable(route, self._dom[route], self.output_dir)
+                lap("snapshot")
+                own = reused is not None and reused["path"] == f"screenshots/{filepath.name}"
+                if reused and (own or reused.get("duplicate_of")):
+                    console.print(f"[dim]Unchanged since last run: {url}[/dim]")
+                    return RouteCapture(route, url, reused["path"], "ok", http_status, timings=timings, stable=stable,
+                                        change="unchanged" if own else "duplicate",
+                                        duplicate_of=None if own else reused["duplicate_of"])
+                change = "changed"
+            await page.screenshot(path=str(filepath), full_page=True)
+            lap("screenshot")
+            console.print(f"[green]Saved 2x-res screenshot to {filepath}[/green]")
+            return RouteCapture(route, url, f"screenshots/{filepath.name}", "ok", http_status, timings=timings,
+                                stable=stable, change=change)
+        except Exception as e:
+            console.print(f"[yellow]Warning: Capture issues for {url}: {e}[/yellow]")
+            status, path = "failed", None
+            try:
+                filepath = shots / f"{stem}_partial.png"
+                await page.screenshot(path=str(filepath), full_page=True)
+                status, path = "partial", f"screenshots/{filepath.name}"
+            except Exception:
+                pass
+            lap("failed")
+            return RouteCapture(route, url, path, status, http_status, str(e) or type(e).__name__, timings, stable)
+        finally:
+            network.detach()
 
     async def record_walkthrough(self, base_url: str, duration: int = 5):
         """Simple GIF/Walkthrough placeholder (sequence of screenshots for now)."""
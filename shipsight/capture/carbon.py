@@ -1,76 +1,116 @@
 import asyncio
+import importlib.util
 from pathlib import Path
-from playwright.async_api import async_playwright
+from typing import Dict, List, Optional, Tuple
+from rich.console import Console
+
+from shipsight.capture.browser import BrowserService
+from shipsight.capture.highlight import FONT_STACK, font_face_css, highlight_code, theme_css
+
+console = Console()
+
+# Swap in one snippet and resolve once it is laid out with its fonts loaded
+SHOW_SNIPPET = """
+async ([name, markup]) => {
+    document.querySelector('.filename').textContent = name;
+    document.querySelector('.code').innerHTML = markup;
+    await document.fonts.ready;
+    await new Promise((resolve) => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+}
+"""
 
-import html
 
 class Carbonizer:
-    def __init__(self, output_dir: Path, theme: str = "monokai"):
+    """Renders source snippets as window-framed images.
+
+    Highlighting is done up front with Pygments and the font is bundled, so
+    rendering needs no network. All snippets share one page: the code is
+    swapped into the DOM and the framed window is screenshotted, so N
+    images cost about one page load. With ``renderer="pillow"`` the same
+    window is drawn by ``raster.py`` instead and no browser is started.
+    Images are cropped to the window unless ``frame`` keeps the backdrop.
+    """
+
+    def __init__(self, output_dir: Path, theme: str = "monokai", browser: Optional[BrowserService] = None,
+                 renderer: str = "browser", frame: bool = False):
         self.output_dir = (output_dir / "code_visuals")
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.theme = theme  # monokai, dracula, nord, one-dark
+        self.theme = theme  # monokai, dracula, nord, one-dark (any Pygments style)
+        if renderer == "pillow" and importlib.util.find_spec("PIL") is None:
+            console.print("[yellow]Pillow not installed; rendering code snaps in the browser instead "
+                          "(pip install shipsight[images]).[/yellow]")
+            renderer = "browser"
+        self.renderer = renderer  # browser | pillow
+        self.frame = frame  # Screenshot the padded backdrop instead of just the window
+        # Borrow the run's shared browser when given; otherwise launch one lazily and close it in aclose()
+        self._owns_browser = browser is None
+        self.browser = browser or BrowserService()
+
+    async def aclose(self):
+        if self._owns_browser:
+            await self.browser.close()
+
+    async def carbonize(self, code: str, filename: str) -> Path:
+        """Render one snippet to ``code_visuals/<filename>`` (an image name such as ``app.py.png``).
+
+        The title bar and highlighting use the source name, i.e. ``filename``
+        without its ``.png`` suffix.
+        """
+        source = filename[:-len(".png")] if filename.endswith(".png") else filename
+        return (await self._render([(source, code, self.output_dir / filename)]))[0]
 
-    def _detect_language(self, filename: str) -> str:
-        """Detect programming language from filename."""
-        ext_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-            '.jsx': 'javascript',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.c': 'c',
-            '.rb': 'ruby',
-            '.php': 'php',
-            '.dart': 'dart',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-            '.html': 'html',
-            '.css': 'css',
-            '.json': 'json',
-            '.yaml': 'yaml',
-            '.yml': 'yaml',
-            '.md': 'markdown',
-            '.sh': 'bash',
-        }
-        for ext, lang in ext_map.items():
-            if filename.endswith(ext):
-                return lang
-        return 'plaintext'
+    async def carbonize_many(self, snippets: Dict[str, str]) -> List[Path]:
+        """Render every ``{source filename: code}`` snippet to ``code_visuals/<source filename>.png``
+        in a single page; returns the images written."""
+        return await self._render([(name, code, self.output_dir / f"{name}.png") for name, code in snippets.items()])
 
-    async def carbonize(self, code: str, filename: str):
-        """Render code as a beautiful image with syntax highlighting using Highlight.js."""
-        language = self._detect_language(filename)
-        
-        escaped_code = html.escape(code)
-        
-        html_template = f"""
+    async def _render(self, jobs: List[Tuple[str, str, Path]]) -> List[Path]:
+        """Render ``(source name, code, image path)`` jobs with the configured backend."""
+        written = []
+        if not jobs:
+            return written
+        if self.renderer == "pillow":
+            return await asyncio.to_thread(self._rasterize_many, jobs)
+        async with self.browser.page(viewport={'width': 1400, 'height': 1000}) as page:
+            # Everything is inline; refuse any request so a stray URL can never stall rendering
+            await page.route("**/*", lambda route: route.abort())
+            await page.set_content(self._page_template())
+            target = await page.query_selector('.frame' if self.frame else '.window')
+            for name, code, path in jobs:
+                await page.evaluate(SHOW_SNIPPET, [name, highlight_code(code, name)])
+                await target.screenshot(path=str(path), scale='device')
+                written.append(path)
+        return written
+
+    def _rasterize_many(self, jobs: List[Tuple[str, str, Path]]) -> List[Path]:
+        # Imported here so Pillow is only needed when this renderer is selected
+        from shipsight.capture.raster import render_code_png
+        return [render_code_png(code, name, path, self.theme, self.frame) for name, code, path in jobs]
+
+    def _page_template(self) -> str:
+        return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <meta charset="UTF-8">
-            <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/{self.theme}.min.css">
-            <script src="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js"></script>
             <style>
-                @import url('https://fonts.googleapis.com/css2?family=Fira+Code:wght@400;500;600&display=swap');
-                
+                {font_face_css()}
+                {theme_css(self.theme)}
+
                 body {{
                     margin: 0;
+                    font-family: {FONT_STACK};
+                }}
+                /* Backdrop, padding and shadow, same as raster.py draws; screenshotted with frame=True */
+                .frame {{
+                    display: inline-block;
                     padding: 60px;
                     background: linear-gradient(135deg, #667eea 0%, #764ba2 50%, #f093fb 100%);
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    min-height: 100vh;
-                    font-family: 'Fira Code', 'Courier New', monospace;
                 }}
                 .window {{
                     background: #1e1e1e;
                     border-radius: 16px;
-                    box-shadow: 
+                    box-shadow:
                         0 30px 90px rgba(0, 0, 0, 0.4),
                         0 0 0 1px rgba(255, 255, 255, 0.1);
                     overflow: hidden;
@@ -96,15 +136,15 @@ class Carbonizer:
                     border-radius: 50%;
                     box-shadow: inset 0 1px 2px rgba(0,0,0,0.3);
                 }}
-                .red {{ 
+                .red {{
                     background: linear-gradient(135deg, #ff6057 0%, #ff4136 100%);
                     border: 0.5px solid #d93025;
                 }}
-                .yellow {{ 
+                .yellow {{
                     background: linear-gradient(135deg, #ffbd2e 0%, #ffaa00 100%);
                     border: 0.5px solid #e69500;
                 }}
-                .green {{ 
+                .green {{
                     background: linear-gradient(135deg, #28ca42 0%, #20a034 100%);
                     border: 0.5px solid #1a8029;
                 }}
@@ -123,74 +163,41 @@ class Carbonizer:
                 }}
                 pre {{
                     margin: 0;
-                    font-family: 'Fira Code', 'Courier New', monospace;
+                    font-family: {FONT_STACK};
                     font-size: 15px;
                     line-height: 1.6;
                     font-weight: 400;
                 }}
                 code {{
-                    font-family: 'Fira Code', 'Courier New', monospace;
+                    font-family: {FONT_STACK};
+                    color: #f8f8f2;
                     text-shadow: 0 1px 2px rgba(0, 0, 0, 0.3);
                 }}
-                /* Enhanced syntax highlighting colors */
-                .hljs {{
-                    background: transparent !important;
-                    padding: 0 !important;
-                }}
-                .hljs-keyword,
-                .hljs-selector-tag,
-                .hljs-literal,
-                .hljs-section,
-                .hljs-link {{
+                /* Enhanced syntax highlighting weights (Pygments token classes) */
+                .code .k, .code .kd, .code .kn, .code .kr, .code .kc, .code .kt, .code .nt {{
                     font-weight: 600;
                 }}
-                .hljs-string,
-                .hljs-title,
-                .hljs-name,
-                .hljs-type,
-                .hljs-attribute,
-                .hljs-symbol,
-                .hljs-bullet,
-                .hljs-addition,
-                .hljs-variable,
-                .hljs-template-tag,
-                .hljs-template-variable {{
+                .code .s, .code .s1, .code .s2, .code .nf, .code .nc, .code .na, .code .nv, .code .nb {{
                     font-weight: 500;
                 }}
             </style>
         </head>
         <body>
-            <div class="window">
-                <div class="titlebar">
-                    <div class="dots">
-                        <div class="dot red"></div>
-                        <div class="dot yellow"></div>
-                        <div class="dot green"></div>
+            <div class="frame">
+                <div class="window">
+                    <div class="titlebar">
+                        <div class="dots">
+                            <div class="dot red"></div>
+                            <div class="dot yellow"></div>
+                            <div class="dot green"></div>
+                        </div>
+                        <div class="filename"></div>
+                    </div>
+                    <div class="code-container">
+                        <pre><code class="code"></code></pre>
                     </div>
-                    <div class="filename">{filename}</div>
-                </div>
-                <div class="code-container">
-                    <pre><code class="language-{language}">{escaped_code}</code></pre>
                 </div>
             </div>
-            <script>
-                hljs.highlightAll();
-            </script>
         </body>
         </html>
         """
-        
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page(viewport={'width': 1400, 'height': 1000})
-            await page.set_content(html_template)
-            
-            # Wait for Highlight.js to load and syntax highlighting to apply
-            await page.wait_for_timeout(500)
-            
-            # Screenshot the entire window
-            window = await page.query_selector('.window')
-            if window:
-                await window.screenshot(path=str(self.output_dir / filename), scale='device')
-            
-            await browser.close()
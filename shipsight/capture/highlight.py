@@ -0,0 +1,48 @@
+import base64
+from functools import lru_cache
+from pathlib import Path
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import TextLexer, get_lexer_for_filename
+from pygments.styles import get_style_by_name
+from pygments.util import ClassNotFound
+
+FONT_DIR = Path(__file__).parent / "fonts"
+# Bundled font first, then common installed monospace fonts; never fetched from the network
+FONT_FAMILY = "ShipSight Mono"
+FONT_STACK = f"'{FONT_FAMILY}', 'Fira Code', 'JetBrains Mono', 'Cascadia Code', Menlo, Consolas, 'DejaVu Sans Mono', monospace"
+DEFAULT_THEME = "monokai"
+
+
+def theme_style(theme: str) -> str:
+    """Pygments style for a Carbonizer theme (monokai, dracula, nord, one-dark, ...)."""
+    try:
+        get_style_by_name(theme)
+        return theme
+    except ClassNotFound:
+        return DEFAULT_THEME
+
+
+def highlight_code(code: str, filename: str) -> str:
+    """Syntax-highlighted HTML spans for ``code`` (no wrapper), lexer picked from the filename."""
+    try:
+        lexer = get_lexer_for_filename(filename, stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        lexer = TextLexer(stripnl=False, ensurenl=False)
+    return highlight(code, lexer, HtmlFormatter(nowrap=True))
+
+
+@lru_cache(maxsize=None)
+def theme_css(theme: str, selector: str = ".code") -> str:
+    return HtmlFormatter(style=theme_style(theme), nobackground=True).get_style_defs(selector)
+
+
+@lru_cache(maxsize=None)
+def font_face_css(font_dir: Path = FONT_DIR) -> str:
+    """``@font-face`` rules embedding the bundled fonts as data URLs."""
+    rules = []
+    for font in sorted(font_dir.glob("*.woff2")) if font_dir.is_dir() else []:
+        data = base64.b64encode(font.read_bytes()).decode("ascii")
+        rules.append(f"@font-face {{ font-family: '{FONT_FAMILY}'; font-display: block;"
+                     f" src: url(data:font/woff2;base64,{data}) format('woff2'); }}")
+    return "\n".join(rules)
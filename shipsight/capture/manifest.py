@@ -0,0 +1,149 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from shipsight.capture.routes import RouteCapture
+
+# Everything that decides what a full-page screenshot looks like: markup,
+# accessible stylesheet rules, which images loaded at what size, and the
+# page geometry. Hashed in Python.
+DOM_SNAPSHOT = """
+() => {
+    const css = Array.from(document.styleSheets).map((sheet) => {
+        try { return Array.from(sheet.cssRules).map((rule) => rule.cssText).join('\\n'); }
+        catch (e) { return sheet.href || ''; }  // Cross-origin sheet: its URL is all we can see
+    });
+    const images = Array.from(document.images).map((img) => `${img.currentSrc}:${img.naturalWidth}x${img.naturalHeight}`);
+    const root = document.documentElement;
+    return [root.outerHTML, css.join('\\n'), images.join('\\n'), window.innerWidth, root.scrollHeight].join('\\u0000');
+}
+"""
+
+HASH_SIZE = 16  # 16x16 difference hash = 256 bits
+# Difference hashes ignore overall brightness (a flat red and a flat blue page
+# hash the same), so mean grey levels must also be this close
+MEAN_TOLERANCE = 8
+
+
+def dom_hash(snapshot: str) -> str:
+    return hashlib.sha256(snapshot.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def perceptual_hash(path: Path) -> Optional[str]:
+    """Difference hash of an image as ``<width>x<height>:<mean grey>:<hex>``; None without Pillow or if unreadable.
+
+    Dimensions are part of the hash, so only same-sized screenshots can match.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(path) as image:
+            size = image.size
+            small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX)
+    except OSError:
+        return None  # Unreadable image: only byte-identical copies can match it
+    pixels = small.tobytes()
+    mean = sum(pixels) // len(pixels)
+    bits = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (HASH_SIZE + 1) + col + 1])
+    return f"{size[0]}x{size[1]}:{mean:02x}:{bits:0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+
+def hash_distance(a: Optional[str], b: Optional[str]) -> Optional[int]:
+    """Differing bits between two perceptual hashes; None if they cannot match (size, brightness) or one is missing."""
+    if not a or not b:
+        return None
+    size_a, mean_a, bits_a = a.split(":")
+    size_b, mean_b, bits_b = b.split(":")
+    if size_a != size_b or abs(int(mean_a, 16) - int(mean_b, 16)) > MEAN_TOLERANCE:
+        return None
+    return (int(bits_a, 16) ^ int(bits_b, 16)).bit_count()
+
+
+def find_duplicates(fingerprints: List[Tuple[str, Optional[str], str]], threshold: int) -> Dict[str, str]:
+    """Map each duplicate route to the first route (in the given order) it matches.
+
+    ``fingerprints`` are ``(route, perceptual_hash, file_hash)``. Screenshots
+    match when their files are identical or their perceptual hashes differ
+    by at most ``threshold`` bits.
+    """
+    duplicates: Dict[str, str] = {}
+    originals: List[Tuple[str, Optional[str], str]] = []
+    for route, phash, sha in fingerprints:
+        for original, original_phash, original_sha in originals:
+            distance = hash_distance(phash, original_phash)
+            if sha == original_sha or (distance is not None and distance <= threshold):
+                duplicates[route] = original
+                break
+        else:
+            originals.append((route, phash, sha))
+    return duplicates
+
+
+def change_report(results: List[RouteCapture]) -> Dict[str, object]:
+    """Which routes were re-rendered, reused from the last run, or collapsed as duplicates."""
+    return {
+        "changed": [r.route for r in results if r.change == "changed"],
+        "unchanged": [r.route for r in results if r.change == "unchanged"],
+        "duplicate": {r.route: r.duplicate_of for r in results if r.change == "duplicate"},
+    }
+
+
+class CaptureManifest:
+    """Per-route DOM and screenshot hashes from the previous run (``screenshots/manifest.json``).
+
+    A route may reuse its old image only while the recorded file is still
+    on disk with the same content.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        try:
+            self.entries = json.loads(path.read_text(encoding="utf-8")).get("routes", {})
+        except (OSError, ValueError, AttributeError):
+            pass  # No manifest yet (or unreadable): everything counts as changed
+
+    def reusable(self, route: str, dom: str, output_dir: Path) -> Optional[dict]:
+        entry = self.entries.get(route)
+        if not entry or entry.get("dom_hash") != dom:
+            return None
+        image = output_dir / entry.get("path", "")
+        if not image.is_file() or file_hash(image) != entry.get("sha256"):
+            return None
+        return entry
+
+    def record(self, route: str, dom: str, path: str, sha256: str, phash: Optional[str],
+               duplicate_of: Optional[str] = None):
+        self.entries[route] = {"dom_hash": dom, "path": path, "sha256": sha256, "phash": phash,
+                               "duplicate_of": duplicate_of}
+
+    def rehash(self, output_dir: Path, paths: List[str]):
+        """Record new file hashes after images were rewritten in place (e.g. by the optimizer)."""
+        changed = False
+        for entry in self.entries.values():
+            image = output_dir / entry.get("path", "")
+            if entry.get("path") in paths and image.is_file():
+                entry["sha256"] = file_hash(image)
+                changed = True
+        if changed:
+            self.save(list(self.entries))
+
+    def save(self, routes: List[str]):
+        # Routes no longer captured are dropped
+        entries = {route: self.entries[route] for route in routes if route in self.entries}
+        self.path.write_text(json.dumps({"version": 1, "routes": entries}, indent=2), encoding="utf-8")
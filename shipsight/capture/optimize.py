@@ -0,0 +1,197 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from rich.console import Console
+
+from shipsight.config import ImagesConfig
+
+console = Console()
+
+# Target sizes: (width, height). A height of None keeps the aspect ratio;
+# otherwise the image is cropped from the top to fill the box.
+PRESETS: Dict[str, Tuple[int, Optional[int]]] = {
+    "readme": (1280, None),      # Full width of a README at 2x
+    "linkedin": (1200, 627),     # LinkedIn link/post image
+    "thumbnail": (480, 270),
+}
+# Config name -> (Pillow format, extension, largest side the encoder accepts)
+FORMATS: Dict[str, Tuple[str, str, int]] = {
+    "webp": ("WEBP", ".webp", 16383),
+    "avif": ("AVIF", ".avif", 65535),
+    "jpeg": ("JPEG", ".jpg", 65500),
+    "png": ("PNG", ".png", 1 << 31),
+}
+OPTIMIZED_DIR = "optimized"
+
+
+class ImageResult(NamedTuple):
+    """What post-processing did to one image. Paths are relative to the output directory."""
+    source: str
+    bytes_before: int
+    bytes_after: int                   # The source PNG after lossless re-encoding
+    variants: Dict[str, dict] = {}     # "webp", "linkedin.webp", ... -> {"path", "bytes", "size"}
+    skipped: bool = False              # Every output was already newer than the source
+    error: str = ""
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+def _outputs(source: Path, output_dir: Path, formats: Sequence[str], presets: Sequence[str]) -> Dict[str, Path]:
+    """Variant name -> file for one source image (``optimized/<dir>/<stem>[.<preset>].<ext>``)."""
+    folder = output_dir / OPTIMIZED_DIR / source.parent.relative_to(output_dir)
+    preset_format = formats[0] if formats else "png"
+    outputs = {fmt: folder / f"{source.stem}{FORMATS[fmt][1]}" for fmt in formats}
+    for preset in presets:
+        outputs[f"{preset}.{preset_format}"] = folder / f"{source.stem}.{preset}{FORMATS[preset_format][1]}"
+    return outputs
+
+
+def _fit(image, width: int, height: Optional[int]):
+    from PIL import Image
+    if height is None:
+        if image.width <= width:
+            return image
+        return image.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS,
+                            reducing_gap=2.0)
+    # Cover the box: crop the source region first so tall pages are not resized whole
+    scale = max(width / image.width, height / image.height)
+    crop_w, crop_h = min(image.width, round(width / scale)), min(image.height, round(height / scale))
+    left = (image.width - crop_w) // 2
+    return image.resize((width, height), Image.Resampling.LANCZOS, box=(left, 0, left + crop_w, crop_h),
+                        reducing_gap=2.0)
+
+
+def _encode(image, fmt: str, path: Path, quality: int) -> dict:
+    from PIL import Image
+    pil_format, _, max_side = FORMATS[fmt]
+    if max(image.size) > max_side:
+        scale = max_side / max(image.size)
+        image = image.resize((int(image.width * scale), int(image.height * scale)), Image.Resampling.LANCZOS)
+    if fmt == "jpeg" and image.mode != "RGB":
+        flat = Image.new("RGB", image.size, "white")
+        flat.paste(image, mask=image.getchannel("A") if "A" in image.getbands() else None)
+        image = flat
+    options = {"optimize": True} if fmt == "png" else {"quality": quality}
+    if fmt == "jpeg":
+        options.update(optimize=True, progressive=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    image.save(tmp, pil_format, **options)
+    os.replace(tmp, path)
+    return {"bytes": path.stat().st_size, "size": list(image.size)}
+
+
+def optimize_image(source: str, output_dir: str, formats: Sequence[str], presets: Sequence[str],
+                   quality: int) -> ImageResult:
+    """Re-encode one PNG losslessly and write its variants, decoding it only once.
+
+    Runs in a worker process, so it takes and returns only plain data.
+    """
+    from PIL import Image
+    src, root = Path(source), Path(output_dir)
+    rel = src.relative_to(root).as_posix()
+    outputs = _outputs(src, root, formats, presets)
+    before = src.stat().st_size
+    try:
+        # Up to date when every output is newer than the source (e.g. an unchanged route)
+        if outputs and all(p.exists() and p.stat().st_mtime >= src.stat().st_mtime for p in outputs.values()):
+            return ImageResult(rel, before, before, {
+                name: {"path": p.relative_to(root).as_posix(), "bytes": p.stat().st_size}
+                for name, p in outputs.items()}, skipped=True)
+
+        with Image.open(src) as opened:
+            opened.load()
+            image = opened
+            if image.mode == "RGBA" and image.getextrema()[3][0] == 255:
+                image = image.convert("RGB")  # Opaque alpha: dropping it is lossless
+            elif image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+
+            after = before
+            if src.suffix.lower() == ".png":
+                buffer = io.BytesIO()
+                image.save(buffer, "PNG", optimize=True)
+                if buffer.tell() < before:  # Keep the original when re-encoding does not help
+                    tmp = src.with_name(f".{src.name}.tmp")
+                    tmp.write_bytes(buffer.getvalue())
+                    os.replace(tmp, src)
+                    after = buffer.tell()
+
+            variants = {}
+            for name, path in outputs.items():
+                preset, _, fmt = name.rpartition(".")
+                resized = _fit(image, *PRESETS[preset]) if preset else image
+                variants[name] = {"path": path.relative_to(root).as_posix(), **_encode(resized, fmt, path, quality)}
+        # Outputs are written after the source, so an unchanged source is skipped next run
+        return ImageResult(rel, before, after, variants)
+    except Exception as e:
+        return ImageResult(rel, before, src.stat().st_size, error=str(e) or type(e).__name__)
+
+
+def supported_formats(formats: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """Split configured formats into (encodable by this Pillow, unsupported)."""
+    from PIL import Image
+    Image.init()
+    usable, missing = [], []
+    for fmt in dict.fromkeys(formats):
+        (usable if fmt in FORMATS and FORMATS[fmt][0] in Image.SAVE else missing).append(fmt)
+    return usable, missing
+
+
+class ImageOptimizer:
+    """Post-processes captured screenshots and code snaps in a process pool.
+
+    Each source PNG is decoded once, re-encoded losslessly in place when that
+    is smaller, and exported as the configured formats and size presets
+    under ``optimized/``. Needs Pillow (``pip install shipsight[images]``).
+    """
+
+    def __init__(self, config: ImagesConfig, output_dir: Path):
+        self.config = config
+        self.output_dir = output_dir
+
+    async def optimize(self, paths: Sequence[Path]) -> Optional[dict]:
+        """Process ``paths`` and return the report for metadata.json (None when skipped)."""
+        sources = [p for p in dict.fromkeys(paths) if p.is_file()]
+        if not self.config.optimize or not sources:
+            return None
+        try:
+            formats, missing = supported_formats(self.config.formats)
+        except ImportError:
+            console.print("[dim]Pillow not installed; skipping image optimization (pip install shipsight[images]).[/dim]")
+            return None
+        if missing:
+            console.print(f"[yellow]Skipping image formats this Pillow cannot write: {', '.join(missing)}[/yellow]")
+        presets = [p for p in dict.fromkeys(self.config.presets) if p in PRESETS]
+
+        started = time.perf_counter()
+        args = [(str(p), str(self.output_dir), formats, presets, self.config.quality) for p in sources]
+        workers = max(1, min(self.config.workers or os.cpu_count() or 1, len(args)))
+        if workers == 1:
+            results = [await asyncio.to_thread(optimize_image, *a) for a in args]
+        else:
+            # Spawned workers: forking a process that runs the browser driver and HTTP threads is unsafe
+            loop = asyncio.get_running_loop()
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = await asyncio.gather(*(loop.run_in_executor(pool, optimize_image, *a) for a in args))
+
+        for result in results:
+            if result.error:
+                console.print(f"[yellow]Could not optimize {result.source}: {result.error}[/yellow]")
+        report = {
+            "files": [r.as_dict() for r in results],
+            "bytes_before": sum(r.bytes_before for r in results),
+            "bytes_after": sum(r.bytes_after for r in results),
+            "variant_bytes": sum(v["bytes"] for r in results for v in r.variants.values()),
+            "skipped_formats": missing,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        console.print(f"[dim]Images: {len(results)} optimized in {report['seconds']}s, "
+                      f"{report['bytes_before']:,} -> {report['bytes_after']:,} bytes.[/dim]")
+        return report
@@ -0,0 +1,163 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Tuple
+from pygments.lexers import TextLexer, get_lexer_for_filename
+from pygments.styles import get_style_by_name
+from pygments.util import ClassNotFound
+
+from shipsight.capture.highlight import FONT_DIR, theme_style
+
+try:
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+except ImportError as e:
+    raise ImportError("capture.code_renderer 'pillow' needs Pillow: pip install shipsight[images]") from e
+
+# Geometry and colours mirror the CSS window in carbon.py, at device scale 1
+PADDING = 60
+RADIUS = 16
+FONT_SIZE = 15
+LINE_HEIGHT = 24  # 15px * 1.6
+TITLE_FONT_SIZE = 13
+TITLEBAR_HEIGHT = 45  # 14px padding either side of the dots and filename
+CODE_PADDING = (32, 28)  # horizontal, vertical
+MIN_WIDTH, MAX_WIDTH = 600, 900
+TAB_SIZE = 8  # Browser default for <pre>
+
+BACKDROP = ["#667eea", "#764ba2", "#f093fb"]
+WINDOW = "#1e1e1e"
+TITLEBAR = ("#3c3c3c", "#2d2d2d")
+TITLE_BORDER = "#1a1a1a"
+TITLE_TEXT = "#a0a0a0"
+TEXT = "#f8f8f2"
+DOTS = [("#ff6057", "#d93025"), ("#ffbd2e", "#e69500"), ("#28ca42", "#1a8029")]
+SHADOW_OFFSET, SHADOW_BLUR, SHADOW_ALPHA = 30, 45, 102  # 0 30px 90px rgba(0,0,0,0.4)
+
+# Installed monospace fonts to try after the bundled one
+SYSTEM_FONTS = ["DejaVuSansMono.ttf", "Menlo.ttc", "consola.ttf", "LiberationMono-Regular.ttf"]
+
+Line = List[Tuple[str, str]]  # (text, colour) runs
+
+
+@lru_cache(maxsize=None)
+def load_font(size: int) -> ImageFont.ImageFont:
+    """Bundled Source Code Pro, else an installed monospace font, else Pillow's built-in font.
+
+    The bundled copy is a ``.ttf``: many FreeType builds cannot read the
+    ``.woff2`` the browser renderer embeds.
+    """
+    for candidate in [str(path) for path in sorted(FONT_DIR.glob("*.ttf"))] + SYSTEM_FONTS:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+
+def _hex(color: str) -> Tuple[int, int, int]:
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def tokenize(code: str, filename: str, theme: str) -> List[Line]:
+    """Split ``code`` into lines of coloured runs using the theme's Pygments style."""
+    try:
+        lexer = get_lexer_for_filename(filename, stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        lexer = TextLexer(stripnl=False, ensurenl=False)
+    style = get_style_by_name(theme_style(theme))
+    code = code.expandtabs(TAB_SIZE)
+    if code.endswith("\n"):  # <pre> drops one trailing newline too
+        code = code[:-1]
+    lines: List[Line] = [[]]
+    for ttype, value in lexer.get_tokens(code):
+        color = f"#{style.style_for_token(ttype)['color'] or TEXT.lstrip('#')}"
+        for i, part in enumerate(value.split("\n")):
+            if i:
+                lines.append([])
+            if part:
+                lines[-1].append((part, color))
+    return lines
+
+
+def _gradient(width: int, height: int) -> Image.Image:
+    """The 135deg three-stop backdrop; colour depends only on x + y."""
+    steps = width + height
+    stops = [_hex(c) for c in BACKDROP]
+    strip = []
+    for i in range(steps):
+        t = 2 * i / max(1, steps - 1)
+        a, b = (stops[0], stops[1]) if t <= 1 else (stops[1], stops[2])
+        t = t if t <= 1 else t - 1
+        strip.append(tuple(round(x + (y - x) * t) for x, y in zip(a, b)))
+    row = Image.new("RGB", (steps, 1))
+    row.putdata(strip)
+    return row.transform((width, height), Image.Transform.AFFINE, (1, 1, 0, 0, 0, 0))
+
+
+def _shadow(size: Tuple[int, int], box: Tuple[int, int, int, int]) -> Image.Image:
+    """Blurred drop-shadow alpha mask, blurred at quarter scale to keep it cheap."""
+    scale = 4
+    small = Image.new("L", (size[0] // scale + 1, size[1] // scale + 1), 0)
+    x0, y0, x1, y1 = (v // scale for v in box)
+    ImageDraw.Draw(small).rounded_rectangle((x0, y0, x1, y1), RADIUS // scale, fill=SHADOW_ALPHA)
+    small = small.filter(ImageFilter.GaussianBlur(SHADOW_BLUR / scale))
+    return small.resize(size, Image.Resampling.BILINEAR)
+
+
+def render_code_image(code: str, filename: str, theme: str = "monokai", frame: bool = False) -> Image.Image:
+    """Rasterize ``code`` in the macOS-style window, cropped to the window like the
+    browser's screenshot or, with ``frame``, on the whole gradient backdrop."""
+    font, title_font = load_font(FONT_SIZE), load_font(TITLE_FONT_SIZE)
+    lines = tokenize(code, filename, theme)
+    pad_x, pad_y = CODE_PADDING
+    text_width = max((font.getlength("".join(t for t, _ in line)) for line in lines), default=0)
+    win_w = int(min(MAX_WIDTH, max(MIN_WIDTH, text_width + 2 * pad_x)))
+    win_h = TITLEBAR_HEIGHT + 1 + 2 * pad_y + LINE_HEIGHT * len(lines)
+    size = (win_w + 2 * PADDING, win_h + 2 * PADDING)
+    box = (PADDING, PADDING, PADDING + win_w - 1, PADDING + win_h - 1)
+
+    canvas = _gradient(*size)
+    shadow_box = (box[0], box[1] + SHADOW_OFFSET, box[2], box[3] + SHADOW_OFFSET)
+    canvas.paste((0, 0, 0), (0, 0), _shadow(size, shadow_box))
+
+    # Window: titlebar gradient, border line and code body, clipped to the rounded outline
+    window = Image.new("RGB", (win_w, win_h), WINDOW)
+    draw = ImageDraw.Draw(window)
+    top, bottom = _hex(TITLEBAR[0]), _hex(TITLEBAR[1])
+    for y in range(TITLEBAR_HEIGHT):
+        t = y / (TITLEBAR_HEIGHT - 1)
+        draw.line((0, y, win_w, y), fill=tuple(round(a + (b - a) * t) for a, b in zip(top, bottom)))
+    draw.line((0, TITLEBAR_HEIGHT, win_w, TITLEBAR_HEIGHT), fill=TITLE_BORDER)
+
+    dot, gap, dot_y = 13, 8, (TITLEBAR_HEIGHT - 13) // 2
+    for i, (fill, outline) in enumerate(DOTS):
+        x = 20 + i * (dot + gap)
+        draw.ellipse((x, dot_y, x + dot, dot_y + dot), fill=fill, outline=outline)
+    # Filename is centred in the space right of the dots
+    left, right = 20 + 3 * dot + 2 * gap + 12, win_w - 20
+    draw.text(((left + right) / 2, TITLEBAR_HEIGHT / 2), filename, font=title_font, fill=TITLE_TEXT, anchor="mm")
+
+    y = TITLEBAR_HEIGHT + 1 + pad_y + LINE_HEIGHT / 2
+    for line in lines:
+        x = pad_x
+        for text, color in line:
+            draw.text((x, y), text, font=font, fill=color, anchor="lm")
+            x += font.getlength(text)
+            if x > win_w:  # Long lines are clipped like the overflowing <pre>
+                break
+        y += LINE_HEIGHT
+
+    mask = Image.new("L", (win_w, win_h), 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, win_w - 1, win_h - 1), RADIUS, fill=255)
+    canvas.paste(window, box[:2], mask)
+    # 1px rgba(255,255,255,0.1) ring around the window
+    ring = Image.new("RGBA", size, (0, 0, 0, 0))
+    ImageDraw.Draw(ring).rounded_rectangle((box[0] - 1, box[1] - 1, box[2] + 1, box[3] + 1), RADIUS + 1,
+                                           outline=(255, 255, 255, 26))
+    canvas.paste(ring, (0, 0), ring)
+    return canvas if frame else canvas.crop((box[0], box[1], box[2] + 1, box[3] + 1))
+
+
+def render_code_png(code: str, filename: str, path: Path, theme: str = "monokai", frame: bool = False) -> Path:
+    render_code_image(code, filename, theme, frame).save(path, "PNG")
+    return path
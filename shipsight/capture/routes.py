@@ -0,0 +1,57 @@
+import hashlib
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+
+class RouteCapture(NamedTuple):
+    """Outcome of capturing one route.
+
+    ``status`` is ``ok``, ``partial`` (the page misbehaved but a screenshot of
+    whatever rendered was saved) or ``failed`` (nothing saved).
+    """
+    route: str
+    url: str
+    path: Optional[str]                # Screenshot written, relative to the output directory
+    status: str
+    http_status: Optional[int] = None
+    error: str = ""
+    timings: Dict[str, float] = {}
+    stable: Optional[bool] = None      # Page settled before the stability cap (None if never checked)
+    change: str = ""                   # changed, unchanged or duplicate (incremental capture only)
+    duplicate_of: Optional[str] = None # Route whose screenshot this one shares
+
+    @property
+    def partial(self) -> bool:
+        return self.status == "partial"
+
+    def as_dict(self) -> dict:
+        return {**self._asdict(), "partial": self.partial}
+
+
+def route_url(base_url: str, route: str) -> str:
+    return f"{base_url.rstrip('/')}/{route.lstrip('/')}"
+
+
+def route_filenames(routes: Sequence[str]) -> Dict[str, str]:
+    """Stable screenshot file stem per route: ``/`` -> ``index``, ``/docs/api`` -> ``docs_api``.
+
+    Characters that are unsafe in filenames become ``_``. Routes that would
+    still collide (``/a/b`` and ``/a_b``) get a short hash of the route, so
+    names never depend on capture order.
+    """
+    stems = {}
+    for route in routes:
+        stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", route.replace("/", "_")).strip("_.") or "index"
+        stems[route] = stem[:120]
+    counts: Dict[str, int] = {}
+    for stem in stems.values():
+        counts[stem] = counts.get(stem, 0) + 1
+    for route, stem in stems.items():
+        if counts[stem] > 1:
+            stems[route] = f"{stem}-{hashlib.sha1(route.encode('utf-8')).hexdigest()[:8]}"
+    return stems
+
+
+def summarize(results: List[RouteCapture]) -> str:
+    counts = {status: sum(r.status == status for r in results) for status in ("ok", "partial", "failed")}
+    return ", ".join(f"{n} {status}" for status, n in counts.items() if n)
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from typing import Dict, NamedTuple
+from playwright.async_api import Error as PlaywrightError
+
+# Requests that never "finish" and must not hold up network idle
+BACKGROUND_TYPES = {"websocket", "eventsource"}
+# In flight longer than this, a request is treated as long-polling and ignored
+LONG_POLL_S = 3.0
+
+# Records the time of the last DOM mutation, starting from the end of the load event
+WATCH_MUTATIONS = """
+() => {
+    if (window.__shipsightLastMutation !== undefined) return;
+    const nav = performance.getEntriesByType('navigation')[0];
+    window.__shipsightLastMutation = nav && nav.loadEventEnd ? nav.loadEventEnd : performance.now();
+    new MutationObserver(() => { window.__shipsightLastMutation = performance.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+"""
+
+MUTATION_IDLE_MS = "() => performance.now() - window.__shipsightLastMutation"
+
+# Walk the page a viewport at a time (bigger steps on very long pages) so
+# lazy images and reveal-on-scroll content see an intersection. Steps only
+# linger when an IntersectionObserver saw new lazy targets come into view.
+TRIGGER_LAZY = """
+async ({maxSteps, timeoutMs}) => {
+    const deadline = performance.now() + timeoutMs;
+    const frame = () => new Promise((r) => requestAnimationFrame(() => requestAnimationFrame(r)));
+    const selector = 'img, iframe, video, [data-src], [data-srcset], [data-bg], [data-background]';
+    const seen = new Set();
+    let fresh = 0;
+    const io = new IntersectionObserver((entries) => {
+        for (const e of entries) {
+            if (e.isIntersecting && !seen.has(e.target)) { seen.add(e.target); fresh++; }
+        }
+    });
+    const targets = document.querySelectorAll(selector);
+    targets.forEach((el) => io.observe(el));
+    const viewport = window.innerHeight || 720;
+    let steps = 0;
+    let y = 0;
+    while (steps < maxSteps && performance.now() < deadline) {
+        const height = document.documentElement.scrollHeight;
+        if (y + viewport >= height) break;
+        y += Math.max(viewport, Math.ceil(height / maxSteps));
+        window.scrollTo(0, y);
+        steps++;
+        await frame();
+        if (fresh) { fresh = 0; await new Promise((r) => setTimeout(r, 50)); }
+    }
+    io.disconnect();
+    if (steps) { window.scrollTo(0, 0); await frame(); }
+    return {steps, targets: targets.length, height: document.documentElement.scrollHeight};
+}
+"""
+
+# Every image loaded (or failed) and decoded, and web fonts ready
+AWAIT_MEDIA = """
+async (timeoutMs) => {
+    const settle = (img) => img.decode().catch(() => {});
+    const pending = Array.from(document.images).map((img) => img.complete ? settle(img) : new Promise((r) => {
+        img.addEventListener('load', r, {once: true});
+        img.addEventListener('error', r, {once: true});
+    }).then(() => settle(img)));
+    const done = Promise.all([...pending, document.fonts.ready]).then(() => true);
+    return Promise.race([done, new Promise((r) => setTimeout(() => r(false), timeoutMs))]);
+}
+"""
+
+
+class StabilityReport(NamedTuple):
+    stable: bool                       # False when the per-route cap ran out first
+    seconds: float
+    scroll_steps: int = 0
+    lazy_targets: int = 0
+    requests: int = 0
+
+
+class NetworkTracker:
+    """Counts a page's in-flight requests and when the network last changed.
+
+    Attach before navigating so requests made during load are seen.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.inflight: Dict[object, float] = {}
+        self.requests = 0
+        self.last_activity = time.perf_counter()
+        self._handlers = {"request": self._started, "requestfinished": self._done, "requestfailed": self._done}
+        for event, handler in self._handlers.items():
+            page.on(event, handler)
+
+    def detach(self):
+        for event, handler in self._handlers.items():
+            self.page.remove_listener(event, handler)
+
+    def _started(self, request):
+        if request.resource_type in BACKGROUND_TYPES:
+            return
+        self.inflight[request] = self.last_activity = time.perf_counter()
+        self.requests += 1
+
+    def _done(self, request):
+        if self.inflight.pop(request, None) is not None:
+            self.last_activity = time.perf_counter()
+
+    def busy(self) -> int:
+        now = time.perf_counter()
+        return sum(now - started < LONG_POLL_S for started in self.inflight.values())
+
+    def idle_for(self) -> float:
+        """Seconds the network has been quiet; 0 while requests are in flight."""
+        return 0.0 if self.busy() else time.perf_counter() - self.last_activity
+
+    async def wait_idle(self, quiet_s: float, deadline: float) -> bool:
+        while True:
+            idle = self.idle_for()
+            if idle >= quiet_s:
+                return True
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(remaining, max(0.02, quiet_s - idle)))
+
+
+async def wait_for_stability(page, network: NetworkTracker, timeout: float = 10.0, quiet_ms: int = 250,
+                             max_scroll_steps: int = 30) -> StabilityReport:
+    """Wait until the page has settled, or ``timeout`` seconds have passed.
+
+    Settled means lazy content was scrolled into view, images are decoded,
+    fonts are ready, and neither the DOM nor the network changed for
+    ``quiet_ms``. A page that was already quiet returns in milliseconds.
+    """
+    started = time.perf_counter()
+    deadline = started + timeout
+    def remaining_ms() -> int:
+        return max(0, int((deadline - time.perf_counter()) * 1000))
+    quiet_s = quiet_ms / 1000
+    scroll: dict = {}
+    stable = False
+    try:
+        await page.evaluate(WATCH_MUTATIONS)
+        scroll = await page.evaluate(TRIGGER_LAZY, {"maxSteps": max(1, max_scroll_steps), "timeoutMs": remaining_ms()})
+        media_ready = await page.evaluate(AWAIT_MEDIA, remaining_ms())
+        while media_ready and await network.wait_idle(quiet_s, deadline):
+            dom_idle = await page.evaluate(MUTATION_IDLE_MS) / 1000
+            if dom_idle >= quiet_s:
+                stable = True
+                break
+            if time.perf_counter() + quiet_s - dom_idle > deadline:
+                break
+            await asyncio.sleep(quiet_s - dom_idle)
+    except PlaywrightError:
+        pass  # Navigated away mid-check (client-side redirect); screenshot what is there
+    return StabilityReport(stable, round(time.perf_counter() - started, 3), scroll.get("steps", 0),
+                           scroll.get("targets", 0), network.requests)
@@ -1,17 +1,26 @@
 import asyncio
+import contextlib
 import click
 from pathlib import Path
 from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 from rich.prompt import Confirm
+from rich.table import Table
 from shipsight.config import load_config, get_global_config_path
 from shipsight.engine.orchestrator import Orchestrator
 from shipsight.engine.discovery import ConfigDiscovery
+from shipsight.capture.browser import BrowserService
 from shipsight.capture.capture import CaptureEngine
 from shipsight.capture.crawler import Crawler
+from shipsight.ai.context import context_budget, token_counter
 from shipsight.ai.intelligence import IntelligenceEngine
 from shipsight.ai.narrative import NarrativeGenerator
+from shipsight.ai.usage import GROUPS, UsageIndex
 from shipsight.artifacts import ArtifactManager
+from shipsight.pipeline import Pipeline, StageFailed
 from shipsight.capture.carbon import Carbonizer
+from shipsight.capture.manifest import CaptureManifest, change_report
+from shipsight.capture.optimize import ImageOptimizer
 import yaml
 
 console = Console()
@@ -59,7 +68,9 @@ def auth(openai, anthropic, groq):
 @click.argument('path', default='.')
 @click.option('--config', '-c', default='shipsight.yml', help='Path to config file.')
 @click.option('--static', is_flag=True, help='Skip execution and only generate code snaps/narratives.')
-def run(path, config, static):
+@click.option('--no-cache', is_flag=True, help='Bypass the LLM response cache.')
+@click.option('--refresh', is_flag=True, help='Regenerate narratives and update the LLM response cache.')
+def run(path, config, static, no_cache, refresh):
     """Run ShipSight on a project."""
     project_path = Path(path)
     config_file = project_path / config
@@ -71,9 +82,52 @@ def run(path, config, static):
         discovery.write_suggestion(suggestion, config_file)
         console.print(f"[green]Created default {config}. Continuing run...[/green]")
 
-    asyncio.run(_run_flow(project_path, Path(config), static))
+    cache_mode = "off" if no_cache else "refresh" if refresh else "use"
+    asyncio.run(_run_flow(project_path, Path(config), static, cache_mode))
 
-async def _run_flow(project_path: Path, config_path: Path, static: bool = False):
+@main.command()
+@click.option('--by', 'group_by', default='provider,model', help=f"Comma-separated grouping ({', '.join(GROUPS)}).")
+@click.option('--since', help='Only include usage on or after this date (YYYY-MM-DD).')
+@click.option('--project', help='Only include one project.')
+def usage(group_by, since, project):
+    """Summarize LLM tokens, cost, latency and cache hits."""
+    by = [g.strip() for g in group_by.split(",") if g.strip()]
+    index = UsageIndex()
+    try:
+        added = index.refresh()
+        rows = index.report(by, since=since, project=project)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--by")
+    finally:
+        index.close()
+    if added:
+        console.print(f"[dim]Indexed {added} new usage records.[/dim]")
+    if not rows:
+        console.print("[yellow]No LLM usage recorded yet.[/yellow]")
+        return
+
+    table = Table(title="LLM usage")
+    for column in by:
+        table.add_column(column.title())
+    for column in ("Calls", "Prompt", "Completion", "Cost ($)", "Cache hits", "TTFT p50/p95", "Latency p50/p95"):
+        table.add_column(column, justify="right")
+    def seconds(low, high):
+        return f"{low}s / {high}s" if low is not None else "-"
+    for row in rows:
+        hit_rate = f"{row['cache_hit_rate']:.0%}" if row["cache_hit_rate"] is not None else "-"
+        prompt = f"{row['prompt_tokens']:,}" + (f" ({row['cached_tokens']:,} cached)" if row["cached_tokens"] else "")
+        table.add_row(*(str(row[g]) for g in by), str(row["calls"]), prompt,
+                      f"{row['completion_tokens']:,}", f"{row['cost']:.4f}", hit_rate,
+                      seconds(row["ttft_p50"], row["ttft_p95"]), seconds(row["latency_p50"], row["latency_p95"]))
+    console.print(table)
+    console.print("[dim]Costs are estimates from list prices.[/dim]")
+
+NARRATIVE_FILES = {"readme": "README.generated.md", "linkedin": "linkedin.post.md"}
+
+class ServerStartError(Exception):
+    """The project could not be started, so nothing can be captured."""
+
+async def _run_flow(project_path: Path, config_path: Path, static: bool = False, cache_mode: str = "use"):
     console.print(f"[bold blue]ShipSight: Analyzing project at {project_path}[/bold blue]")
     
     # 1. Load Config
@@ -83,55 +137,192 @@ async def _run_flow(project_path: Path, config_path: Path, static: bool = False)
     
     output_dir = project_path / cfg.output.path
     artifact_manager = ArtifactManager(output_dir)
-    
-    # 2. Intelligence Layer
-    intel = IntelligenceEngine(project_path)
-    analysis = intel.analyze_stack()
-    heroes = intel.get_hero_code()
-    artifact_manager.save_json("metadata.json", {**analysis, "heroes": list(heroes.keys())})
-    context = intel.get_summary_context(analysis, heroes)
+    intel = IntelligenceEngine.with_cache(project_path)
+    orchestrator = Orchestrator(project_path, cfg)
+    narrative = NarrativeGenerator(cfg.ai, project_name=project_path.name, cache_mode=cache_mode)
+    # One headless Chromium for the run, launched on first use by capture or code snaps
+    browser = BrowserService()
+    carbon = Carbonizer(output_dir, browser=browser, renderer=cfg.capture.code_renderer,
+                        frame=cfg.capture.code_frame)
+    pipeline = Pipeline(cfg.run.concurrency)
+
+    # Load the local model while the project boots and capture runs
+    async def preload():
+        result = await narrative.preload()
+        if result and "error" in result:
+            console.print(f"[yellow]Could not preload Ollama model {result['model']}: {result['error']}[/yellow]")
+        elif result:
+            console.print(f"[dim]Ollama model {result['model']} loaded in {result['load_s']}s "
+                          f"(kept alive {result['keep_alive']}).[/dim]")
+        return result
+    pipeline.add("preload", preload)
+
+    # 2. Intelligence Layer (runs while the project boots)
+    def analyze():
+        analysis = intel.analyze_stack()
+        heroes = intel.get_hero_code()
+        intel.save_cache()
+        intel.analyze_workspaces(analysis)
+        if analysis.get("workspaces"):
+            console.print(f"[blue]Analyzed {len(analysis['workspaces'])} workspaces in parallel.[/blue]")
+        stats = intel.cache.stats
+        console.print(
+            f"[dim]Scan cache: {stats['dir_hits']} dirs and {stats['file_hits']} files reused, "
+            f"{stats['dir_misses']} dirs and {stats['file_misses']} files rescanned.[/dim]"
+        )
+        budget = context_budget(cfg.ai.provider, cfg.ai.model, cfg.ai.context_tokens)
+        context = intel.get_summary_context(analysis, heroes, budget, token_counter(cfg.ai.model))
+        report = intel.context_report
+        console.print(f"[dim]Context: {report['used']}/{report['budget']} tokens.[/dim]")
+        return {"analysis": analysis, "heroes": heroes, "context": context}
+    pipeline.add("analyze", analyze, resource="cpu")
 
     # 3. Execution Engine
-    orchestrator = Orchestrator(project_path, cfg)
-    if orchestrator.start():
-        try:
-            # 4. Use dynamically detected URL (fixes IPv6/localhost issues)
-            base_url = orchestrator.detected_url or f"http://localhost:{orchestrator.detected_port or cfg.run.port or 3000}"
-            
-            if not orchestrator.is_script and not orchestrator.is_static:
-                console.print(f"[blue]Using base URL: {base_url}[/blue]")
-                
-                # Auto-discovery if routes are default
-                if cfg.capture.routes == ["/"]:
-                    crawler = Crawler(base_url)
-                    cfg.capture.routes = await crawler.discover_routes()
-                    console.print(f"[blue]Discovered routes: {cfg.capture.routes}[/blue]")
-
-                capture = CaptureEngine(cfg, output_dir)
-                await capture.capture_screenshots(base_url)
-            else:
-                mode_name = "Static" if orchestrator.is_static else "Script"
-                console.print(f"[yellow]{mode_name} Mode detected. Skipping web capture steps.[/yellow]")
-            
-            # 5. Narrative Generation
-            narrative = NarrativeGenerator(cfg.ai, project_name=project_path.name)
-            dna = analysis.get("dna", "GENERAL_SOFTWARE")
-            readme = await narrative.generate_readme(context, dna=dna, heroes=heroes)
-            linkedin = await narrative.generate_linkedin_post(context, dna=dna)
-            
-            # 6. Code Carbonization (Visual Proof)
-            carbon = Carbonizer(output_dir)
-            for file, code in heroes.items():
-                await carbon.carbonize(code, f"{file}.png")
-            
-            artifact_manager.save_markdown("README.generated.md", readme)
-            artifact_manager.save_markdown("linkedin.post.md", linkedin)
-            
-            console.print("[bold green]ShipSight process complete![/bold green]")
-            console.print(f"Artifacts available in {output_dir}")
+    def server():
+        if not orchestrator.start():
+            raise ServerStartError("Execution Engine failed to start project.")
+        # Use dynamically detected URL (fixes IPv6/localhost issues)
+        return orchestrator.detected_url or f"http://localhost:{orchestrator.detected_port or cfg.run.port or 3000}"
+    pipeline.add("server", server, resource="process")
 
+    # 4. Visual capture
+    async def capture(server):
+        if orchestrator.is_script or orchestrator.is_static:
+            mode_name = "Static" if orchestrator.is_static else "Script"
+            console.print(f"[yellow]{mode_name} Mode detected. Skipping web capture steps.[/yellow]")
+            return
+        console.print(f"[blue]Using base URL: {server}[/blue]")
+
+        # Auto-discovery if routes are default
+        if cfg.capture.routes == ["/"]:
+            crawler = Crawler(server)
+            cfg.capture.routes = await crawler.discover_routes()
+            console.print(f"[blue]Discovered routes: {cfg.capture.routes}[/blue]")
+
+        return await CaptureEngine(cfg, output_dir, browser=browser).capture_screenshots(server)
+    pipeline.add("capture", capture, deps=["server"], resource="browser")
+
+    # 5. Narrative Generation (overlaps with capture; waits for the server so
+    #    a failed start does not pay for prompts the static re-run repeats)
+    #    Tokens are written into the artifacts as they stream in.
+    progress = Progress(SpinnerColumn(), TextColumn("{task.description}"),
+                        TextColumn("[dim]{task.fields[chars]} chars"), TimeElapsedColumn(), console=console)
+    def narrative_stage(formats):
+        async def stage(analyze, server):
+            streams, tasks, finished = {}, {}, set()
+            def sink_for(fmt):
+                filename = NARRATIVE_FILES[fmt]
+                tasks[fmt] = progress.add_task(f"Writing {filename}", total=None, chars=0)
+                def sink(text):
+                    # Opened on the first token; the previous artifact is only replaced on close()
+                    if fmt not in streams:
+                        streams[fmt] = artifact_manager.stream_markdown(filename)
+                    streams[fmt].write(text)
+                    progress.update(tasks[fmt], chars=streams[fmt].chars)
+                return sink
+            sinks = {fmt: sink_for(fmt) for fmt in formats}
+            progress.start()
+            try:
+                dna = analyze["analysis"].get("dna", "GENERAL_SOFTWARE")
+                texts = await narrative.generate_all(analyze["context"], formats, dna=dna, sinks=sinks)
+                for fmt, text in texts.items():
+                    stream = streams.get(fmt)
+                    if stream is None or stream.chars != len(text):
+                        stream = streams.setdefault(fmt, artifact_manager.stream_markdown(NARRATIVE_FILES[fmt]))
+                        stream.replace(text) # Non-streamed or re-assembled result
+                    stream.close()
+                    finished.add(fmt)
+                return texts
+            except Exception:
+                for fmt, stream in streams.items():
+                    if fmt not in finished:
+                        stream.discard() # Never leave a truncated artifact behind
+                raise
+            finally:
+                for fmt, task in tasks.items():
+                    progress.update(task, chars=streams[fmt].chars if fmt in streams else 0, completed=1, total=1)
+        return stage
+    # With ai.combined, every format comes from one call that sends the context once
+    formats = [f for f in cfg.output.formats if f in NARRATIVE_FILES]
+    for group in ([formats] if cfg.ai.combined and formats else [[f] for f in formats]):
+        pipeline.add("narratives" if len(group) > 1 else group[0], narrative_stage(group),
+                     deps=["analyze", "server"], resource="llm")
+
+    # 6. Code Carbonization (Visual Proof)
+    async def carbonize(analyze, server):
+        # All snippets render in one page (or in-process with Pillow), one after another
+        async with pipeline.slot("cpu" if carbon.renderer == "pillow" else "browser"):
+            return await carbon.carbonize_many(analyze["heroes"])
+    pipeline.add("carbon", carbonize, deps=["analyze", "server"])
+
+    # 7. Image optimization: lossless PNGs plus web formats and size presets, in worker processes.
+    #    Screenshots are optional: code snaps still get optimized when capture failed or was skipped.
+    async def optimize_images(carbon, capture):
+        shots = [output_dir / c.path for c in capture or [] if c.path and c.change != "duplicate"]
+        report = await ImageOptimizer(cfg.images, output_dir).optimize(shots + list(carbon or []))
+        if report and cfg.capture.incremental:
+            # Optimized screenshots were rewritten in place; keep the capture manifest's hashes valid
+            rewritten = [f["source"] for f in report["files"] if f["bytes_after"] != f["bytes_before"]]
+            CaptureManifest(output_dir / "screenshots" / "manifest.json").rehash(output_dir, rewritten)
+        return report
+    pipeline.add("images", optimize_images, deps=["carbon"], optional=["capture"], resource="cpu")
+
+    # Prompts (busy port, Docker fallback) must not run under the live progress display
+    @contextlib.contextmanager
+    def paused_progress():
+        running = progress.live.is_started
+        if running:
+            progress.stop()
+        try:
+            yield
         finally:
-            orchestrator.stop()
+            if running:
+                progress.start()
+    orchestrator.interactive = paused_progress
+    orchestrator.prepare()  # Questions answerable up front are asked before any stage prints
+
+    try:
+        await pipeline.run()
+    finally:
+        progress.stop()
+        orchestrator.stop()
+        await narrative.aclose()
+        await browser.close()
+    pipeline.timings["browser"] = dict(browser.stats)
+
+    if narrative.cache is not None:
+        cache_stats = narrative.cache.stats
+        console.print(f"[dim]LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses.[/dim]")
+    for name, error in pipeline.errors.items():
+        if not isinstance(error, (StageFailed, ServerStartError)):
+            console.print(f"[red]Stage '{name}' failed: {error}[/red]")
+    console.print(
+        f"[dim]Stages finished in {pipeline.timings['total']['seconds']}s "
+        f"(critical path: {' -> '.join(pipeline.critical_path())}).[/dim]"
+    )
+    if browser.stats["launches"]:
+        console.print(f"[dim]Headless browser: launched in {browser.stats['launch_s']}s, "
+                      f"{browser.stats['contexts']} contexts.[/dim]")
+
+    if not pipeline.failed("analyze"):
+        result = pipeline.result("analyze")
+        preloaded = pipeline.results.get("preload")
+        captures = pipeline.results.get("capture")
+        artifact_manager.save_json("metadata.json", {
+            **result["analysis"],
+            "heroes": list(result["heroes"].keys()),
+            "context": intel.context_report,
+            "timings": pipeline.timings,
+            **({"narratives": narrative.combined_report} if narrative.combined_report else {}),
+            **({"model_preload": preloaded} if preloaded else {}),
+            **({"captures": [c.as_dict() for c in captures]} if captures else {}),
+            **({"capture_changes": change_report(captures)} if captures and cfg.capture.incremental else {}),
+            **({"images": pipeline.results["images"]} if pipeline.results.get("images") else {}),
+        })
+
+    if not pipeline.failed("server"):
+        console.print("[bold green]ShipSight process complete![/bold green]")
+        console.print(f"Artifacts available in {output_dir}")
     else:
         console.print("[bold red]Execution Engine failed to start project.[/bold red]")
         
@@ -144,7 +335,7 @@ async def _run_flow(project_path: Path, config_path: Path, static: bool = False)
         # Fallback Prompt
         if not static:
             if Confirm.ask("[yellow]Would you like to try running in Static Mode (analysis only)?[/yellow]", default=True):
-                await _run_flow(project_path, config_path, static=True)
+                await _run_flow(project_path, config_path, static=True, cache_mode=cache_mode)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,7 @@
 import yaml
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 from dotenv import load_dotenv
 
 load_dotenv() # Load from .env if it exists
@@ -10,29 +10,73 @@ class RunConfig(BaseModel):
     strategy: str = "local" # local, docker, or static
     port: Optional[int] = None
     command: Optional[str] = None
+    concurrency: Dict[str, int] = Field(default_factory=dict) # Per-resource stage limits (cpu, process, browser, llm)
 
 class CaptureConfig(BaseModel):
     routes: List[str] = Field(default_factory=lambda: ["/"])
     auth_enabled: bool = False
     viewport: dict = {"width": 1280, "height": 720}
+    pages: int = 4 # Routes captured concurrently (pages in one browser)
+    navigation_timeout: float = 60.0
+    stability_timeout: float = 10.0 # Per-route cap on waiting for the page to settle
+    quiet_ms: int = 250 # DOM and network must be quiet this long before the screenshot
+    max_scroll_steps: int = 30 # Viewport-sized scroll steps for lazy content; longer pages take bigger steps
+    incremental: bool = True # Reuse screenshots of routes whose DOM is unchanged since the last run
+    duplicate_threshold: int = 6 # Differing bits (of 256) for two screenshots to count as duplicates
+    code_renderer: str = "browser" # browser | pillow (code snaps without Chromium)
+    code_frame: bool = False # Include the gradient backdrop around code snaps, not just the window
 
 class OutputConfig(BaseModel):
     anonymize: bool = False
     formats: List[str] = ["readme", "linkedin"]
     path: str = "shipsight_output"
 
+class HTTPConfig(BaseModel):
+    http2: bool = True # Used when the optional h2 package is installed
+    max_connections: int = 10
+    max_keepalive_connections: int = 5
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 60.0 # Idle time allowed between streamed chunks
+    first_token_timeout: float = 300.0 # Prompt processing on slow local models
+
 class AIConfig(BaseModel):
     provider: str = "ollama" # ollama, openai, anthropic, or groq
     model: str = "llama-3.1-8b-instant"
     openai_api_key: Optional[str] = Field(default=None, env="OPENAI_API_KEY")
     anthropic_api_key: Optional[str] = Field(default=None, env="ANTHROPIC_API_KEY")
     groq_api_key: Optional[str] = Field(default=None, env="GROQ_API_KEY")
+    context_tokens: Optional[int] = None # Project context budget; defaults per provider
+    endpoints: Dict[str, str] = Field(default_factory=dict) # Provider base URL overrides
+    http: HTTPConfig = Field(default_factory=HTTPConfig)
+    stream: bool = True # Stream tokens into the artifacts as they are generated
+    combined: bool = True # One call for every output format, sharing the project context
+    preload: bool = True # Load the Ollama model in the background as the run starts
+    keep_alive: Optional[Union[int, str]] = "30m" # How long Ollama keeps the model loaded (-1 = until unloaded)
+    requests_per_minute: Optional[int] = None # Provider rate limits; defaults per provider
+    tokens_per_minute: Optional[int] = None
+    max_retries: int = 4 # Retries on 429/5xx with jittered exponential backoff
+    cache: bool = True # Reuse responses for identical prompts (~/.shipsight/llm_cache.sqlite3)
+    cache_max_mb: int = 64
+    cache_max_age_days: float = 30
+    providers: List[str] = Field(default_factory=list) # Fallback order after `provider`, e.g. [groq, openai]
+    models: Dict[str, str] = Field(default_factory=dict) # Model per fallback provider; defaults per provider
+    hedge_percentile: float = 0.95 # Hedge to the next provider when the first token is slower than this
+    hedge_after_s: float = 10.0 # Hedge delay until enough latency samples exist
+
+class ImagesConfig(BaseModel):
+    optimize: bool = True # Post-process screenshots and code snaps (needs Pillow: shipsight[images])
+    formats: List[str] = ["webp"] # Variants next to each PNG: webp, avif, jpeg
+    presets: List[str] = ["readme", "linkedin", "thumbnail"] # Resized copies, in the first format
+    quality: int = 80 # Lossy quality for webp/avif/jpeg
+    workers: Optional[int] = None # Processes; defaults to the CPU count
 
 class ShipSightConfig(BaseModel):
     run: RunConfig = Field(default_factory=RunConfig)
     capture: CaptureConfig = Field(default_factory=CaptureConfig)
     output: OutputConfig = Field(default_factory=OutputConfig)
     ai: AIConfig = Field(default_factory=AIConfig)
+    images: ImagesConfig = Field(default_factory=ImagesConfig)
 
 def get_global_config_path() -> Path:
     return Path.home() / ".shipsight" / "config.yml"
@@ -51,7 +95,7 @@ def load_config(local_path: Path) -> ShipSightConfig:
         with open(local_path, "r") as f:
             local_data = yaml.safe_load(f) or {}
             # Deep merge simple dicts
-            for key in ["run", "capture", "output", "ai"]:
+            for key in ["run", "capture", "output", "ai", "images"]:
                 if key in local_data:
                     if key not in config_data:
                         config_data[key] = {}
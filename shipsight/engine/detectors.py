@@ -0,0 +1,262 @@
+import json
+import os
+import re
+import threading
+import tomllib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+
+class Detection(NamedTuple):
+    """What one detector found. Empty ``command`` means it has no run hint."""
+    frameworks: Tuple[str, ...]
+    command: str = ""
+    port: int = 0
+    strategy: str = "local"
+
+
+class StackProfile(NamedTuple):
+    stack: str              # Primary local stack: node, python, flutter, docker or unknown
+    frameworks: List[str]   # Every framework any detector recognised, sorted
+    dna: str                # MOBILE, WEB, BACKEND or GENERAL_SOFTWARE
+    command: str            # Local run command ("" when not runnable, e.g. a library)
+    port: int
+    docker: bool            # docker-compose.yml present
+
+
+Detector = Callable[["Manifests"], Optional[Detection]]
+
+# Registered detectors in precedence order: the first local stack found wins
+DETECTORS: List[Tuple[str, Detector]] = []
+
+
+def register(stack: str):
+    """Add a detector for ``stack``. Registration order is precedence order."""
+    def decorator(func: Detector) -> Detector:
+        DETECTORS.append((stack, func))
+        return func
+    return decorator
+
+
+# Parsed manifests keyed by (path, size, mtime_ns), so every caller in a run
+# (discovery, orchestrator, intelligence) shares one parse per file. Bounded,
+# least recently used first out: a run only ever reads a handful.
+MAX_PARSED = 64
+_PARSED: "OrderedDict[Tuple[str, int, int, str], object]" = OrderedDict()
+_PARSED_LOCK = threading.Lock()
+
+
+def _parse(path: Path, kind: str):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = (str(path), st.st_size, st.st_mtime_ns, kind)
+    with _PARSED_LOCK:
+        if key in _PARSED:
+            _PARSED.move_to_end(key)
+            return _PARSED[key]
+    try:
+        if kind == "json":
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        elif kind == "toml":
+            with open(path, "rb") as f:
+                value = tomllib.load(f)
+        else:
+            value = path.read_text(encoding="utf-8", errors="ignore")
+    except (OSError, ValueError, tomllib.TOMLDecodeError):
+        value = None
+    with _PARSED_LOCK:
+        _PARSED[key] = value
+        while len(_PARSED) > MAX_PARSED:
+            _PARSED.popitem(last=False)
+    return value
+
+
+class Manifests:
+    """Read-only view of a project's manifests for detectors.
+
+    With a ``ProjectIndex`` existence checks are free and marker files are
+    matched anywhere in the tree; without one only the root is probed.
+    """
+
+    def __init__(self, root: Path, index=None):
+        self.root = Path(root)
+        self.index = index
+        self._names: Optional[Set[str]] = None
+
+    def exists(self, rel: str) -> bool:
+        if self.index is not None:
+            return self.index.has(rel)
+        return (self.root / rel).is_file()
+
+    def names(self) -> Set[str]:
+        """File names available for marker matching."""
+        if self._names is None:
+            if self.index is not None:
+                self._names = self.index.names()
+            else:
+                try:
+                    self._names = {e.name for e in os.scandir(self.root) if e.is_file()}
+                except OSError:
+                    self._names = set()
+        return self._names
+
+    def present(self, name: str) -> bool:
+        return name in self.names()
+
+    def marker(self, prefix: str) -> bool:
+        """Any file named like ``prefix`` (e.g. ``next.config`` matches next.config.mjs)."""
+        return any(n.startswith(prefix) for n in self.names())
+
+    def json(self, rel: str) -> dict:
+        value = _parse(self.root / rel, "json") if self.exists(rel) else None
+        return value if isinstance(value, dict) else {}
+
+    def toml(self, rel: str) -> dict:
+        return (_parse(self.root / rel, "toml") or {}) if self.exists(rel) else {}
+
+    def text(self, rel: str) -> str:
+        return (_parse(self.root / rel, "text") or "") if self.exists(rel) else ""
+
+    def node_dependencies(self) -> Set[str]:
+        pkg = self.json("package.json")
+        deps: Set[str] = set()
+        for field in ("dependencies", "devDependencies", "peerDependencies"):
+            if isinstance(pkg.get(field), dict):
+                deps.update(pkg[field])
+        return deps
+
+    def python_dependencies(self) -> Set[str]:
+        """Lower-cased distribution names from requirements.txt and pyproject.toml."""
+        specs = self.text("requirements.txt").splitlines()
+        pyproject = self.toml("pyproject.toml")
+        project = pyproject.get("project") or {}
+        specs += project.get("dependencies") or []
+        for extra in (project.get("optional-dependencies") or {}).values():
+            specs += extra
+        poetry = ((pyproject.get("tool") or {}).get("poetry") or {}).get("dependencies") or {}
+        specs += list(poetry)
+        deps = set()
+        for spec in specs:
+            match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", spec) if isinstance(spec, str) else None
+            if match:
+                deps.add(match.group(1).lower().replace("_", "-"))
+        return deps
+
+
+@register("node")
+def detect_node(m: Manifests) -> Optional[Detection]:
+    if not m.present("package.json"):
+        return None
+    deps = m.node_dependencies()
+    frameworks = ["node"] + [fw for fw in ("react", "vue", "react-native") if fw in deps]
+    if "next" in deps or m.marker("next.config"):
+        return Detection(tuple(frameworks + ["nextjs"]), "npm run dev", 3000)
+    if "vite" in deps or m.marker("vite.config"):
+        return Detection(tuple(frameworks + ["vite"]), "npm run dev", 5173)
+    return Detection(tuple(frameworks), "npm start", 3000)
+
+
+def _is_python_cli_or_library(m: Manifests) -> bool:
+    pyproject = m.toml("pyproject.toml")
+    if (pyproject.get("project") or {}).get("scripts") or "console_scripts" in m.text("pyproject.toml"):
+        return True
+    setup = m.text("setup.py")
+    return "console_scripts" in setup or "entry_points" in setup
+
+
+@register("python")
+def detect_python(m: Manifests) -> Optional[Detection]:
+    if not (m.present("requirements.txt") or m.present("pyproject.toml")):
+        return None
+    deps = m.python_dependencies()
+    if "fastapi" in deps:
+        module = "app.main" if m.exists("app/main.py") else "main"
+        return Detection(("python", "fastapi"), f"uvicorn {module}:app --port 8000", 8000)
+    if "flask" in deps:
+        if m.exists("main.py"):
+            command = "python main.py"
+        elif m.exists("app.py"):
+            command = "python app.py"
+        else:
+            command = "flask run"
+        return Detection(("python", "flask"), command, 5000)
+    if "django" in deps:
+        return Detection(("python", "django"), "python manage.py runserver", 8000)
+    if _is_python_cli_or_library(m):
+        # A CLI tool or library, not a runnable web service
+        return Detection(("python",))
+    for script in ("main.py", "app.py"):
+        if m.exists(script):
+            return Detection(("python",), f"python {script}")
+    return Detection(("python",))
+
+
+@register("flutter")
+def detect_flutter(m: Manifests) -> Optional[Detection]:
+    if not m.present("pubspec.yaml"):
+        return None
+    # Defaulting to web-server for capture ease, user can change to -d chrome
+    return Detection(("flutter",), "flutter run -d web-server --web-port 8080", 8080)
+
+
+@register("docker")
+def detect_docker(m: Manifests) -> Optional[Detection]:
+    if not m.present("docker-compose.yml"):
+        return None
+    return Detection(("docker",), "docker-compose up", strategy="docker")
+
+
+def project_dna(frameworks: List[str]) -> str:
+    """Classify project type (Mobile, Web, Backend, CLI) based on stack."""
+    fw_set = set(frameworks)
+
+    if "flutter" in fw_set or "react-native" in fw_set:
+        return "MOBILE"
+    if "vite" in fw_set or "nextjs" in fw_set or "react" in fw_set or "vue" in fw_set:
+        return "WEB"
+    if "django" in fw_set or "flask" in fw_set or "fastapi" in fw_set:
+        return "BACKEND"
+
+    # Default fallback
+    return "GENERAL_SOFTWARE"
+
+
+def detect_stack(root: Path, index=None) -> StackProfile:
+    """Run every registered detector and merge their findings.
+
+    The stack, run command and port come from the root's manifests only, so
+    every caller gets the same answer with or without an index. An index
+    only adds framework tags for manifests nested deeper in the tree.
+    """
+    manifests = Manifests(root)
+    frameworks: Set[str] = set()
+    local: Optional[Tuple[str, Detection]] = None
+    docker = False
+    for stack, detector in DETECTORS:
+        found = detector(manifests)
+        if found is None:
+            continue
+        frameworks.update(found.frameworks)
+        if found.strategy == "docker":
+            docker = True
+        elif local is None:
+            local = (stack, found)
+
+    if local is not None:
+        stack, found = local
+        command, port = found.command, found.port
+    else:
+        stack, command, port = "docker" if docker else "unknown", "", 0
+    if index is not None:
+        nested = Manifests(root, index)
+        for _, detector in DETECTORS:
+            found = detector(nested)
+            if found is not None:
+                frameworks.update(found.frameworks)
+
+    ordered = sorted(frameworks)
+    return StackProfile(stack, ordered, project_dna(ordered), command, port, docker)
@@ -1,10 +1,12 @@
+import contextlib
 import subprocess
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Callable, ContextManager, Optional
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from shipsight.config import ShipSightConfig
+from shipsight.engine.detectors import StackProfile, detect_stack
 from shipsight.engine.readiness import wait_for_ready, is_port_open, auto_wait_for_ready
 
 console = Console()
@@ -19,18 +21,39 @@ class Orchestrator:
         self.log_file = None
         self.is_script = False
         self.is_static = False
+        self.profile: Optional[StackProfile] = None
+        # Wraps every prompt; the CLI passes one that pauses its live progress display
+        self.interactive: Callable[[], ContextManager] = contextlib.nullcontext
+        self._port_choice: Optional[str] = None
+
+    def prepare(self):
+        """Ask the questions that can be answered before the run starts (a busy port),
+        so the prompt does not race the output of stages already running."""
+        stack = self.detect_stack()
+        if self.config.run.strategy not in ("static", "docker") and stack != "docker":
+            self._port_choice = self._port_conflict_choice()
+
+    def _port_conflict_choice(self) -> Optional[str]:
+        """u(se), k(ill) or c(ancel) when the configured port is taken; None when it is free."""
+        if not (self.config.run.port and is_port_open("localhost", self.config.run.port)):
+            return None
+        console.print(f"[bold yellow]Warning: Port {self.config.run.port} is already in use.[/bold yellow]")
+        with self.interactive():
+            return Prompt.ask(
+                "Should ShipSight [u]u[/u]se the existing service, [u]k[/u]ill the process using it, or [u]c[/u]ancel?",
+                choices=['u', 'k', 'c'],
+                default='u'
+            )
+
+    def _confirm_local(self, stack: str) -> bool:
+        with self.interactive():
+            return Confirm.ask(f"Should ShipSight try running the [bold cyan]{stack}[/bold cyan] stack locally instead?")
 
     def detect_stack(self):
-        """Simple stack detection based on files. Returns the local tech stack even if Docker is present."""
-        if (self.project_path / "package.json").exists():
-            return "node"
-        if (self.project_path / "requirements.txt").exists() or (self.project_path / "pyproject.toml").exists():
-            return "python"
-        if (self.project_path / "pubspec.yaml").exists():
-            return "flutter"
-        if (self.project_path / "docker-compose.yml").exists():
-            return "docker"
-        return "unknown"
+        """Stack detection via the shared detector registry. Returns the local tech stack even if Docker is present."""
+        if self.profile is None:
+            self.profile = detect_stack(self.project_path)
+        return self.profile.stack
 
     def start(self) -> bool:
         stack = self.detect_stack()
@@ -53,10 +76,8 @@ class Orchestrator:
         is_docker_cmd = cmd and ("docker" in cmd.lower())
         
         if not cmd or is_docker_cmd:
-            if stack == "node":
-                cmd = "npm run dev"
-            elif stack == "python":
-                cmd = "python main.py" # Placeholder
+            if self.profile and self.profile.command:
+                cmd = self.profile.command
             elif is_docker_cmd:
                 console.print(f"[red]Cannot run '{cmd}' locally. Skipping...[/red]")
                 return False
@@ -64,15 +85,10 @@ class Orchestrator:
                 console.print("[red]No run command specified or detected.[/red]")
                 return False
 
-        # 1. Check for port conflict
-        if self.config.run.port and is_port_open("localhost", self.config.run.port):
-            console.print(f"[bold yellow]Warning: Port {self.config.run.port} is already in use.[/bold yellow]")
-            choice = Prompt.ask(
-                "Should ShipSight [u]u[/u]se the existing service, [u]k[/u]ill the process using it, or [u]c[/u]ancel?",
-                choices=['u', 'k', 'c'],
-                default='u'
-            )
-            
+        # 1. Check for port conflict (usually answered up front in prepare())
+        choice = self._port_choice or self._port_conflict_choice()
+        self._port_choice = None  # Used once; a later start (e.g. the static re-run) asks again
+        if choice:
             if choice == 'u':
                 # No need to wait, already up
                 self.detected_port = self.config.run.port
@@ -144,7 +160,7 @@ class Orchestrator:
         if not self.is_docker_running():
             console.print("[yellow]Docker daemon is not running.[/yellow]")
             if stack != "unknown" and stack != "docker":
-                if Confirm.ask(f"Should ShipSight try running the [bold cyan]{stack}[/bold cyan] stack locally instead?"):
+                if self._confirm_local(stack):
                     return self._start_local(stack)
             return False
 
@@ -173,7 +189,7 @@ class Orchestrator:
             console.print(f"[red]Docker Compose failed: {error_details}[/red]")
             
             if stack != "unknown" and stack != "docker":
-                if Confirm.ask(f"Should ShipSight try running the [bold cyan]{stack}[/bold cyan] stack locally instead?"):
+                if self._confirm_local(stack):
                     return self._start_local(stack)
             return False
 
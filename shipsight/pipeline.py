@@ -0,0 +1,146 @@
+import asyncio
+import contextlib
+import inspect
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Default concurrency per resource: how many stages may hold it at once.
+# Override per run with `run.concurrency` in shipsight.yml.
+RESOURCE_LIMITS = {
+    "cpu": os.cpu_count() or 1,  # Scans and parsing (run in worker threads)
+    "process": 1,                # The project under test
+    "browser": 2,                # Contexts on the shared headless Chromium (capture, code snaps)
+    "llm": 2,                    # In-flight provider requests
+}
+
+
+class StageFailed(Exception):
+    """Raised by ``Pipeline.result`` for a stage that failed or was skipped."""
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[..., Any], deps: Iterable[str] = (),
+                 resource: Optional[str] = None, optional: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.resource = resource
+        self.optional = tuple(optional)  # Awaited, but passed as None instead of skipping when they fail
+
+
+class Pipeline:
+    """Run stages as a dependency graph on asyncio.
+
+    Every stage starts as soon as its dependencies have finished, limited
+    only by the semaphore of the resource it uses, so total wall-clock time
+    approaches the longest dependency chain instead of the sum of stages.
+    Stage functions receive the results of their dependencies as keyword
+    arguments (by stage name). Plain functions run in a worker thread.
+    A stage that raises marks everything downstream of it as skipped; the
+    rest of the graph keeps going. Optional dependencies are waited for
+    too, but a failed one is passed as None instead of skipping the stage.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self.limits = {**RESOURCE_LIMITS, **(limits or {})}
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.timings: Dict[str, Dict] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def add(self, name: str, func: Callable[..., Any], deps: Iterable[str] = (),
+            resource: Optional[str] = None, optional: Iterable[str] = ()) -> "Pipeline":
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        deps, optional = tuple(deps), tuple(optional)
+        for dep in deps + optional:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = Stage(name, func, deps, resource, optional)
+        return self
+
+    def stage(self, name: str, deps: Iterable[str] = (), resource: Optional[str] = None,
+              optional: Iterable[str] = ()):
+        """Decorator form of ``add``."""
+        def decorator(func):
+            self.add(name, func, deps, resource, optional)
+            return func
+        return decorator
+
+    def slot(self, resource: str) -> asyncio.Semaphore:
+        """Semaphore for ``resource``, for stages that fan out work on it internally.
+
+        Resources without a configured limit are exclusive.
+        """
+        if resource not in self._semaphores:
+            self._semaphores[resource] = asyncio.Semaphore(max(1, self.limits.get(resource, 1)))
+        return self._semaphores[resource]
+
+    def failed(self, name: str) -> bool:
+        return name in self.errors
+
+    def result(self, name: str) -> Any:
+        if name in self.errors:
+            raise StageFailed(name) from self.errors[name]
+        return self.results[name]
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every stage; returns the results of the ones that succeeded."""
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(stage: Stage):
+            for dep in stage.deps + stage.optional:
+                await asyncio.wait({tasks[dep]})
+            failed_deps = [dep for dep in stage.deps if dep in self.errors]
+            if failed_deps:
+                self.errors[stage.name] = StageFailed(f"skipped: '{failed_deps[0]}' failed")
+                self.timings[stage.name] = {"status": "skipped"}
+                return
+            kwargs = {dep: self.results[dep] for dep in stage.deps}
+            kwargs.update({dep: self.results.get(dep) for dep in stage.optional})
+            async with self.slot(stage.resource) if stage.resource else contextlib.nullcontext():
+                begin = time.perf_counter()
+                try:
+                    self.results[stage.name] = await _call(stage.func, kwargs)
+                    status = "ok"
+                except Exception as e:
+                    self.errors[stage.name] = e
+                    status = "failed"
+                end = time.perf_counter()
+            self.timings[stage.name] = {
+                "status": status,
+                "start": round(begin - started, 3),
+                "seconds": round(end - begin, 3),
+            }
+
+        # Stages are added after their dependencies, so creation order is a topological order
+        for name, stage in self.stages.items():
+            tasks[name] = asyncio.create_task(execute(stage), name=f"stage:{name}")
+        await asyncio.gather(*tasks.values())
+        self.timings["total"] = {"seconds": round(time.perf_counter() - started, 3)}
+        return dict(self.results)
+
+    def critical_path(self) -> List[str]:
+        """Longest chain of stage durations; the lower bound for the run's wall-clock time."""
+        best: Dict[str, float] = {}
+        prev: Dict[str, Optional[str]] = {}
+        for name, stage in self.stages.items():
+            seconds = self.timings.get(name, {}).get("seconds", 0.0)
+            parent = max(stage.deps + stage.optional, key=lambda d: best[d], default=None)
+            best[name] = seconds + (best[parent] if parent else 0.0)
+            prev[name] = parent
+        node = max(best, key=best.get, default=None)
+        path = []
+        while node:
+            path.append(node)
+            node = prev[node]
+        return path[::-1]
+
+
+async def _call(func: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+    if inspect.iscoroutinefunction(func):
+        return await func(**kwargs)
+    return await asyncio.to_thread(func, **kwargs)
@@ -0,0 +1,12 @@
+import pytest
+
+@pytest.fixture
+def temp_project(tmp_path):
+    """Create a temporary project structure."""
+    def _create(files: dict):
+        for name, content in files.items():
+            path = tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+        return tmp_path
+    return _create
@@ -0,0 +1,18 @@
+import asyncio
+import pytest
+
+pytest.importorskip("playwright")
+from shipsight.capture.browser import LAUNCH_ARGS, BrowserService
+
+def test_launch_is_lazy_and_close_is_idempotent():
+    async def scenario():
+        service = BrowserService()
+        assert not service.healthy()
+        assert service.stats["launches"] == 0
+        await service.close()
+        await service.close()
+    asyncio.run(scenario())
+
+def test_custom_launch_flags():
+    assert BrowserService().launch_args == LAUNCH_ARGS
+    assert BrowserService(launch_args=[]).launch_args == []
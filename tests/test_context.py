@@ -0,0 +1,54 @@
+from shipsight.ai.context import ContextBuilder, context_budget, heuristic_token_count
+from shipsight.ai.intelligence import IntelligenceEngine
+
+def test_budget_prefers_override_and_small_windows():
+    assert context_budget("ollama", "llama3") == 1500
+    assert context_budget("groq", "mixtral-8x7b-32768") == 4000
+    assert context_budget("groq", "gemma-7b-8192") == 2730
+    assert context_budget("openai", "gpt-4o", override=900) == 900
+
+def test_builder_funds_by_priority_and_renders_in_order():
+    builder = ContextBuilder(60)
+    builder.add("header", "HEADER\n", priority=0, required=True)
+    builder.add("tree", "".join(f"dir_{i}/\n" for i in range(100)), priority=2)
+    builder.add("sigs", "SIGS " * 20 + "\n", priority=1, fallbacks=["SIGS\n"])
+
+    context = builder.build()
+    report = builder.report()
+
+    assert context.startswith("HEADER\n")
+    assert context.index("dir_0/") < context.index("SIGS")
+    assert report["used"] <= 60
+    assert report["sections"]["sigs"]["used"] == report["sections"]["sigs"]["requested"]
+    assert report["sections"]["tree"]["truncated"] is True
+    assert context.count("(truncated)") == 1
+
+def test_builder_uses_fallback_before_truncating():
+    builder = ContextBuilder(40)
+    builder.add("tree", "x" * 400, priority=0, fallbacks=["shallow tree\n"])
+    assert builder.build() == "shallow tree\n"
+
+def test_summary_context_fits_budget(tmp_path):
+    for i in range(200):
+        path = tmp_path / "src" / f"mod_{i}" / "service.py"
+        path.parent.mkdir(parents=True)
+        path.write_text("".join(f"def handler_{j}():\n    return {j}\n" for j in range(60)))
+    (tmp_path / "README.md").write_text("# Demo\n\nA demo service.\n" + "Details. " * 2000)
+
+    engine = IntelligenceEngine(tmp_path)
+    analysis = engine.analyze_stack()
+    context = engine.get_summary_context(analysis, engine.get_hero_code(), budget_tokens=800)
+
+    assert heuristic_token_count(context) <= 800
+    assert context.startswith(f"PROJECT NAME: {analysis['name']}")
+    assert "ARCHITECTURAL COMPONENTS FOUND" in context
+    assert "src/ (200 files)" in context
+    assert engine.context_report["sections"]["signatures"]["used"] > 0
+
+def test_empty_description_keeps_docs(tmp_path):
+    (tmp_path / "README.md").write_text("# Demo\n\nA demo service.\n")
+    engine = IntelligenceEngine(tmp_path)
+    analysis = {**engine.analyze_stack(), "description": ""}
+    context = engine.get_summary_context(analysis)
+
+    assert "--- README.md ---\n# Demo" in context
@@ -0,0 +1,86 @@
+from shipsight.ai.index import ProjectIndex
+from shipsight.ai.intelligence import IntelligenceEngine, IGNORES
+from shipsight.engine import detectors
+from shipsight.engine.detectors import detect_stack
+
+def test_vite_react_profile(temp_project):
+    project = temp_project({
+        "package.json": '{"dependencies": {"react": "18"}, "devDependencies": {"vite": "5"}}',
+    })
+    profile = detect_stack(project)
+
+    assert profile.stack == "node"
+    assert profile.frameworks == ["node", "react", "vite"]
+    assert profile.dna == "WEB"
+    assert (profile.command, profile.port) == ("npm run dev", 5173)
+
+def test_pyproject_dependencies_are_parsed(temp_project):
+    project = temp_project({
+        "pyproject.toml": '[project]\nname = "svc"\ndependencies = ["Django>=5", "fastapi-utils"]\n',
+        "docker-compose.yml": "services: {}",
+    })
+    profile = detect_stack(project)
+
+    assert profile.frameworks == ["django", "docker", "python"]
+    assert profile.command == "python manage.py runserver"
+    assert profile.docker is True
+    assert profile.dna == "BACKEND"
+
+def test_python_library_is_not_runnable(temp_project):
+    project = temp_project({
+        "pyproject.toml": '[project]\nname = "tool"\n[project.scripts]\ntool = "tool:main"\n',
+        "main.py": "print(1)",
+    })
+    profile = detect_stack(project)
+    assert (profile.stack, profile.command, profile.port) == ("python", "", 0)
+
+def test_all_callers_agree_and_parse_manifests_once(temp_project, monkeypatch):
+    from shipsight.engine.discovery import ConfigDiscovery
+    project = temp_project({
+        "package.json": '{"dependencies": {"next": "14.0.0"}}',
+        "src/app.ts": "export {}",
+    })
+    monkeypatch.setattr(detectors, "_PARSED", detectors.OrderedDict())
+    loads = []
+    original_load = detectors.json.load
+    monkeypatch.setattr(detectors.json, "load", lambda f: (loads.append(1), original_load(f))[1])
+
+    suggestion = ConfigDiscovery(project).infer_config()
+    analysis = IntelligenceEngine(project).analyze_stack()  # Also reads the description
+
+    assert suggestion["run"]["command"] == analysis["run"]["command"] == "npm run dev"
+    assert analysis["frameworks"] == ["nextjs", "node"]
+    assert analysis["dna"] == "WEB"
+    assert len(loads) == 1
+
+def test_index_markers_match_nested_files(temp_project):
+    project = temp_project({
+        "web/next.config.mjs": "export default {}",
+        "web/package.json": "{}",
+    })
+    index = ProjectIndex.build(project, IGNORES)
+
+    assert detect_stack(project).stack == "unknown"
+    assert detect_stack(project, index).frameworks == ["nextjs", "node"]
+
+def test_nested_manifests_only_add_framework_tags(temp_project):
+    from shipsight.engine.discovery import ConfigDiscovery
+    project = temp_project({
+        "pyproject.toml": '[project]\nname = "svc"\n',
+        "main.py": "print(1)",
+        "docs/package.json": '{"dependencies": {"vite": "5"}}',
+    })
+    suggestion = ConfigDiscovery(project).infer_config()
+    analysis = IntelligenceEngine(project).analyze_stack()
+
+    assert suggestion["run"]["command"] == analysis["run"]["command"] == "python main.py"
+    assert detect_stack(project).stack == "python"
+    assert analysis["frameworks"] == ["node", "python"]
+
+def test_parsed_manifests_are_bounded(temp_project, monkeypatch):
+    project = temp_project({f"pkg_{i}/package.json": "{}" for i in range(5)})
+    monkeypatch.setattr(detectors, "MAX_PARSED", 3)
+    monkeypatch.setattr(detectors, "_PARSED", detectors.OrderedDict())
+    for i in range(5):
+        detectors.Manifests(project / f"pkg_{i}").json("package.json")
+    assert len(detectors._PARSED) == 3
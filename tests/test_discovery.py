@@ -1,19 +1,7 @@
-import pytest
 from pathlib import Path
 import yaml
 from shipsight.engine.discovery import ConfigDiscovery
 
-@pytest.fixture
-def temp_project(tmp_path):
-    """Create a temporary project structure."""
-    def _create(files: dict):
-        for name, content in files.items():
-            path = tmp_path / name
-            path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(content, encoding="utf-8")
-        return tmp_path
-    return _create
-
 def test_detect_nodejs_nextjs(temp_project):
     project = temp_project({
         "package.json": '{"dependencies": {"next": "14.0.0"}}'
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from shipsight.ai.hedging import MIN_SAMPLES, LatencyHistogram, LatencyStore, hedged_race
+
+def test_percentile_needs_samples_and_follows_recent_latency():
+    histogram = LatencyHistogram()
+    for _ in range(MIN_SAMPLES - 1):
+        histogram.record(1.0)
+    assert histogram.percentile(0.95) is None
+    histogram.record(1.0)
+    assert histogram.percentile(0.95) == pytest.approx(1.0, rel=0.15)
+    for _ in range(200):
+        histogram.record(8.0)  # Provider got slower; old samples decay away
+    assert histogram.percentile(0.5) == pytest.approx(8.0, rel=0.15)
+
+def test_store_persists_between_runs(tmp_path):
+    path = tmp_path / "latency.json"
+    store = LatencyStore(path)
+    assert store.hedge_delay("groq", "m", 0.95, default=10.0) == 10.0
+    for _ in range(10):
+        store.record("groq", "m", 2.0)
+    store.save()
+    reloaded = LatencyStore(path)
+    assert reloaded.hedge_delay("groq", "m", 0.95, default=10.0) == pytest.approx(2.0, rel=0.15)
+    assert reloaded.hedge_delay("openai", "m", 0.95, default=10.0) == 10.0
+
+def race(behaviours, hedge_after=0.05):
+    """Run hedged_race over named candidates: (first_output_delay, result_or_exception)."""
+    started, cancelled = [], []
+    async def attempt(name, claim):
+        started.append(name)
+        delay, outcome = behaviours[name]
+        try:
+            await asyncio.sleep(delay)
+            if isinstance(outcome, Exception):
+                raise outcome
+            claim()
+            return outcome
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+    result = asyncio.run(hedged_race(list(behaviours), attempt, lambda name: hedge_after))
+    return result, started, cancelled
+
+def test_fast_primary_never_hedges():
+    result, started, _ = race({"a": (0.0, "A"), "b": (0.0, "B")})
+    assert result == ("a", "A") and started == ["a"]
+
+def test_slow_primary_is_hedged_and_cancelled():
+    result, started, cancelled = race({"a": (1.0, "A"), "b": (0.0, "B")})
+    assert result == ("b", "B")
+    assert started == ["a", "b"] and cancelled == ["a"]
+
+def test_error_falls_back_immediately():
+    result, started, _ = race({"a": (0.0, ValueError("down")), "b": (0.0, "B")}, hedge_after=5.0)
+    assert result == ("b", "B") and started == ["a", "b"]
+
+def test_all_failing_raises_last_error():
+    with pytest.raises(ValueError, match="b down"):
+        race({"a": (0.0, ValueError("a down")), "b": (0.0, ValueError("b down"))})
+
+def test_winner_failing_after_claim_is_raised():
+    async def attempt(name, claim):
+        if name == "a":
+            claim()
+            raise RuntimeError("dropped mid-stream")
+        return "B"
+    with pytest.raises(RuntimeError, match="mid-stream"):
+        asyncio.run(hedged_race(["a", "b"], attempt, lambda name: 5.0))
+
+def test_cancelled_slow_attempts_keep_the_hedge_delay_up(tmp_path):
+    from shipsight.ai.narrative import NarrativeGenerator, Prompt
+    from shipsight.ai.usage import UsageLog
+    from shipsight.config import AIConfig
+    config = AIConfig(provider="ollama", model="llama3", providers=["groq"], cache=False, hedge_after_s=0.2)
+    generator = NarrativeGenerator(config)
+    generator.latency = LatencyStore(tmp_path / "latency.json")
+    generator.usage_log = UsageLog(tmp_path)
+    slow = [False]
+
+    async def request(prompt, target, sink=None):
+        delay = 1.0 if target.provider == "ollama" and slow[0] else 0.0
+        await asyncio.sleep(delay)
+        sink("text")
+        return "text", {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2,
+                        "duration_s": delay, "ttft_s": delay}
+    generator._request_llm = request
+
+    async def run():
+        for i in range(10):
+            slow[0] = i % 2 == 1  # Every other primary call stalls and is hedged
+            await generator._call_llm(Prompt("prefix", "task"))
+        await generator.aclose()
+    asyncio.run(run())
+
+    # Fast wins alone would pull the delay down to the 50 ms bucket
+    assert generator.latency.hedge_delay("ollama", "llama3", 0.95, default=0.2) >= 0.15
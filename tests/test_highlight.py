@@ -0,0 +1,23 @@
+from shipsight.capture.highlight import FONT_FAMILY, font_face_css, highlight_code, theme_css, theme_style
+
+def test_highlights_by_filename_and_escapes():
+    markup = highlight_code("def f(x):\n    return '<b>'\n", "app.py")
+    assert '<span class="k">def</span>' in markup
+    assert "&lt;b&gt;" in markup and "<b>" not in markup
+
+def test_unknown_files_are_plain_but_escaped():
+    markup = highlight_code("a < b", "notes.unknownext")
+    assert markup.strip() == "a &lt; b"
+
+def test_themes_fall_back_to_monokai():
+    assert theme_style("dracula") == "dracula"
+    assert theme_style("no-such-theme") == "monokai"
+    assert ".code .k" in theme_css("nord")
+
+def test_bundled_font_is_embedded():
+    css = font_face_css()
+    assert f"font-family: '{FONT_FAMILY}'" in css and "data:font/woff2;base64," in css
+    assert "http" not in css
+
+def test_missing_font_dir_embeds_nothing(tmp_path):
+    assert font_face_css(tmp_path / "none") == ""
@@ -0,0 +1,224 @@
+import pytest
+from pathlib import Path
+from shipsight.ai.index import ProjectIndex
+from shipsight.ai.intelligence import IntelligenceEngine, IGNORES
+
+def _service_code(lines: int = 20) -> str:
+    return "".join(f"value_{i} = compute({i})\n" for i in range(lines))
+
+def test_index_prunes_ignored_dirs_by_exact_name(temp_project):
+    project = temp_project({
+        "src/app.py": "x = 1",
+        "src/toolsmith/forge.py": "y = 2",
+        "node_modules/lib/index.js": "z = 3",
+        "tools/helper.py": "w = 4",
+    })
+    index = ProjectIndex.build(project, IGNORES)
+
+    paths = [f.path for f in index.files()]
+    assert "src/app.py" in paths
+    assert "src/toolsmith/forge.py" in paths
+    assert not any(p.startswith(("node_modules/", "tools/")) for p in paths)
+    assert "node_modules" not in index.dirs
+
+def test_index_preserves_walk_order_and_metadata(temp_project):
+    project = temp_project({
+        "b.py": "bb",
+        "a.py": "a",
+        "pkg/c.ts": "ccc",
+    })
+    index = ProjectIndex.build(project, IGNORES)
+
+    assert [f.path for f in index.files()] == ["a.py", "b.py", "pkg/c.ts"]
+    assert index.get("pkg/c.ts").size == 3
+    assert index.get("pkg/c.ts").ext == ".ts"
+    assert index.extension_counts() == {".py": 2, ".ts": 1}
+    assert [f.path for f in index.files([".ts"])] == ["pkg/c.ts"]
+
+def test_index_handles_more_extensions_than_fit_in_16_bits(tmp_path):
+    index = ProjectIndex(tmp_path)
+    index._add_dir("", [(f"blob.x{i}", 1, 0) for i in range(70000)])
+    assert index.extension_counts()[".x69999"] == 1
+
+def test_engine_scans_once_for_all_methods(temp_project, monkeypatch):
+    project = temp_project({
+        "package.json": '{"description": "A demo app"}',
+        "src/services/api_service.ts": _service_code(),
+    })
+    calls = []
+    original = ProjectIndex._scan
+    monkeypatch.setattr(ProjectIndex, "_scan", lambda self: (calls.append(1), original(self)))
+
+    engine = IntelligenceEngine(project)
+    analysis = engine.analyze_stack()
+    heroes = engine.get_hero_code()
+    engine.get_summary_context(analysis, heroes)
+
+    assert len(calls) == 1
+    assert analysis["description"] == "A demo app"
+    assert "node" in analysis["frameworks"]
+    assert list(heroes) == ["api_service.ts"]
+
+def test_deep_structure_lists_dirs_and_sources(temp_project):
+    project = temp_project({
+        "main.py": "print(1)",
+        "lib/core.go": "package lib",
+        "lib/package-lock.json": "{}",
+    })
+    structure = IntelligenceEngine(project).get_deep_structure().splitlines()
+
+    assert structure == ["main.py", "DIR: lib", "lib/core.go"]
+
+def _age(project: Path, seconds: int = 60):
+    """Backdate every file and dir so the scan cache trusts their mtimes."""
+    import os, time
+    old = time.time() - seconds
+    for p in sorted(project.rglob("*"), reverse=True):
+        os.utime(p, (old, old))
+    os.utime(project, (old, old))
+
+def test_scan_cache_skips_unchanged_dirs_and_files(temp_project, tmp_path_factory):
+    project = temp_project({
+        "src/services/api_service.py": _service_code(),
+        "lib/util.py": _service_code(),
+    })
+    cache_dir = tmp_path_factory.mktemp("cache")
+    _age(project)
+
+    first = IntelligenceEngine.with_cache(project, cache_dir)
+    heroes = first.get_hero_code()
+    first.save_cache()
+    assert first.cache.stats["file_misses"] == 2
+
+    (project / "lib" / "util.py").write_text(_service_code(30), encoding="utf-8")
+    second = IntelligenceEngine.with_cache(project, cache_dir)
+    assert second.get_hero_code().keys() == heroes.keys()
+    assert second.cache.stats["dir_hits"] >= 2
+    assert second.cache.stats["file_hits"] == 1
+    assert second.cache.stats["file_misses"] == 1
+
+def test_scan_cache_invalidated_by_rule_changes(temp_project, tmp_path_factory, monkeypatch):
+    import shipsight.ai.intelligence as intelligence
+    project = temp_project({"src/app.py": _service_code()})
+    cache_dir = tmp_path_factory.mktemp("cache")
+    _age(project)
+
+    engine = IntelligenceEngine.with_cache(project, cache_dir)
+    engine.get_hero_code()
+    engine.save_cache()
+
+    monkeypatch.setattr(intelligence, "IGNORES", intelligence.IGNORES + ["vendor"])
+    reloaded = IntelligenceEngine.with_cache(project, cache_dir)
+    assert reloaded.cache.files == {}
+    assert reloaded.cache.dirs == {}
+
+def test_full_hero_signatures_persist_across_runs(temp_project, tmp_path_factory, monkeypatch):
+    import shipsight.ai.signatures as signatures
+    code = "".join(f"def handler_{i}():\n    return {i}\n" for i in range(20))
+    project = temp_project({"src/api_service.py": code})
+    cache_dir = tmp_path_factory.mktemp("cache")
+    _age(project)
+
+    first = IntelligenceEngine.with_cache(project, cache_dir)
+    block = first._signature_block(first.get_hero_code())
+    first.save_cache()
+    assert "function handler_0" in block
+
+    monkeypatch.setattr(signatures, "extract_signatures", lambda *a: pytest.fail("signatures re-parsed"))
+    second = IntelligenceEngine.with_cache(project, cache_dir)
+    assert second._signature_block(second.get_hero_code()) == block
+
+IGNORE_TREE = {
+    ".gitignore": "out/\n*.log\n!keep.log\n/target\nvendor/**\ndocs/*.md\n",
+    ".shipsightignore": "fixtures/\n",
+    "src/app.py": "x = 1",
+    "src/debug.log": "noise",
+    "src/keep.log": "kept",
+    "src/out/bundle.js": "generated",
+    "src/target/lib.rs": "not anchored at root, kept",
+    "target/release/app.rs": "generated",
+    "vendor/pkg/mod.go": "vendored",
+    "docs/guide.md": "ignored",
+    "docs/api/ref.md": "kept, * does not cross /",
+    "web/.gitignore": "*.gen.ts\n",
+    "web/client.gen.ts": "generated",
+    "web/client.ts": "kept",
+    "fixtures/sample.py": "ignored by .shipsightignore",
+}
+IGNORE_TREE_KEPT = {
+    ".gitignore", ".shipsightignore", "src/app.py", "src/keep.log", "src/target/lib.rs",
+    "docs/api/ref.md", "web/.gitignore", "web/client.ts",
+}
+
+def test_walk_applies_gitignore_and_shipsightignore(temp_project):
+    project = temp_project(IGNORE_TREE)
+    index = ProjectIndex.build(project, IGNORES, use_git=False)
+
+    assert index.source == "walk"
+    assert {f.path for f in index.files()} == IGNORE_TREE_KEPT
+
+@pytest.mark.skipif(not __import__("shutil").which("git"), reason="git not installed")
+def test_git_listing_matches_walk(temp_project):
+    import subprocess
+    project = temp_project(IGNORE_TREE)
+    subprocess.run(["git", "init", "-q"], cwd=project, check=True)
+    # Force-add an ignored file: git lists it, the shared rules still drop it
+    subprocess.run(["git", "add", "-f", "src/debug.log", "src/app.py"], cwd=project, check=True)
+
+    git_index = ProjectIndex.build(project, IGNORES)
+    walk_index = ProjectIndex.build(project, IGNORES, use_git=False)
+
+    assert git_index.source == "git"
+    assert [f.path for f in git_index.files()] == [f.path for f in walk_index.files()]
+    assert git_index.get("src/app.py").size == walk_index.get("src/app.py").size
+
+def test_hero_selection_skips_minified_and_binary_files(temp_project):
+    project = temp_project({
+        "src/services/bundle_service.js": "var a=1;" * 50_000,
+        "src/services/blob_service.py": "x = 1\n",
+        "src/core/engine.py": _service_code(),
+    })
+    (project / "src/services/blob_service.py").write_bytes(b"\0\1\2" * 1000)
+
+    heroes = IntelligenceEngine(project).get_hero_code()
+    assert list(heroes) == ["engine.py"]
+
+def test_hero_reads_are_bounded_for_huge_files(temp_project, monkeypatch):
+    import shipsight.ai.intelligence as intelligence
+    monkeypatch.setattr(intelligence, "MAX_READ_BYTES", 4096)
+    project = temp_project({"src/api_service.py": "".join(
+        f"def handler_{i}():\n    return {i}\n" for i in range(4000)
+    )})
+
+    memo = intelligence.SignatureMemo()
+    record, lines = intelligence.analyze_source(project / "src/api_service.py",
+                                                (project / "src/api_service.py").stat().st_size, memo)
+    assert record["truncated"] is True
+    assert lines is None
+    assert record["lines"] < 400
+    assert memo.lookup(".py", record["hash"])[0].name == "handler_0"
+
+def test_hero_ranking_prefers_priority_dirs_in_walk_order(temp_project):
+    project = temp_project({
+        "a_helpers.py": _service_code(),
+        "src/b.py": _service_code(),
+        "src/a.py": _service_code(),
+        "src/tiny.py": "x = 1\n",
+    })
+    heroes = IntelligenceEngine(project).get_hero_code()
+    assert list(heroes) == ["a.py", "b.py", "a_helpers.py"]
+
+def test_one_line_bundles_past_the_read_window_are_minified(temp_project):
+    import shipsight.ai.intelligence as intelligence
+    project = temp_project({"src/app.bundle.js": "var a=1;" * 100_000})
+    path = project / "src/app.bundle.js"
+    head, truncated = intelligence.read_source_head(path, path.stat().st_size)
+    assert truncated and len(head) == intelligence.MAX_READ_BYTES
+    record, _ = intelligence.analyze_source(path, path.stat().st_size)
+    assert record["skipped"] == "minified"
+
+def test_files_emptied_after_indexing_are_read_safely(temp_project):
+    import shipsight.ai.intelligence as intelligence
+    project = temp_project({"src/empty.py": ""})
+    record, lines = intelligence.analyze_source(project / "src/empty.py", intelligence.MMAP_THRESHOLD + 1)
+    assert record["lines"] == 0 and "skipped" not in record
@@ -0,0 +1,123 @@
+import pytest
+from shipsight.capture.manifest import (CaptureManifest, change_report, dom_hash, file_hash, find_duplicates,
+                                        hash_distance, perceptual_hash)
+from shipsight.capture.routes import RouteCapture
+
+def test_manifest_reuses_only_intact_images(tmp_path):
+    shot = tmp_path / "screenshots" / "index.png"
+    shot.parent.mkdir()
+    shot.write_bytes(b"png")
+    manifest = CaptureManifest(shot.parent / "manifest.json")
+    manifest.record("/", dom_hash("<html>"), "screenshots/index.png", file_hash(shot), None)
+    manifest.save(["/"])
+
+    reloaded = CaptureManifest(shot.parent / "manifest.json")
+    assert reloaded.reusable("/", dom_hash("<html>"), tmp_path)
+    assert reloaded.reusable("/", dom_hash("<html lang=en>"), tmp_path) is None
+    shot.write_bytes(b"edited")
+    assert reloaded.reusable("/", dom_hash("<html>"), tmp_path) is None
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    (tmp_path / "manifest.json").write_text("not json")
+    assert CaptureManifest(tmp_path / "manifest.json").entries == {}
+
+def test_duplicates_collapse_onto_the_first_route():
+    prints = [("/", "10x10:80:00ff", "a"), ("/home", "10x10:82:00fe", "b"), ("/other", "10x10:80:ff00", "c"),
+              ("/copy", None, "c"), ("/tall", "10x20:80:00ff", "d"), ("/dark", "10x10:20:00ff", "e")]
+    assert find_duplicates(prints, threshold=1) == {"/home": "/", "/copy": "/other"}
+    assert find_duplicates(prints, threshold=0) == {"/copy": "/other"}
+    assert hash_distance("10x10:80:00ff", "10x20:80:00ff") is None
+    assert hash_distance("10x10:80:00ff", "10x10:20:00ff") is None
+
+def test_change_report():
+    results = [RouteCapture("/", "u", "p", "ok", change="changed"),
+               RouteCapture("/a", "u", "p", "ok", change="unchanged"),
+               RouteCapture("/b", "u", "p", "ok", change="duplicate", duplicate_of="/")]
+    assert change_report(results) == {"changed": ["/"], "unchanged": ["/a"], "duplicate": {"/b": "/"}}
+
+def test_perceptual_hash_tolerates_small_changes(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    ImageDraw = pytest.importorskip("PIL.ImageDraw")
+    def page(path, caret):
+        image = Image.new("RGB", (400, 800), "white")
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((0, 0, 400, 80), fill="navy")
+        draw.rectangle((40, 200, 360, 500), fill="gray")
+        if caret:
+            draw.line((50, 600, 50, 610), fill="black")
+        image.save(path)
+        return perceptual_hash(path)
+    a, b = page(tmp_path / "a.png", False), page(tmp_path / "b.png", True)
+    assert a.startswith("400x800:") and hash_distance(a, b) <= 6
+    flat_red, flat_blue = tmp_path / "red.png", tmp_path / "blue.png"
+    Image.new("RGB", (400, 800), "red").save(flat_red)
+    Image.new("RGB", (400, 800), "blue").save(flat_blue)
+    assert hash_distance(perceptual_hash(flat_red), perceptual_hash(flat_blue)) is None
+
+class FakePage:
+    """Serves canned DOM snapshots and writes fixed bytes as screenshots."""
+    def __init__(self, pages, shots):
+        self.pages, self.shots, self.url = pages, shots, None
+
+    def on(self, event, handler): pass
+    def remove_listener(self, event, handler): pass
+    def is_closed(self): return False
+    async def close(self): pass
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+
+    async def evaluate(self, script, arg=None):
+        from shipsight.capture.manifest import DOM_SNAPSHOT
+        from shipsight.capture.stability import MUTATION_IDLE_MS, TRIGGER_LAZY
+        if script == DOM_SNAPSHOT:
+            return self.pages[self.url]
+        if script == TRIGGER_LAZY:
+            return {"steps": 0, "targets": 0}
+        return 1000.0 if script == MUTATION_IDLE_MS else True
+
+    async def screenshot(self, path, **kwargs):
+        self.shots.append(self.url)
+        with open(path, "wb") as f:
+            f.write(self.pages[self.url].encode())
+
+class FakeBrowser:
+    def __init__(self, pages):
+        self.pages, self.shots = pages, []
+
+    def context(self, **options):
+        browser = self
+        class Context:
+            async def __aenter__(self): return self
+            async def __aexit__(self, *exc): pass
+            async def new_page(self): return FakePage(browser.pages, browser.shots)
+        return Context()
+
+def test_collapsed_duplicates_are_reused_on_the_next_run(tmp_path):
+    pytest.importorskip("playwright")
+    import asyncio
+    from shipsight.capture.capture import CaptureEngine
+    from shipsight.config import ShipSightConfig
+    config = ShipSightConfig()
+    config.capture.routes, config.capture.quiet_ms, config.capture.pages = ["/", "/home", "/about"], 0, 1
+    pages = {"http://x/": "landing", "http://x/home": "landing", "http://x/about": "about"}
+
+    def run():
+        browser = FakeBrowser(pages)
+        results = asyncio.run(CaptureEngine(config, tmp_path, browser=browser).capture_screenshots("http://x"))
+        return browser.shots, {r.route: (r.change, r.path, r.duplicate_of) for r in results}
+
+    shots, first = run()
+    assert len(shots) == 3 and first["/home"] == ("duplicate", "screenshots/index.png", "/")
+    assert not (tmp_path / "screenshots" / "home.png").exists()
+
+    shots, second = run()
+    assert shots == []
+    assert second == {"/": ("unchanged", "screenshots/index.png", None), "/home": first["/home"],
+                      "/about": ("unchanged", "screenshots/about.png", None)}
+
+    # The original changes: it is re-rendered, and its stale duplicate is captured again on its own
+    pages["http://x/"] = "redesigned"
+    shots, third = run()
+    assert sorted(shots) == ["http://x/", "http://x/home"]
+    assert third["/"][0] == "changed" and third["/home"][:2] == ("changed", "screenshots/home.png")
@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+from shipsight.config import ImagesConfig
+from shipsight.capture.optimize import ImageOptimizer, optimize_image
+
+def screenshot(path, size=(800, 2000)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image = Image.new("RGBA", size, (255, 255, 255, 255))
+    image.paste((30, 60, 200, 255), (0, 0, size[0], 300))
+    image.save(path, compress_level=0)
+    return path
+
+def test_one_pass_writes_variants_and_presets(tmp_path):
+    source = screenshot(tmp_path / "screenshots" / "index.png")
+    result = optimize_image(str(source), str(tmp_path), ["webp", "jpeg"], ["readme", "linkedin", "thumbnail"], 80)
+    assert not result.error and result.source == "screenshots/index.png"
+    assert result.bytes_after < result.bytes_before == sum([result.bytes_before])
+    assert set(result.variants) == {"webp", "jpeg", "readme.webp", "linkedin.webp", "thumbnail.webp"}
+    assert result.variants["linkedin.webp"]["size"] == [1200, 627]
+    assert result.variants["readme.webp"]["size"] == [800, 2000]  # Never upscaled
+    assert result.variants["webp"]["path"] == "optimized/screenshots/index.webp"
+    assert Image.open(source).mode == "RGB"  # Opaque alpha dropped losslessly
+
+    again = optimize_image(str(source), str(tmp_path), ["webp", "jpeg"], ["readme", "linkedin", "thumbnail"], 80)
+    assert again.skipped and again.bytes_after == again.bytes_before
+
+def test_oversized_webp_is_scaled_to_the_encoder_limit(tmp_path):
+    source = screenshot(tmp_path / "screenshots" / "long.png", size=(200, 17000))
+    result = optimize_image(str(source), str(tmp_path), ["webp"], [], 80)
+    assert not result.error and result.variants["webp"]["size"][1] == 16383
+
+def test_report_totals_and_unknown_formats(tmp_path):
+    sources = [screenshot(tmp_path / "screenshots" / f"{n}.png") for n in ("a", "b")]
+    config = ImagesConfig(formats=["webp", "gif"], presets=["thumbnail"], workers=1)
+    report = asyncio.run(ImageOptimizer(config, tmp_path).optimize(sources + [tmp_path / "missing.png"]))
+    assert len(report["files"]) == 2 and report["skipped_formats"] == ["gif"]
+    assert report["bytes_after"] < report["bytes_before"]
+    assert asyncio.run(ImageOptimizer(ImagesConfig(optimize=False), tmp_path).optimize(sources)) is None
@@ -0,0 +1,24 @@
+import contextlib
+import socket
+from shipsight.config import ShipSightConfig
+from shipsight.engine import orchestrator as orchestrator_module
+from shipsight.engine.orchestrator import Orchestrator
+
+def test_busy_port_is_asked_about_before_the_run(tmp_path, monkeypatch):
+    with socket.socket() as listener:
+        listener.bind(("localhost", 0))
+        listener.listen()
+        port = listener.getsockname()[1]
+        config = ShipSightConfig()
+        config.run.port, config.run.command = port, "python app.py"
+        asked, paused = [], []
+        monkeypatch.setattr(orchestrator_module.Prompt, "ask", lambda *a, **k: asked.append(1) or "u")
+
+        orchestrator = Orchestrator(tmp_path, config)
+        orchestrator.interactive = lambda: (paused.append(1), contextlib.nullcontext())[1]
+        orchestrator.prepare()
+        assert asked == [1] and paused == [1]
+
+        assert orchestrator.start() is True
+        assert asked == [1]  # Answered up front, not again from the server stage
+        assert orchestrator.detected_port == port
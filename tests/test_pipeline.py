@@ -0,0 +1,78 @@
+import asyncio
+import time
+import pytest
+from shipsight.pipeline import Pipeline, StageFailed
+
+def test_independent_stages_overlap():
+    pipeline = Pipeline()
+
+    async def sleep(**deps):
+        await asyncio.sleep(0.1)
+        return sorted(deps)
+
+    pipeline.add("analyze", lambda: time.sleep(0.1) or "scan", resource="cpu")
+    pipeline.add("server", sleep, resource="process")
+    pipeline.add("capture", sleep, deps=["server"], resource="browser")
+    pipeline.add("readme", sleep, deps=["analyze", "server"], resource="llm")
+    pipeline.add("linkedin", sleep, deps=["analyze", "server"], resource="llm")
+
+    started = time.perf_counter()
+    results = asyncio.run(pipeline.run())
+
+    assert time.perf_counter() - started < 0.35  # Sum of stages is 0.5s
+    assert results["analyze"] == "scan"
+    assert results["readme"] == ["analyze", "server"]
+    assert pipeline.timings["readme"]["status"] == "ok"
+    assert len(pipeline.critical_path()) == 2
+
+def test_resource_limits_serialize_stages():
+    pipeline = Pipeline({"llm": 1})
+    active, peak = [0], [0]
+
+    async def call():
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+
+    for name in ("a", "b", "c"):
+        pipeline.add(name, call, resource="llm")
+    asyncio.run(pipeline.run())
+    assert peak[0] == 1
+
+def test_failure_skips_only_dependents():
+    pipeline = Pipeline()
+
+    def server():
+        raise RuntimeError("port in use")
+
+    pipeline.add("server", server)
+    pipeline.add("capture", lambda server: "shots", deps=["server"])
+    pipeline.add("analyze", lambda: "scan")
+    asyncio.run(pipeline.run())
+
+    assert pipeline.failed("server") and pipeline.failed("capture")
+    assert pipeline.timings["capture"]["status"] == "skipped"
+    assert pipeline.result("analyze") == "scan"
+    with pytest.raises(StageFailed):
+        pipeline.result("capture")
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        Pipeline().add("capture", lambda server: None, deps=["server"])
+
+def test_optional_dependency_is_awaited_but_may_fail():
+    pipeline = Pipeline()
+
+    async def capture():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("browser crashed")
+
+    pipeline.add("capture", capture)
+    pipeline.add("carbon", lambda: ["snap.png"])
+    pipeline.add("images", lambda carbon, capture: (carbon, capture), deps=["carbon"], optional=["capture"])
+    asyncio.run(pipeline.run())
+
+    assert pipeline.failed("capture")
+    assert pipeline.result("images") == (["snap.png"], None)
+    assert pipeline.timings["images"]["start"] >= pipeline.timings["capture"]["seconds"]
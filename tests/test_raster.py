@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image
+from shipsight.capture.carbon import Carbonizer
+from shipsight.capture.raster import MAX_WIDTH, MIN_WIDTH, PADDING, TEXT, load_font, render_code_image, tokenize
+
+def test_tokens_are_coloured_by_theme():
+    lines = tokenize("def f():\n\treturn 1\n", "app.py", "monokai")
+    assert len(lines) == 2  # Trailing newline dropped like <pre>
+    keyword = dict(lines[0])["def"]
+    assert keyword != TEXT
+    assert lines[1][0][0].startswith(" " * 8)
+
+def test_window_width_is_clamped():
+    narrow = render_code_image("x = 1", "a.py")
+    wide = render_code_image("y" * 500, "a.py")
+    assert narrow.width == MIN_WIDTH
+    assert wide.width == MAX_WIDTH
+    assert wide.height == narrow.height
+
+def test_frame_keeps_the_backdrop_around_the_window():
+    window = render_code_image("x = 1", "a.py")
+    framed = render_code_image("x = 1", "a.py", frame=True)
+    assert framed.size == (window.width + 2 * PADDING, window.height + 2 * PADDING)
+
+def test_pillow_renderer_needs_no_browser(tmp_path):
+    carbon = Carbonizer(tmp_path, renderer="pillow")
+    written = asyncio.run(carbon.carbonize_many({"main.py": "print('hi')\n", "notes.txt": "plain"}))
+    assert [p.name for p in written] == ["main.py.png", "notes.txt.png"]
+    assert Image.open(written[0]).format == "PNG"
+    assert not carbon.browser.healthy() and carbon.browser.stats["launches"] == 0
+
+def test_carbonize_keeps_the_image_filename_contract(tmp_path):
+    carbon = Carbonizer(tmp_path, renderer="pillow")
+    path = asyncio.run(carbon.carbonize("x = 1\n", "app.py.png"))
+    assert path == tmp_path / "code_visuals" / "app.py.png" and path.exists()
+
+def test_bundled_font_is_a_truetype_file():
+    assert load_font(15).path.endswith("SourceCodePro-Medium.ttf")
+
+def test_pillow_renderer_falls_back_to_the_browser_without_pillow(tmp_path, monkeypatch):
+    import importlib.util
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *a: None if name == "PIL" else find_spec(name, *a))
+    assert Carbonizer(tmp_path, renderer="pillow").renderer == "browser"
+
+def test_browser_template_frames_like_the_rasterizer(tmp_path):
+    from shipsight.capture.raster import BACKDROP
+    template = Carbonizer(tmp_path)._page_template()
+    frame = template[template.index(".frame {"):template.index(".window {")]
+    assert f"padding: {PADDING}px" in frame and all(color in frame for color in BACKDROP)
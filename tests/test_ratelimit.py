@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from shipsight.ai import ratelimit
+from shipsight.ai.ratelimit import (LLMError, ProviderLimiter, RateLimitScheduler, TokenBucket,
+                                    backoff_delay, parse_duration)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_parse_duration_formats():
+    assert parse_duration("20") == 20.0
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("120ms") == pytest.approx(0.12)
+    assert parse_duration("1h2m3s") == 3723.0
+    assert parse_duration("2000-01-01T00:00:00Z") == 0.0
+    assert parse_duration("soon") is None
+
+def test_backoff_is_jittered_and_honours_retry_after():
+    delays = {backoff_delay(3) for _ in range(20)}
+    assert len(delays) > 1 and all(0 <= d <= 8 for d in delays)
+    assert backoff_delay(0, retry_after=5) >= 5
+
+def test_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)  # 1 per second
+    bucket.level = 0
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now = 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    assert bucket.wait_time(1000) == pytest.approx(59.5)  # Capped at one full bucket
+
+def test_headers_sync_the_buckets():
+    clock = FakeClock()
+    limiter = ProviderLimiter(30, 6000, clock)
+    limiter.observe({"x-ratelimit-remaining-tokens": "100", "x-ratelimit-reset-tokens": "7.66s",
+                     "x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2s"})
+    assert limiter.buckets["tokens"].level == 100
+    assert limiter.buckets["requests"].wait_time(1) == pytest.approx(2.0)
+
+def test_scheduler_retries_retryable_errors(monkeypatch):
+    sleeps = []
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", fake_sleep)
+    scheduler = RateLimitScheduler(max_retries=3)
+    scheduler.configure("ollama")
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise LLMError("503", "ollama", 503, retryable=True)
+        return "ok"
+
+    assert asyncio.run(scheduler.run("ollama", 10, flaky)) == "ok"
+    assert len(attempts) == 3 and len(sleeps) == 2
+    assert scheduler.stats["retries"] == 2
+
+def test_scheduler_surfaces_fatal_errors_immediately():
+    scheduler = RateLimitScheduler()
+    async def unauthorized():
+        raise LLMError("401", "ollama", 401)
+    with pytest.raises(LLMError):
+        asyncio.run(scheduler.run("ollama", 10, unauthorized))
+    assert scheduler.stats["retries"] == 0
+
+def test_throttled_429_pauses_the_whole_provider():
+    scheduler = RateLimitScheduler(max_retries=1)
+    limiter = scheduler.configure("groq", requests_per_minute=6000, tokens_per_minute=10**6)
+    calls = []
+
+    async def scenario():
+        async def throttled():
+            calls.append(asyncio.get_running_loop().time())
+            if len(calls) == 1:
+                raise LLMError("429", "groq", 429, retryable=True, retry_after=0.2)
+            return "ok"
+        return await scheduler.run("groq", 10, throttled)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert calls[1] - calls[0] >= 0.19
+    assert scheduler.stats["throttled"] == 1
+
+def test_per_call_retry_limit_leaves_the_shared_default_alone(monkeypatch):
+    async def fake_sleep(delay):
+        pass
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", fake_sleep)
+    scheduler = RateLimitScheduler(max_retries=3)
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        raise LLMError("503", "ollama", 503, retryable=True)
+
+    with pytest.raises(LLMError):
+        asyncio.run(scheduler.run("ollama", 10, failing, max_retries=0))
+    assert len(attempts) == 1 and scheduler.max_retries == 3
+
+def test_bucket_queue_works_across_event_loops():
+    bucket = TokenBucket(6000)  # 100 per second
+
+    async def contend():
+        bucket.level = 0  # The first waiter sleeps holding the queue, the others block on it
+        await asyncio.gather(*(bucket.acquire(1) for _ in range(3)))
+
+    asyncio.run(contend())
+    asyncio.run(contend())  # e.g. the static re-run after a failed server start
+
+def test_generators_get_their_own_scheduler():
+    from shipsight.ai.narrative import NarrativeGenerator
+    from shipsight.config import AIConfig
+    config = AIConfig(provider="groq", model="m", cache=False)
+    assert NarrativeGenerator(config).scheduler is not NarrativeGenerator(config).scheduler
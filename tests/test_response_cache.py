@@ -0,0 +1,64 @@
+import multiprocessing
+import sqlite3
+import time
+from shipsight.ai.response_cache import ResponseCache, response_key
+
+def test_key_covers_provider_model_prompt_and_params():
+    base = response_key("openai", "gpt-4o-mini", "prompt", {"max_tokens": 10})
+    assert base == response_key("openai", "gpt-4o-mini", "prompt", {"max_tokens": 10})
+    assert base != response_key("groq", "gpt-4o-mini", "prompt", {"max_tokens": 10})
+    assert base != response_key("openai", "gpt-4o", "prompt", {"max_tokens": 10})
+    assert base != response_key("openai", "gpt-4o-mini", "prompt!", {"max_tokens": 10})
+    assert base != response_key("openai", "gpt-4o-mini", "prompt", {"max_tokens": 11})
+
+def test_round_trip_and_stats(tmp_path):
+    cache = ResponseCache(tmp_path / "llm.sqlite3")
+    assert cache.get("k") is None
+    cache.put("k", "openai", "gpt-4o-mini", "# README", {"total_tokens": 42})
+
+    assert cache.get("k") == ("# README", {"total_tokens": 42})
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+    cache.close()
+    assert ResponseCache(tmp_path / "llm.sqlite3").get("k")[0] == "# README"
+
+def test_expired_entries_miss_and_are_evicted(tmp_path):
+    cache = ResponseCache(tmp_path / "llm.sqlite3", max_age_days=1)
+    cache.put("old", "ollama", "llama3", "stale")
+    cache._db().execute("UPDATE responses SET created = ?", (time.time() - 2 * 86400,))
+
+    assert cache.get("old") is None
+    cache.evict()
+    assert cache.stats["evictions"] == 1
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    import os
+    cache = ResponseCache(tmp_path / "llm.sqlite3")
+    for key in ("a", "b", "c"):
+        cache.put(key, "ollama", "llama3", os.urandom(500).hex())
+        cache._db().execute("UPDATE responses SET accessed = accessed - 10 WHERE key != ?", (key,))
+    cache.get("a")  # Touch "a" so "b" is the oldest
+    sizes = [size for (size,) in cache._db().execute("SELECT size FROM responses")]
+    cache.max_bytes = sum(sizes) - 1
+    cache.evict()
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats["evictions"] == 1
+
+def _writer(path, worker):
+    cache = ResponseCache(path)
+    for i in range(20):
+        cache.put(f"{worker}-{i}", "ollama", "llama3", f"text {i}")
+    cache.close()
+
+def test_concurrent_processes_share_the_cache(tmp_path):
+    path = tmp_path / "llm.sqlite3"
+    ResponseCache(path)._db()  # Create the schema up front
+    procs = [multiprocessing.Process(target=_writer, args=(path, w)) for w in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    count = sqlite3.connect(path).execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    assert count == 60
@@ -0,0 +1,21 @@
+from shipsight.capture.routes import RouteCapture, route_filenames, route_url, summarize
+
+def test_filenames_match_the_historic_scheme():
+    assert route_filenames(["/", "/about", "/docs/api/"]) == {"/": "index", "/about": "about", "/docs/api/": "docs_api"}
+
+def test_filenames_are_safe_and_unique_regardless_of_order():
+    routes = ["/a/b", "/a_b", "/search?q=x y"]
+    names = route_filenames(routes)
+    assert names["/search?q=x y"] == "search_q_x_y"
+    assert names["/a/b"] != names["/a_b"] and names["/a/b"].startswith("a_b-")
+    assert route_filenames(list(reversed(routes))) == names
+
+def test_route_url_joins_cleanly():
+    assert route_url("http://localhost:3000/", "/about") == "http://localhost:3000/about"
+    assert route_url("http://localhost:3000", "about") == "http://localhost:3000/about"
+
+def test_results_serialize_with_partial_flag():
+    ok = RouteCapture("/", "http://x/", "screenshots/index.png", "ok", 200, timings={"total_s": 1.0})
+    partial = RouteCapture("/slow", "http://x/slow", "screenshots/slow_partial.png", "partial", None, "Timeout")
+    assert ok.as_dict()["partial"] is False and partial.partial
+    assert summarize([ok, partial]) == "1 ok, 1 partial"
@@ -0,0 +1,35 @@
+from shipsight.ai.sections import SectionSplitter, marker, split_sections
+
+RESPONSE = f"""Sure! Here are both documents.
+{marker("readme")}
+
+# Demo
+A tool.
+## === LINKEDIN ===
+I needed a way to demo things.
+"""
+
+def test_split_sections_tolerates_preamble_and_heading_markers():
+    sections = split_sections(RESPONSE, ["readme", "linkedin"])
+    assert sections == {"readme": "# Demo\nA tool.", "linkedin": "I needed a way to demo things."}
+
+def test_missing_or_empty_sections_are_left_out():
+    text = f"{marker('readme')}\n\n{marker('linkedin')}\nPost"
+    assert split_sections(text, ["readme", "linkedin"]) == {"linkedin": "Post"}
+    assert split_sections("no markers at all", ["readme"]) == {}
+
+def test_splitter_routes_chunks_split_mid_marker():
+    out = {"readme": [], "linkedin": []}
+    splitter = SectionSplitter({name: out[name].append for name in out})
+    for i in range(0, len(RESPONSE), 7):
+        splitter(RESPONSE[i:i + 7])
+    splitter.close()
+    assert "".join(out["readme"]) == "# Demo\nA tool.\n"
+    assert "".join(out["linkedin"]) == "I needed a way to demo things.\n"
+
+def test_repeated_section_is_not_streamed_twice():
+    out = []
+    splitter = SectionSplitter({"readme": out.append})
+    splitter(f"{marker('readme')}\nfirst\n{marker('readme')}\nsecond")
+    splitter.close()
+    assert out == ["first\n"]
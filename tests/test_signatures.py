@@ -0,0 +1,78 @@
+from shipsight.ai.cache import ScanCache
+from shipsight.ai.signatures import Signature, SignatureMemo, extract_signatures
+import shipsight.ai.signatures as signatures
+
+def _sigs(text: str, ext: str):
+    return [(s.kind, s.name, s.depth) for s in extract_signatures(text, ext)]
+
+def test_python_uses_ast_for_methods_and_decorators():
+    code = (
+        "@dataclass\n"
+        "class Engine:\n"
+        "    @property\n"
+        "    def name(self): return 'x'\n"
+        "    async def run(self):\n"
+        "        def step(): pass\n"
+    )
+    assert _sigs(code, ".py") == [
+        ("decorator", "dataclass", 0),
+        ("class", "Engine", 0),
+        ("decorator", "property", 1),
+        ("method", "name", 1),
+        ("async method", "run", 1),
+        ("function", "step", 2),
+    ]
+    assert extract_signatures(code, ".py")[1].line == 2
+
+def test_python_falls_back_to_line_scan_on_truncated_source():
+    code = "class Engine:\n    def run(self):\n        return call(\n"
+    assert _sigs(code, ".py") == [("class", "Engine", 0), ("method", "run", 1)]
+
+def test_typescript_classes_methods_and_arrow_functions():
+    code = (
+        "@Injectable()\n"
+        "export class ApiService {\n"
+        "  constructor(private http: HttpClient) {}\n"
+        "  async fetch(id: string): Promise<Item> {\n"
+        "    if (id) { return this.cache[id]; }\n"
+        "  }\n"
+        "}\n"
+        "export const handler = async (req, res) => {\n"
+        "  res.send('{');\n"
+        "};\n"
+    )
+    assert _sigs(code, ".ts") == [
+        ("decorator", "Injectable", 0),
+        ("class", "ApiService", 0),
+        ("method", "constructor", 1),
+        ("method", "fetch", 1),
+        ("function", "handler", 0),
+    ]
+
+def test_go_rust_and_dart_scanners():
+    go = "type Server struct {\n}\nfunc (s *Server) Start() error {\n}\nfunc main() {\n}\n"
+    assert _sigs(go, ".go") == [("struct", "Server", 0), ("method", "Server.Start", 0), ("function", "main", 0)]
+
+    rust = "impl Config {\n    pub fn new() -> Self { Config {} }\n}\npub trait Run { fn run(&self); }\n"
+    assert _sigs(rust, ".rs") == [("impl", "Config", 0), ("method", "new", 1), ("trait", "Run", 0)]
+
+    dart = "class App extends StatelessWidget {\n  @override\n  Widget build(BuildContext c) {\n  }\n}\n"
+    assert _sigs(dart, ".dart") == [("class", "App", 0), ("decorator", "override", 1), ("method", "build", 1)]
+
+def test_memo_parses_each_content_once(tmp_path, monkeypatch):
+    calls = []
+    original = signatures.extract_signatures
+    monkeypatch.setattr(signatures, "extract_signatures", lambda t, e: (calls.append(e), original(t, e))[1])
+
+    cache = ScanCache(tmp_path / "cache.json")
+    memo = SignatureMemo(cache)
+    first = memo.extract("def a(): pass\n", ".py", "abc")
+    assert memo.extract("def a(): pass\n", ".py", "abc") == first
+    assert len(calls) == 1
+
+    # A fresh process sees the persisted result without parsing again
+    cache.save()
+    reloaded = ScanCache(tmp_path / "cache.json")
+    reloaded.load()
+    assert SignatureMemo(reloaded).lookup(".py", "abc") == [Signature("function", "a", 1, 0)]
+    assert len(calls) == 1
@@ -0,0 +1,73 @@
+import asyncio
+import time
+import pytest
+
+pytest.importorskip("playwright")
+from shipsight.capture import stability
+from shipsight.capture.stability import MUTATION_IDLE_MS, TRIGGER_LAZY, NetworkTracker, wait_for_stability
+
+class FakeRequest:
+    def __init__(self, resource_type="fetch"):
+        self.resource_type = resource_type
+
+class FakePage:
+    """Emits request events and answers the stability scripts with canned values."""
+    def __init__(self, dom_idle_ms=1000.0):
+        self.handlers = {}
+        self.dom_idle_ms = dom_idle_ms
+        self.scripts = []
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.handlers[event].remove(handler)
+
+    def emit(self, event, request):
+        for handler in self.handlers.get(event, []):
+            handler(request)
+
+    async def evaluate(self, script, arg=None):
+        self.scripts.append(script)
+        if script == TRIGGER_LAZY:
+            return {"steps": 3, "targets": 5, "height": 3000}
+        if script == MUTATION_IDLE_MS:
+            return self.dom_idle_ms
+        return True
+
+def test_tracks_inflight_requests_and_ignores_background_streams():
+    page = FakePage()
+    network = NetworkTracker(page)
+    fetch, socket = FakeRequest(), FakeRequest("websocket")
+    page.emit("request", fetch)
+    page.emit("request", socket)
+    assert network.busy() == 1 and network.requests == 1 and network.idle_for() == 0
+    page.emit("requestfinished", fetch)
+    assert network.busy() == 0
+    network.detach()
+    page.emit("request", FakeRequest())
+    assert network.requests == 1
+
+def test_long_polls_do_not_block_idle(monkeypatch):
+    monkeypatch.setattr(stability, "LONG_POLL_S", 0.0)
+    page = FakePage()
+    network = NetworkTracker(page)
+    page.emit("request", FakeRequest())
+    assert network.busy() == 0
+
+def test_quiet_page_settles_quickly():
+    page = FakePage()
+    network = NetworkTracker(page)
+    network.last_activity -= 1
+    started = time.perf_counter()
+    report = asyncio.run(wait_for_stability(page, network, timeout=5, quiet_ms=250))
+    assert report.stable and report.scroll_steps == 3 and report.lazy_targets == 5
+    assert time.perf_counter() - started < 0.5
+
+def test_busy_network_hits_the_cap():
+    page = FakePage()
+    network = NetworkTracker(page)
+    page.emit("request", FakeRequest())
+    report = asyncio.run(wait_for_stability(page, network, timeout=0.2, quiet_ms=50))
+    assert not report.stable and 0.2 <= report.seconds < 1
+    assert MUTATION_IDLE_MS not in page.scripts
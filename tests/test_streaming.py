@@ -0,0 +1,156 @@
+import asyncio
+import json
+import pytest
+from shipsight.ai.streaming import (SSEParser, StreamDecoder, StreamStats, StreamTimeout, idle_timeout,
+                                    normalize_usage, ollama_load_seconds)
+
+def _feed(decoder, lines):
+    return "".join(decoder.feed(line) for line in lines)
+
+def test_ollama_ndjson():
+    decoder = StreamDecoder("ollama")
+    lines = [
+        json.dumps({"response": "Ship", "done": False}),
+        json.dumps({"response": "Sight", "done": False}),
+        json.dumps({"response": "", "done": True, "prompt_eval_count": 12, "eval_count": 2}),
+    ]
+    assert _feed(decoder, lines) == "ShipSight"
+    assert decoder.done
+    assert decoder.usage == {"prompt_tokens": 12, "completion_tokens": 2, "total_tokens": 14}
+
+def test_openai_sse_with_usage_chunk():
+    decoder = StreamDecoder("openai")
+    chunk = lambda text: "data: " + json.dumps({"choices": [{"delta": {"content": text}}]})
+    lines = [
+        chunk("# Ti"), "", ": keep-alive", "", chunk("tle"), "",
+        "data: " + json.dumps({"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7}}), "",
+        "data: [DONE]", "",
+    ]
+    assert _feed(decoder, lines) == "# Title"
+    assert decoder.done
+    assert decoder.usage["total_tokens"] == 7
+
+def test_anthropic_sse_events():
+    decoder = StreamDecoder("anthropic")
+    event = lambda name, payload: [f"event: {name}", "data: " + json.dumps({"type": name, **payload}), ""]
+    lines = (
+        event("message_start", {"message": {"usage": {"input_tokens": 9}}})
+        + event("content_block_delta", {"delta": {"type": "text_delta", "text": "Hello"}})
+        + event("ping", {})
+        + event("content_block_delta", {"delta": {"type": "text_delta", "text": " world"}})
+        + event("message_delta", {"usage": {"output_tokens": 2}})
+        + event("message_stop", {})
+    )
+    assert _feed(decoder, lines) == "Hello world"
+    assert decoder.usage == {"prompt_tokens": 9, "completion_tokens": 2, "total_tokens": 11}
+    assert decoder.done
+
+def test_cached_prompt_tokens_are_normalized():
+    openai = {"prompt_tokens": 2000, "completion_tokens": 10, "prompt_tokens_details": {"cached_tokens": 1792}}
+    assert normalize_usage("openai", openai)["cached_tokens"] == 1792
+    anthropic = {"input_tokens": 50, "cache_read_input_tokens": 1800, "cache_creation_input_tokens": 0, "output_tokens": 10}
+    assert normalize_usage("anthropic", anthropic) == {
+        "prompt_tokens": 1850, "completion_tokens": 10, "total_tokens": 1860, "cached_tokens": 1800}
+    first = normalize_usage("anthropic", {"input_tokens": 50, "cache_creation_input_tokens": 1800, "output_tokens": 1})
+    assert first["cache_write_tokens"] == 1800 and "cached_tokens" not in first
+    assert normalize_usage("groq", {}) == {}
+
+def test_sse_joins_multiline_data():
+    parser = SSEParser()
+    events = [e for line in ["data: a", "data: b", ""] for e in parser.feed(line)]
+    assert events == [("message", "a\nb")]
+
+def test_stream_errors_raise():
+    with pytest.raises(ValueError):
+        StreamDecoder("ollama").feed(json.dumps({"error": "model not found"}))
+
+async def _lines(delays):
+    for i, delay in enumerate(delays):
+        await asyncio.sleep(delay)
+        yield str(i)
+
+def test_idle_timeout_allows_slow_steady_streams():
+    async def collect(delays, first, idle):
+        return [line async for line in idle_timeout(_lines(delays), first, idle)]
+
+    # Slow first token and a long total duration are fine...
+    assert asyncio.run(collect([0.15, 0.05, 0.05, 0.05], first=0.3, idle=0.1)) == ["0", "1", "2", "3"]
+    # ...but a stall between chunks is not
+    with pytest.raises(StreamTimeout):
+        asyncio.run(collect([0.0, 0.3], first=0.3, idle=0.1))
+
+def test_stream_stats():
+    stats = StreamStats()
+    stats.started -= 2.0
+    stats.token()
+    stats.first_token = stats.started + 0.5
+    stats.finish()
+    result = stats.as_dict(completion_tokens=30)
+    assert result["ttft_s"] == 0.5
+    assert 19 < result["tokens_per_s"] < 21
+
+def test_ollama_load_time_is_split_from_generation():
+    decoder = StreamDecoder("ollama")
+    decoder.feed(json.dumps({"response": "", "done": True, "load_duration": 1_500_000_000}))
+    assert decoder.load_s == 1.5
+    assert ollama_load_seconds({"response": "hi"}) is None
+    stats = StreamStats()
+    stats.started -= 2.0
+    stats.finish()
+    timings = stats.as_dict(load_s=decoder.load_s)
+    assert timings["load_s"] == 1.5
+    assert timings["generation_s"] == pytest.approx(timings["duration_s"] - 1.5, abs=0.01)
+
+def test_failed_artifact_stream_keeps_previous_file(tmp_path):
+    from shipsight.artifacts import ArtifactManager
+    manager = ArtifactManager(tmp_path)
+    manager.save_markdown("README_PRO.md", "last good run")
+
+    stream = manager.stream_markdown("README_PRO.md")
+    stream.write("half a resp")
+    assert (tmp_path / "README_PRO.md").read_text(encoding="utf-8") == "last good run"
+    stream.discard()
+    assert (tmp_path / "README_PRO.md").read_text(encoding="utf-8") == "last good run"
+
+    stream = manager.stream_markdown("README_PRO.md")
+    stream.write("new run")
+    stream.close()
+    assert (tmp_path / "README_PRO.md").read_text(encoding="utf-8") == "new run"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["README_PRO.md"]
+
+def test_preload_reports_ollama_load_duration(tmp_path):
+    import httpx
+    from shipsight.ai.narrative import NarrativeGenerator
+    from shipsight.config import AIConfig
+
+    class Transport:
+        def client(self, provider):
+            handler = lambda request: httpx.Response(200, json={"done": True, "load_duration": 2_500_000_000})
+            return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://ollama")
+
+    generator = NarrativeGenerator(AIConfig(provider="ollama", model="llama3", cache=False), transport=Transport())
+    assert asyncio.run(generator.preload())["load_s"] == 2.5
+
+def test_combined_ollama_call_sends_one_request_with_the_full_prompt():
+    import httpx
+    from shipsight.ai.narrative import NarrativeGenerator
+    from shipsight.config import AIConfig
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": "=== README ===\nR\n=== LINKEDIN ===\nL", "done": True,
+                                         "prompt_eval_count": 10, "eval_count": 2})
+
+    class Transport:
+        def client(self, provider):
+            return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://ollama")
+
+    config = AIConfig(provider="ollama", model="llama3", cache=False, stream=False)
+    generator = NarrativeGenerator(config, transport=Transport())
+    generator._log_usage = lambda *a, **k: None
+    asyncio.run(generator.generate_all("PROJECT", ["readme", "linkedin"]))
+
+    assert len(bodies) == 1
+    assert "context" not in bodies[0]
+    assert bodies[0]["prompt"].startswith(generator._prefix("PROJECT"))
@@ -0,0 +1,25 @@
+import asyncio
+import pytest
+
+httpx = pytest.importorskip("httpx")
+from shipsight.ai.transport import LLMTransport, resolve_endpoint
+
+def test_endpoint_overrides(monkeypatch):
+    monkeypatch.delenv("SHIPSIGHT_OLLAMA_URL", raising=False)
+    assert resolve_endpoint("ollama") == "http://localhost:11434"
+    assert resolve_endpoint("openai", {"openai": "http://127.0.0.1:9000/v1/"}) == "http://127.0.0.1:9000/v1"
+    monkeypatch.setenv("SHIPSIGHT_OLLAMA_URL", "http://stand-in:1234")
+    assert resolve_endpoint("ollama", {"ollama": "http://ignored"}) == "http://stand-in:1234"
+
+def test_one_client_per_provider_until_closed():
+    async def scenario():
+        transport = LLMTransport({"openai": "http://127.0.0.1:9/v1"})
+        first = transport.client("openai")
+        assert transport.client("openai") is first
+        assert transport.client("groq") is not first
+        assert str(first.base_url).rstrip("/") == "http://127.0.0.1:9/v1"
+        await transport.aclose()
+        assert first.is_closed
+        assert transport.client("openai") is not first
+        await transport.aclose()
+    asyncio.run(scenario())
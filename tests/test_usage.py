@@ -0,0 +1,103 @@
+import json
+import pytest
+from shipsight.ai.usage import UsageIndex, UsageLog, estimate_cost
+
+def entry(project="app", provider="groq", model="llama-3.1-8b-instant", day="2026-10-01", **extra):
+    record = {"timestamp": f"{day}T12:00:00", "project": project, "provider": provider, "model": model,
+              "usage": {"prompt_tokens": 1000, "completion_tokens": 500, "total_tokens": 1500}}
+    record.update(extra)
+    return record
+
+def test_records_are_buffered_until_flush(tmp_path):
+    log = UsageLog(tmp_path, batch_size=3)
+    log.record(entry())
+    log.record(entry())
+    assert not log.path.exists()
+    log.record(entry())  # Batch full
+    assert len(log.path.read_text().splitlines()) == 3
+    log.record(entry())
+    log.flush()
+    assert len(log.path.read_text().splitlines()) == 4
+
+def test_log_rotates_past_size_limit(tmp_path):
+    log = UsageLog(tmp_path, rotate_bytes=400, batch_size=1)
+    for _ in range(6):
+        log.record(entry())
+    assert log.archives()
+    lines = sum(len(p.read_text().splitlines()) for p in log.segments())
+    assert lines == 6
+
+def test_index_is_incremental_across_rotation(tmp_path):
+    log = UsageLog(tmp_path, rotate_bytes=600, batch_size=1)
+    index = UsageIndex(tmp_path, keep_archives=0)
+    log.record(entry(cache="miss", duration_s=2.0, ttft_s=0.5,
+                     usage={"prompt_tokens": 1000, "completion_tokens": 500, "cached_tokens": 800}))
+    assert index.refresh() == 1
+    assert index.refresh() == 0
+    for _ in range(4):
+        log.record(entry(cache="hit", saved={"total_tokens": 1500}))
+    assert index.refresh() == 4
+    assert not log.archives()  # Indexed archives are pruned
+
+    [row] = index.report(["provider"])
+    assert row["calls"] == 5 and row["prompt_tokens"] == 5000 and row["cached_tokens"] == 800
+    assert row["cache_hit_rate"] == 0.8 and row["saved_tokens"] == 6000
+    assert row["latency_p50"] == pytest.approx(2.0, rel=0.15)
+    index.close()
+
+def test_partial_lines_wait_for_the_next_refresh(tmp_path):
+    index = UsageIndex(tmp_path)
+    line = json.dumps(entry())
+    (tmp_path / "token_usage.jsonl").write_text(line + "\n" + line[:20])
+    assert index.refresh() == 1
+    with open(tmp_path / "token_usage.jsonl", "a") as f:
+        f.write(line[20:] + "\n")
+    assert index.refresh() == 1
+    index.close()
+
+def test_report_groups_and_filters(tmp_path):
+    log = UsageLog(tmp_path)
+    log.record(entry(project="a", day="2026-09-30"))
+    log.record(entry(project="a", provider="openai", model="gpt-4o-mini"))
+    log.record(entry(project="b"))
+    log.flush()
+    index = UsageIndex(tmp_path)
+    index.refresh()
+    by_project = index.report(["project"])
+    assert [(r["project"], r["calls"]) for r in by_project] == [("a", 2), ("b", 1)]
+    recent = index.report(["day"], since="2026-10-01")
+    assert [(r["day"], r["calls"]) for r in recent] == [("2026-10-01", 2)]
+    [total] = index.report([], project="a")
+    assert total["cost"] == pytest.approx(estimate_cost("groq", "llama-3.1-8b-instant", 1000, 500)
+                                          + estimate_cost("openai", "gpt-4o-mini", 1000, 500), abs=1e-4)
+    with pytest.raises(ValueError):
+        index.report(["prompt; DROP TABLE daily"])
+    index.close()
+
+def test_cost_uses_longest_model_prefix():
+    assert estimate_cost("openai", "gpt-4o-mini-2024-07-18", 1_000_000, 0) == pytest.approx(0.15)
+    assert estimate_cost("openai", "gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+    assert estimate_cost("ollama", "gpt-4o", 1_000_000, 0) == 0.0
+    assert estimate_cost("openai", "unknown", 1_000_000, 0) == 0.0
+
+def test_async_records_are_written_off_loop_and_on_a_timer(tmp_path):
+    import asyncio
+    async def lines_after(log, expected):
+        for _ in range(100):
+            if log.path.exists() and len(log.path.read_text().splitlines()) >= expected:
+                break
+            await asyncio.sleep(0.01)
+        return len(log.path.read_text().splitlines())
+
+    async def scenario():
+        log = UsageLog(tmp_path, batch_size=2, flush_interval=0.05)
+        log.record(entry())
+        log.record(entry())  # Batch full: handed to a worker thread, not written inline
+        assert not log.path.exists()
+        assert await lines_after(log, 2) == 2
+        log.record(entry())  # Partial batch: the timer writes it
+        assert await lines_after(log, 3) == 3
+        log.record(entry())
+        await log.aflush()
+        assert len(log.path.read_text().splitlines()) == 4
+    asyncio.run(scenario())
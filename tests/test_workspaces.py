@@ -0,0 +1,60 @@
+from shipsight.ai.index import ProjectIndex
+from shipsight.ai.intelligence import IntelligenceEngine, IGNORES
+from shipsight.ai.workspaces import detect_workspaces
+
+def _workspaces(project):
+    return [(w.path, w.name, w.manager) for w in detect_workspaces(ProjectIndex.build(project, IGNORES))]
+
+def test_detect_npm_and_pnpm_workspaces(temp_project):
+    project = temp_project({
+        "package.json": '{"workspaces": ["packages/*", "!packages/legacy"]}',
+        "packages/ui/package.json": '{"name": "@acme/ui"}',
+        "packages/legacy/package.json": '{"name": "legacy"}',
+        "packages/notes/README.md": "no manifest",
+        "pnpm-workspace.yaml": "packages:\n  - 'apps/**'\n",
+        "apps/web/package.json": '{"name": "web"}',
+        "apps/web/node_modules/dep/package.json": '{"name": "dep"}',
+    })
+    assert _workspaces(project) == [
+        ("apps/web", "web", "pnpm"),
+        ("packages/ui", "@acme/ui", "npm"),
+    ]
+
+def test_detect_cargo_and_go_workspaces(temp_project):
+    project = temp_project({
+        "Cargo.toml": '[workspace]\nmembers = ["crates/*"]\nexclude = ["crates/scratch"]\n',
+        "crates/core/Cargo.toml": '[package]\nname = "acme-core"\n',
+        "crates/scratch/Cargo.toml": '[package]\nname = "scratch"\n',
+        "go.work": "go 1.22\n\nuse (\n    ./svc/api\n    ./svc/worker // jobs\n)\n",
+        "svc/api/go.mod": "module example.com/api\n",
+        "svc/worker/go.mod": "module example.com/worker\n",
+    })
+    assert _workspaces(project) == [
+        ("crates/core", "acme-core", "cargo"),
+        ("svc/api", "example.com/api", "go"),
+        ("svc/worker", "example.com/worker", "go"),
+    ]
+
+def test_analyze_workspaces_merges_per_package_results(temp_project):
+    service = "".join(f"value_{i} = compute({i})\n" for i in range(20))
+    project = temp_project({
+        "package.json": '{"workspaces": ["packages/*"]}',
+        "packages/web/package.json": '{"name": "web"}',
+        "packages/web/vite.config.ts": "export default {}",
+        "packages/mobile/pubspec.yaml": "name: mobile",
+        "packages/mobile/package.json": '{"name": "mobile"}',
+        "packages/mobile/lib/api_service.dart": service,
+    })
+    engine = IntelligenceEngine(project)
+    analysis = engine.analyze_workspaces(engine.analyze_stack(), max_workers=2)
+
+    by_name = {ws["name"]: ws for ws in analysis["workspaces"]}
+    assert by_name["web"]["dna"] == "WEB"
+    assert by_name["mobile"]["dna"] == "MOBILE"
+    assert by_name["mobile"]["heroes"] == ["api_service.dart"]
+    assert {"flutter", "vite", "node"} <= set(analysis["frameworks"])
+
+def test_single_project_has_no_workspaces(temp_project):
+    project = temp_project({"package.json": '{"name": "solo"}'})
+    engine = IntelligenceEngine(project)
+    assert "workspaces" not in engine.analyze_workspaces(engine.analyze_stack())